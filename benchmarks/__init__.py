@@ -0,0 +1 @@
+"""Benchmarks for fluxi. Run them from the repository root, e.g. ``python -m benchmarks.bench_mux_set``"""
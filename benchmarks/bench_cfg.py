@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""
+``save_cfg`` and ``load_cfg`` against the number of parameters
+"""
+import gc
+from fluxi import Fluxi
+from benchmarks.harness import median_time,in_tempdir
+
+def suite(quick=False):
+    out=[]
+    with in_tempdir():
+        for n in ([100,1000] if quick else [100,1000,5000]):
+            fl=Fluxi("Benchmark cfg %d"%n,show=False)
+            with fl.bulk():
+                for i in range(n):
+                    fl.F("Group %d/p%d"%(i//50,i)).v=i
+            out.append(("save_cfg N=%d"%n,median_time(fl.save_cfg,repeat=3)*1e3,"ms"))
+            out.append(("load_cfg N=%d"%n,median_time(fl.load_cfg,repeat=3)*1e3,"ms"))
+            del fl
+            gc.collect()
+    return out
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+The device framework: contention on ``DeviceQueue`` through
+``decorator_access_control`` and the ``NiDaqRingBuffer``
+
+The package ``devices`` imports the drivers of all devices (pyserial,
+PyDAQmx, ...), so only ``devices/devices.py`` is loaded for the queue, the
+``NiDaqRingBuffer`` measurements are skipped without the drivers.
+"""
+import importlib.util,os,threading,time
+import numpy as np
+from benchmarks.harness import rate
+
+def _core():
+    """ devices/devices.py without the package and its drivers """
+    path=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),"devices","devices.py")
+    spec=importlib.util.spec_from_file_location("_bench_devices_core",path)
+    module=importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def _queue_contention(core,threads,calls):
+    Device,DeviceQty,decorator_access_control=core.Device,core.DeviceQty,core.decorator_access_control
+    class Qty(DeviceQty):
+        @decorator_access_control
+        def get(self):
+            return 1
+    dev=Device()
+    def work():
+        q=Qty(dev,prio=1)
+        for i in range(calls):
+            q.get()
+    ths=[threading.Thread(target=work) for i in range(threads)]
+    t0=time.perf_counter()
+    for t in ths:
+        t.start()
+    for t in ths:
+        t.join()
+    return threads*calls/(time.perf_counter()-t0)
+
+def suite(quick=False):
+    out=[]
+    core=_core()
+    calls=500 if quick else 5000
+    for threads in [1,2,4,8,16,32]:
+        out.append(("decorator_access_control threads=%d"%threads,_queue_contention(core,threads,max(calls//threads,50)),"/s"))
+    try:
+        from devices.nidaq import NiDaqRingBuffer
+    except ImportError as e:
+        print("skipping the NiDaqRingBuffer benchmarks: %s"%e)
+        return out
+    for block in [100,10000]:
+        buf=NiDaqRingBuffer(100000)
+        x=np.random.rand(block)
+        n=200 if quick else 2000
+        out.append(("NiDaqRingBuffer.extend block=%d"%block,rate(lambda i: buf.extend(x),n)*block/1e6,"MSamples/s"))
+        out.append(("NiDaqRingBuffer.get block=%d"%block,rate(lambda i: buf.get(),n//10),"/s"))
+    return out
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+"""
+Writing and reading data with ``helper.save_tsv`` and ``helper.load_tsv``
+"""
+import os
+import numpy as np
+import fluxi.helper
+from benchmarks.harness import median_time,in_tempdir
+
+def suite(quick=False):
+    out=[]
+    with in_tempdir():
+        for rows in ([10000] if quick else [10000,100000]):
+            data=np.random.rand(rows,4)
+            save=lambda: fluxi.helper.save_tsv(data,"data")
+            t=median_time(save,repeat=3)
+            size=os.path.getsize("data.tsv.gz")
+            out.append(("save_tsv %dx4"%rows,t*1e3,"ms"))
+            t=median_time(lambda: fluxi.helper.load_tsv("data"),repeat=3)
+            out.append(("load_tsv %dx4"%rows,t*1e3,"ms"))
+            out.append(("load_tsv %dx4 compressed"%rows,size/t/1e6,"MB/s"))
+    return out
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""
+Throughput of ``mux.v=x`` from 4 concurrent loop threads
+
+"before" replays the old set path of a float parameter (unsynchronized
+attribute and a ``request_redraw`` dict insertion on every set), "after" uses
+the versioned ValueCell and the coalesced redraw request of the muxe. Run with::
+
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_mux_set
+"""
+import threading,time,weakref
+from fluxi import Fluxi
+
+class LegacySet(object):
+    """ the set path of MuxBase before the ValueCell """
+    def __init__(self,mux):
+        self.id=mux.id
+        self.getfluxi=weakref.ref(mux.getfluxi())
+    def set(self,value):
+        self.value=float(value)
+        self._hasbeenset=True
+        self.getfluxi().redraw_list[self.id]=self
+
+def run_threads(setters,n,threads=4):
+    def work(setter):
+        for i in range(n):
+            setter(i)
+    ths=[threading.Thread(target=work,args=(setters[i%len(setters)],)) for i in range(threads)]
+    t0=time.perf_counter()
+    for t in ths:
+        t.start()
+    for t in ths:
+        t.join()
+    return threads*n/(time.perf_counter()-t0)
+
+def main(n=200000,threads=4):
+    fl=Fluxi("Benchmark set",show=False)
+    muxe=[fl.F("Bench/value %d"%i) for i in range(threads)]
+    before=run_threads([LegacySet(m).set for m in muxe],n,threads)
+    after=run_threads([m.set for m in muxe],n,threads)
+    print("set() from %d threads: before %.0f/s, after %.0f/s (x%.2f)"%(threads,before,after,after/before))
+    return {"before":before,"after":after}
+
+if __name__ == '__main__':
+    main()
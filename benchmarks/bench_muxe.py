@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Charts, images and the redraw of many parameters
+
+- ``MuxC.add`` throughput and ``MuxC.draw`` time against length and number of curves
+- ``MuxC.add_block`` throughput in samples per second
+- ``MuxC.draw`` of long curves with and without the min/max envelope
+- ``MuxG.draw`` with static curves and one that changes, ``MuxG.extend`` throughput
+- latency from ``MuxImg.setImage`` to the drawn image
+- cost of ``Fluxi._redraw`` with N changed parameters
+"""
+import gc
+import numpy as np
+from fluxi import Fluxi
+from benchmarks.harness import median_time,rate,in_tempdir
+
+def suite(quick=False):
+    out=[]
+    with in_tempdir():
+        fl=Fluxi("Benchmark muxe",show=False)
+        n_add=2000 if quick else 20000
+        for length in ([200,2000] if quick else [200,2000,20000]):
+            for curves in [1,5,20]:
+                c=fl.C("Chart %d %d"%(length,curves))
+                c.setLength(length)
+                values=np.random.rand(curves)
+                out.append(("MuxC.add length=%d curves=%d"%(length,curves),rate(lambda i: c.add(values),n_add),"/s"))
+                out.append(("MuxC.draw length=%d curves=%d"%(length,curves),median_time(c.draw)*1e3,"ms"))
+                block=np.random.rand(curves,1000) if curves>1 else np.random.rand(1000)
+                out.append(("MuxC.add_block length=%d curves=%d"%(length,curves),1000*rate(lambda i: c.add_block(block),n_add//100),"/s"))
+                fl.removeElement(c.id)
+        for length in ([100000] if quick else [100000,1000000]):
+            c=fl.C("Long chart %d"%length)
+            c.setLength(length)
+            c.add_block(np.random.rand(length))
+            for decimate in (True,False):
+                c.decimate=decimate
+                def draw():
+                    c.add_block(np.random.rand(100))
+                    c.draw()
+                out.append(("MuxC.draw length=%d decimate=%s"%(length,decimate),median_time(draw,repeat=5)*1e3,"ms"))
+            fl.removeElement(c.id)
+        g=fl.G("Graph static")
+        for i in range(10):
+            g.set(np.random.rand(10000),i=i)
+        def live():
+            g.set(np.random.rand(10000),i=10)
+            g.draw()
+        out.append(("MuxG.draw 10 static + 1 changed curve",median_time(live)*1e3,"ms"))
+        def sweep(i):
+            g.extend(11,[float(i)],[np.random.rand()])
+        out.append(("MuxG.extend one point",rate(sweep,n_add),"/s"))
+        fl.removeElement(g.id)
+        for size in ([256,1024] if quick else [256,1024,2048]):
+            im=fl.Im("Image %d"%size)
+            im.maxredraw_rate=1e9
+            data=np.random.rand(size,size)
+            def show():
+                im.setImage(data)
+                fl._redraw()
+            show()
+            out.append(("MuxImg.setImage to draw %dx%d"%(size,size),median_time(show,repeat=5)*1e3,"ms"))
+        for n in ([10,100] if quick else [10,100,1000]):
+            with fl.bulk():
+                params=[fl.F("Redraw %d/p%d"%(n,i)) for i in range(n)]
+            fl._redraw()
+            def redraw():
+                for i,p in enumerate(params):
+                    p.set(i+np.random.rand())
+                fl._redraw()
+            out.append(("_redraw %d dirty params"%n,median_time(redraw,repeat=5)*1e3,"ms"))
+        del fl
+        gc.collect()
+    return out
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Throughput of the remote-control server with a local client
+
+Measures batched gets of many floats, batched sets and the transfer of
+images as binary frames. The client runs in a thread while the GUI thread
+serves the requests. Run with::
+
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_remote
+"""
+import threading,time
+import numpy as np
+from fluxi import Fluxi
+from fluxi.remote import RemoteClient
+
+def timed(func,n):
+    t0=time.perf_counter()
+    for i in range(n):
+        func(i)
+    return n/(time.perf_counter()-t0)
+
+def run_client(address,ids,results,n=200,image_rounds=50):
+    with RemoteClient(address) as client:
+        results["get 1"]=timed(lambda i: client.get(ids[:1]),n)
+        results["get %d"%len(ids)]=timed(lambda i: client.get(ids),n)
+        results["set %d"%len(ids)]=timed(lambda i: client.set({id:float(i) for id in ids}),n)
+        size=client.get("im:Bench Image").nbytes
+        rate=timed(lambda i: client.get(["im:Bench Image"]),image_rounds)
+        results["image MB/s"]=rate*size/1e6
+
+def main(nparams=100):
+    fl=Fluxi("Benchmark remote",show=False)
+    ids=["f:Bench/p%d"%i for i in range(nparams)]
+    with fl.bulk():
+        for id in ids:
+            fl.g(id).v=1.
+    fl.Im("Bench Image").v=np.random.rand(1000,1000)
+    server=fl.serve()
+    results={}
+    th=threading.Thread(target=run_client,args=(server.address,ids,results))
+    th.start()
+    while th.is_alive():
+        fl.wait(0.001)
+    for name,rate in results.items():
+        if name.endswith("MB/s"):
+            print("%-12s %8.0f MB/s"%(name[:-5],rate))
+        else:
+            print("%-12s %8.0f requests/s"%(name,rate))
+    server.stop()
+    return results
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+Startup time of a Fluxi with N saved parameters, with and without bulk loading
+
+For each N a config and a values file are written into a temporary
+directory and the time to construct the Fluxi (which loads them) is
+measured. Run with::
+
+    QT_QPA_PLATFORM=offscreen python -m benchmarks.bench_startup
+"""
+import contextlib,gc,os,tempfile,time
+import fluxi.helper
+from fluxi import Fluxi,__version__
+
+SIZES=[100,500,1000,2000,5000]
+TYPES=["f","i","b","s"]
+
+def write_files(title,n):
+    ids=["%s:Group %d/param %d"%(TYPES[i%len(TYPES)],i//50,i) for i in range(n)]
+    values={id:{"f":1.5,"i":3,"b":True,"s":"text"}[id[0]] for id in ids}
+    fluxi.helper.save_json({"fileversion":__version__,"muxe":{id:{} for id in ids}},title+".cfg.json")
+    fluxi.helper.save_json({"fileversion":__version__,"values":values},title+".values.json")
+
+@contextlib.contextmanager
+def no_bulk():
+    """ the previous behaviour: every element is created and set on its own """
+    bulk=Fluxi.bulk
+    Fluxi.bulk=lambda self: contextlib.suppress()
+    try:
+        yield
+    finally:
+        Fluxi.bulk=bulk
+
+def load_time(title):
+    t0=time.perf_counter()
+    fl=Fluxi(title,show=False)
+    fl._redraw()
+    dt=time.perf_counter()-t0
+    del fl
+    gc.collect()
+    return dt
+
+def main(sizes=SIZES):
+    results={}
+    cwd=os.getcwd()
+    with tempfile.TemporaryDirectory() as d:
+        os.chdir(d)
+        try:
+            for n in sizes:
+                for title in ["Startup %d"%n,"Startup single %d"%n]:
+                    write_files(title,n)
+                bulk=load_time("Startup %d"%n)
+                with no_bulk():
+                    single=load_time("Startup single %d"%n)
+                results[n]={"bulk":bulk,"single":single}
+                print("N=%5d: bulk %.3f s, one by one %.3f s"%(n,bulk,single))
+        finally:
+            os.chdir(cwd)
+    return results
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+Helpers shared by the benchmark suites
+
+A suite is a function ``suite(quick=False)`` that returns a list of
+``(name, value, unit)``. Units ending in ``/s`` are rates (higher is better),
+all others are times (lower is better).
+"""
+import contextlib,os,statistics,tempfile,time
+
+def median_time(func,repeat=7,number=1):
+    """ median wall time of ``number`` calls of ``func`` over ``repeat`` runs, in seconds per call """
+    times=[]
+    for i in range(repeat):
+        t0=time.perf_counter()
+        for j in range(number):
+            func()
+        times.append((time.perf_counter()-t0)/number)
+    return statistics.median(times)
+
+def rate(func,n):
+    """ calls per second of ``func(i)`` for i in range(n) """
+    t0=time.perf_counter()
+    for i in range(n):
+        func(i)
+    return n/(time.perf_counter()-t0)
+
+def higher_is_better(unit):
+    return unit.endswith("/s")
+
+@contextlib.contextmanager
+def in_tempdir():
+    """ run in an empty temporary working directory, fluxis write their config files there """
+    cwd=os.getcwd()
+    with tempfile.TemporaryDirectory() as d:
+        os.chdir(d)
+        try:
+            yield d
+        finally:
+            os.chdir(cwd)
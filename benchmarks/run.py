@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Run the benchmark suites headless and compare the results with an earlier run
+
+    python -m benchmarks.run -o new.json
+    python -m benchmarks.run --quick --only muxe cfg
+    python -m benchmarks.run -o new.json --compare old.json --threshold 0.15
+
+Qt uses the offscreen platform unless ``QT_QPA_PLATFORM`` is set. With
+``--compare`` every metric that got worse by more than the threshold is
+flagged and the exit code is 1.
+"""
+import os
+os.environ.setdefault("QT_QPA_PLATFORM","offscreen")
+import argparse,importlib,json,platform,sys,time
+from benchmarks.harness import higher_is_better
+
+SUITES=["muxe","cfg","devices","helper","mux_set","startup","remote"]
+
+def _mux_set(quick=False):
+    from benchmarks import bench_mux_set
+    r=bench_mux_set.main(n=20000 if quick else 200000)
+    return [("mux.set from 4 threads",r["after"],"/s")]
+
+def _startup(quick=False):
+    from benchmarks import bench_startup
+    r=bench_startup.main([100,1000] if quick else bench_startup.SIZES)
+    return [("startup N=%d"%n,v["bulk"]*1e3,"ms") for n,v in r.items()]
+
+def _remote(quick=False):
+    from benchmarks import bench_remote
+    r=bench_remote.main()
+    return [("remote "+name,v,"MB/s" if name.endswith("MB/s") else "/s") for name,v in r.items()]
+
+def get_suite(name):
+    wrapped={"mux_set":_mux_set,"startup":_startup,"remote":_remote}
+    if name in wrapped:
+        return wrapped[name]
+    return importlib.import_module("benchmarks.bench_"+name).suite
+
+def run(names,quick=False):
+    results={}
+    for name in names:
+        print("== %s"%name)
+        t0=time.perf_counter()
+        for metric,value,unit in get_suite(name)(quick=quick):
+            key="%s: %s"%(name,metric)
+            results[key]={"value":value,"unit":unit}
+            print("  %-50s %12.4g %s"%(metric,value,unit))
+        print("   (%.1f s)"%(time.perf_counter()-t0))
+    return results
+
+def meta():
+    import fluxi
+    return {
+        "time":time.strftime("%Y-%m-%d %H:%M:%S"),
+        "fluxi":fluxi.__version__,
+        "python":platform.python_version(),
+        "platform":platform.platform(),
+        "qpa":os.environ.get("QT_QPA_PLATFORM"),
+    }
+
+def compare(old,new,threshold=0.1):
+    """ the metrics that got worse by more than ``threshold`` (relative) as a list of (key, old, new, change) """
+    regressions=[]
+    for key,n in sorted(new.items()):
+        o=old.get(key)
+        if o is None or o["unit"]!=n["unit"] or not o["value"]:
+            continue
+        change=n["value"]/o["value"]-1
+        worse=-change if higher_is_better(n["unit"]) else change
+        flag=""
+        if worse>threshold:
+            flag="REGRESSION"
+            regressions.append((key,o["value"],n["value"],change))
+        elif worse<-threshold:
+            flag="improved"
+        print("  %-60s %12.4g -> %12.4g %s %+6.1f%% %s"%(key,o["value"],n["value"],n["unit"],100*change,flag))
+    return regressions
+
+def main(argv=None):
+    parser=argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("-o","--output",help="write the results to this JSON file")
+    parser.add_argument("--only",nargs="+",choices=SUITES,default=SUITES,help="run only these suites")
+    parser.add_argument("--quick",action="store_true",help="smaller sizes, for a quick check")
+    parser.add_argument("--compare",help="JSON file of an earlier run")
+    parser.add_argument("--threshold",type=float,default=0.1,help="relative change that counts as regression (default 0.1)")
+    args=parser.parse_args(argv)
+    results=run(args.only,args.quick)
+    if args.output:
+        with open(args.output,"w") as f:
+            json.dump({"meta":meta(),"results":results},f,indent=1)
+    if args.compare:
+        with open(args.compare) as f:
+            old=json.load(f)["results"]
+        print("== comparison with %s"%args.compare)
+        regressions=compare(old,results,args.threshold)
+        if regressions:
+            print("%d regressions"%len(regressions))
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
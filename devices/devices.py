@@ -5,6 +5,7 @@ Base class for device interaction.
 
 import functools
 import queue
+import sys
 import threading
 import time
 import weakref
@@ -598,8 +599,15 @@ def decorator_access_control(func):
             # Execute device call, as soon as submitted item is the first in the
             # queue and there are no more pending tasks. This can be done with 
             # the condition variable released, due to the explicite check for
-            # pending tasks.
-            result = func(self, *args, **kwargs)
+            # pending tasks. The call is timed if the instrumentation of
+            # fluxi is loaded and enabled.
+            perf = sys.modules.get("fluxi.perf")
+            if perf is not None and perf.enabled:
+                t0 = perf.clock()
+                result = func(self, *args, **kwargs)
+                perf.record("device " + func.__qualname__, perf.clock() - t0)
+            else:
+                result = func(self, *args, **kwargs)
         finally:
             with self.parent.queue:
                 # Mark the task as done and notify other waiting tasks.
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+"""
+Transactions that collect value changes and apply them in one go
+"""
+
+class Batch(object):
+    """
+    Value changes and actions collected by ``with fluxi.batch():``
+
+    The last value per mux wins and every action is called only once, after
+    all values have been applied.
+    """
+    def __init__(self):
+        self.values={}
+        self.actions={}
+
+    def set(self,mux,value):
+        self.values[mux.id]=(mux,value)
+
+    def action(self,mux):
+        self.actions[mux.id]=mux
+
+    def apply(self,lock):
+        """ set all values while holding ``lock``, then call the actions """
+        with lock:
+            for mux,value in self.values.values():
+                mux._set(value)
+        for mux in self.actions.values():
+            mux.emitChanged()
+
+    def __len__(self):
+        return len(self.values)
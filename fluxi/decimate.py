@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+Min/max envelopes of long curves, so that drawing costs about the plot width and not the number of samples
+
+A curve with many more samples than pixel columns looks the same if each
+column only gets the smallest and the largest sample that falls into it:
+spikes stay visible, which plain subsampling would miss. ``envelope``
+computes this from the data in one pass. ``MinMaxPyramid`` keeps the minima
+and maxima of blocks of ``factor``, ``factor**2``, ... samples, which are
+updated incrementally as samples arrive, so an envelope only reads the
+blocks of the level that fits the width, about ``factor*width`` values::
+
+    pyramid=MinMaxPyramid()
+    pyramid.update(ring)                    # a RingBuffer or ArraySource
+    xs,ys=pyramid.envelope(0,start,stop,width=800)
+
+The envelope has two points per column, the minimum and the maximum, at the
+index of the first sample of the column. Columns without samples are NaN.
+"""
+import numpy as np
+
+def envelope(ys,width,x0=0):
+    """ min/max pairs of ``ys`` for ``width`` columns, returns xs,ys or None if ys is short enough to draw as it is """
+    ys=np.asarray(ys)
+    n=len(ys)
+    if n<=2*width:
+        return None
+    group=-(-n//width)
+    return _pairs(*_reduce(ys,ys,group),x0,group)
+
+def _reduce(mins,maxs,group):
+    """ the minima and maxima of groups of ``group`` values, NaN is ignored """
+    m=len(mins)
+    bins=-(-m//group)
+    if bins*group!=m:
+        pad=np.full(bins*group-m,np.nan)
+        mins=np.concatenate((mins,pad))
+        maxs=np.concatenate((maxs,pad))
+    #fmin/fmax skip NaN without warnings for empty columns
+    return np.fmin.reduce(mins.reshape(bins,group),axis=1),np.fmax.reduce(maxs.reshape(bins,group),axis=1)
+
+def _pairs(mins,maxs,x0,step):
+    xs=np.repeat(x0+step*np.arange(len(mins),dtype=float),2)
+    ys=np.empty(2*len(mins))
+    ys[0::2]=mins
+    ys[1::2]=maxs
+    return xs,ys
+
+class ArraySource(object):
+    """ a fixed array (rows, n) or (n,) as a source for ``MinMaxPyramid``, like a ring that never wrapped """
+    generation=0
+    def __init__(self,data):
+        self.data=np.atleast_2d(data)
+        self.rows,self.count=self.data.shape
+        self.length=max(self.count,1)
+
+    def view_range(self,start,stop,row=None):
+        return self.data[:,start:stop] if row is None else self.data[row,start:stop]
+
+class MinMaxPyramid(object):
+    """
+    Block minima and maxima of a source with ``count``, ``length``, ``rows``,
+    ``generation`` and ``view_range(start,stop)`` (see ``RingBuffer``).
+    Samples are addressed by their index since the source was cleared, only
+    the last ``length`` ones are kept at each level.
+    """
+    def __init__(self,factor=8):
+        self.factor=factor
+        self.done=0 # the samples before this index are in the pyramid
+        self.levels=[] # level k: (mins,maxs) of blocks of factor**(k+1) samples, block j in slot j%slots
+        self._key=None
+
+    def _reset(self,source):
+        self._key=(source.generation,source.length,source.rows)
+        self.done=0
+        self.levels=[]
+        size=self.factor
+        while True:
+            slots=-(-source.length//size)+2
+            self.levels.append((np.full((source.rows,slots),np.nan),np.full((source.rows,slots),np.nan)))
+            if size>=source.length:
+                break
+            size*=self.factor
+
+    def update(self,source):
+        """ add the samples that arrived since the last update """
+        if self._key!=(source.generation,source.length,source.rows) or source.count<self.done:
+            self._reset(source)
+        count=source.count
+        oldest=count-min(count,source.length)
+        if max(self.done,oldest)>=count:
+            return
+        b=self.factor
+        #level 0 from the samples of all blocks that changed
+        j0=max(self.done,oldest)//b
+        start=max(j0*b,oldest)
+        raw=source.view_range(start,count)
+        nb=-(-(count-j0*b)//b)
+        buf=np.full((source.rows,nb*b),np.nan)
+        buf[:,start-j0*b:start-j0*b+raw.shape[-1]]=raw
+        buf=buf.reshape(source.rows,nb,b)
+        self._write(0,j0,np.fmin.reduce(buf,axis=2),np.fmax.reduce(buf,axis=2))
+        #each level from the blocks of the one below
+        lo,hi=j0,j0+nb
+        size=b
+        for k in range(1,len(self.levels)):
+            a0,a1=lo//b,-(-hi//b)
+            mins,maxs=self._read(k-1,a0*b,a1*b,-(-oldest//size),(count-1)//size+1)
+            mins=mins.reshape(source.rows,a1-a0,b)
+            maxs=maxs.reshape(source.rows,a1-a0,b)
+            self._write(k,a0,np.fmin.reduce(mins,axis=2),np.fmax.reduce(maxs,axis=2))
+            lo,hi=a0,a1
+            size*=b
+        self.done=count
+
+    def _write(self,k,j0,mins,maxs):
+        lmin,lmax=self.levels[k]
+        idx=np.arange(j0,j0+mins.shape[1])%lmin.shape[1]
+        lmin[:,idx]=mins
+        lmax[:,idx]=maxs
+
+    def _read(self,k,j0,j1,first,stop,row=None):
+        """ blocks j0..j1-1 of level k, the ones outside first..stop-1 are NaN """
+        #a block that starts before the oldest sample may hold samples that were dropped, first excludes it
+        lmin,lmax=self.levels[k]
+        j=np.arange(j0,j1)
+        idx=j%lmin.shape[1]
+        rows=slice(None) if row is None else row
+        mins,maxs=lmin[rows,idx],lmax[rows,idx]
+        invalid=(j<first)|(j>=stop)
+        if invalid.any():
+            mins[...,invalid]=np.nan
+            maxs[...,invalid]=np.nan
+        return mins,maxs
+
+    def envelope(self,row,start,stop,width):
+        """
+        min/max pairs of the samples ``start`` to ``stop`` of ``row`` for
+        ``width`` columns as xs,ys, with xs the sample indices. None if there
+        are so few samples that drawing them directly is as cheap. Call
+        ``update`` first.
+        """
+        n=stop-start
+        b=self.factor
+        if n<=2*width or n<b*width:
+            return None
+        #the highest level with at least one block per column
+        k,size=0,b
+        while k+1<len(self.levels) and size*b*width<=n:
+            k+=1
+            size*=b
+        count=self.done
+        length=self._key[1]
+        oldest=count-min(count,length)
+        j0,j1=start//size,-(-stop//size)
+        mins,maxs=self._read(k,j0,j1,-(-oldest//size),(count-1)//size+1,row)
+        group=-(-(j1-j0)//width)
+        xs,ys=_pairs(*_reduce(mins,maxs,group),j0*size,group*size)
+        xs[:2]=max(xs[0],start)
+        return xs,ys
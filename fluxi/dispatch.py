@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Execute calls from background threads in the GUI thread and get futures back
+"""
+try:
+    from PyQt4 import QtCore
+    from PyQt4.QtCore import pyqtSlot as Slot,pyqtSignal as Signal
+except ImportError:
+    from PyQt5 import QtCore
+    from PyQt5.QtCore import pyqtSlot as Slot,pyqtSignal as Signal
+import collections,threading
+from concurrent.futures import Future
+
+class MainThreadDispatcher(QtCore.QObject):
+    """
+    Runs functions in the GUI thread and returns ``concurrent.futures.Future`` objects
+
+    All calls that are submitted until the GUI thread gets to them are
+    executed in one tick of the event loop, no matter from how many threads
+    they come. Each call has its own future, so no state is shared between
+    callers and no lock is held while the GUI thread works.
+    """
+    _wakeup=Signal()
+    _instance=None
+
+    @classmethod
+    def instance(cls):
+        """ the dispatcher of this process, has to be created in the GUI thread first """
+        if cls._instance is None:
+            cls._instance=cls()
+        return cls._instance
+
+    def __init__(self):
+        super().__init__()
+        self._pending=collections.deque()
+        self._lock=threading.Lock()
+        self._scheduled=False
+        self.ticks=0
+        self._wakeup.connect(self._run_pending,QtCore.Qt.QueuedConnection)
+
+    @staticmethod
+    def _isGuiThread():
+        return QtCore.QThread.currentThread() == QtCore.QCoreApplication.instance().thread()
+
+    def submit(self,func,*args,**kwargs):
+        """ run ``func(*args,**kwargs)`` in the GUI thread, directly if we are already there """
+        future=Future()
+        if self._isGuiThread():
+            self._run(future,func,args,kwargs)
+            return future
+        self._pending.append((future,func,args,kwargs))
+        with self._lock:
+            if self._scheduled:
+                return future
+            self._scheduled=True
+        self._wakeup.emit()
+        return future
+
+    def map(self,func,iterable):
+        """ submit ``func(item)`` for all items, they are executed in the same tick """
+        return [self.submit(func,item) for item in iterable]
+
+    @Slot()
+    def _run_pending(self):
+        with self._lock:
+            self._scheduled=False
+        self.ticks+=1
+        pending=self._pending
+        try:
+            while True:
+                self._run(*pending.popleft())
+        except IndexError:
+            pass
+
+    @staticmethod
+    def _run(future,func,args,kwargs):
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            result=func(*args,**kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Collects the errors of actions, loops and the Qt event loop, deduplicated by their traceback
+
+An error that happens again in the same place only increases the count of
+its record instead of printing and showing the traceback again, so a loop
+that fails a thousand times a second does not flood the console or the GUI::
+
+    record=errors.report(sys.exc_info(),source="loop:Measure")
+    if record.count==1:
+        show(record.traceback)
+
+The signature of an error is its type and the file, line and function of
+every frame, not the message, which often contains changing values.
+"""
+import collections,sys,threading,time,traceback
+
+class ErrorRecord(object):
+    """ all occurrences of one error """
+    __slots__=("signature","type","message","traceback","sources","count","first","last")
+    def __init__(self,signature,type,message,traceback,source):
+        self.signature=signature
+        self.type=type
+        self.message=message
+        self.traceback=traceback
+        self.sources={source} if source else set()
+        self.count=0
+        self.first=self.last=time.time()
+
+    def summary(self):
+        return {
+            "type":self.type,
+            "message":self.message,
+            "sources":sorted(self.sources),
+            "count":self.count,
+            "first":self.first,
+            "last":self.last,
+            "traceback":self.traceback,
+        }
+
+def signature(exc_info):
+    """ the type and the frames of an error, without the message """
+    frames=tuple((f.filename,f.lineno,f.name) for f in traceback.extract_tb(exc_info[2]))
+    return (exc_info[0].__name__,)+frames
+
+class ErrorAggregator(object):
+    """
+    The records of the errors that happened, at most ``max_records`` (the
+    least recent ones are dropped). ``version`` increases with every
+    reported error, a view only needs to redraw when it changed.
+
+    The traceback of a new error is printed, a known one is printed again
+    as a single line when its count reaches 10, 100, 1000...
+    """
+    max_records=200
+    echo=True
+    def __init__(self):
+        self.version=0
+        self.total=0
+        self._records=collections.OrderedDict()
+        self._lock=threading.Lock()
+
+    def report(self,exc_info=None,source=None):
+        """ add an error, by default the one that is being handled; returns its record """
+        if exc_info is None:
+            exc_info=sys.exc_info()
+        eT,eV,eTB=exc_info
+        #the same exception is often reported by the action and again by the loop that set the value
+        reported=getattr(eV,"_fluxi_error",None)
+        if reported is not None:
+            if source:
+                reported.sources.add(source)
+            return reported
+        record=self.add(signature(exc_info),eT.__name__,str(eV),lambda: "".join(traceback.format_exception(eT,eV,eTB)),source)
+        try:
+            eV._fluxi_error=record
+        except (AttributeError,TypeError):
+            pass
+        return record
+
+    def add(self,signature,type,message,text,source=None):
+        """ add an error with a given signature, ``text`` is the traceback or a function that formats it """
+        with self._lock:
+            record=self._records.get(signature)
+            if record is None:
+                record=ErrorRecord(signature,type,message,text() if callable(text) else text,source)
+                self._records[signature]=record
+                if len(self._records)>self.max_records:
+                    self._records.popitem(last=False)
+            else:
+                self._records.move_to_end(signature)
+                record.message=message
+                if source:
+                    record.sources.add(source)
+            record.count+=1
+            record.last=time.time()
+            self.version+=1
+            self.total+=1
+            count=record.count
+        if self.echo:
+            self._echo(record,count,source)
+        return record
+
+    @staticmethod
+    def _echo(record,count,source):
+        where=" in %s"%source if source else ""
+        if count==1:
+            print("-----\nAn error occured%s:\n%s-----"%(where,record.traceback))
+        elif count in (10,100,1000,10000,100000,1000000):
+            print("%s: %s%s occured %d times"%(record.type,record.message,where,count))
+        else:
+            return
+        sys.stdout.flush()
+
+    def records(self):
+        """ the records, the most recent first """
+        with self._lock:
+            return list(reversed(self._records.values()))
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+            self.version+=1
+
+    def snapshot(self):
+        return [r.summary() for r in self.records()]
+
+#the errors of all Fluxis of the process, like the Qt excepthook there is only one
+aggregator=ErrorAggregator()
+report=aggregator.report
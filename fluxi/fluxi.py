@@ -10,9 +10,17 @@ except ImportError:
     from PyQt5 import QtGui, QtCore
     from PyQt5.QtCore import pyqtSlot as Slot,pyqtSignal as Signal,Qt
 from pyqtgraph.dockarea import Dock, DockArea
-import time,re,sys
-import fluxi.helper,fluxi.muxe,fluxi.muxe_misc,fluxi.muxe_base,fluxi.ptree
+import time,sys,threading,contextlib,collections,itertools
+import fluxi.helper,fluxi.perf,fluxi.muxe,fluxi.muxe_misc,fluxi.muxe_base,fluxi.muxe_process,fluxi.muxe_perf,fluxi.muxe_errors,fluxi.muxe_log,fluxi.errors,fluxi.ptree
+from fluxi.scheduler import RenderScheduler
+from fluxi.dispatch import MainThreadDispatcher
+from fluxi.registry import MuxRegistry,MuxHandle,parse_id
+from fluxi.batch import Batch
+from fluxi.journal import ValueJournal
+from fluxi.logpipe import LogPipe
+from fluxi.shutdown import stop_loops
 import json,weakref
+from concurrent.futures import Future
 from base64 import b64encode,b64decode
 from fluxi.helper import dict_update
 import fluxi.hotfixes
@@ -41,9 +49,8 @@ def creator(func):
             if self._isGuiThread():
                 self.muxe[name]=func(self,name,*args,**kwargs)                
             else:
-                args=(name,)+args
-                self.muxe[name]=self._callInMainThread(func.__name__,*args, **kwargs)
-                #print "in main thr",self.muxe[name]
+                #through the decorated method, another thread might have created it meanwhile
+                return self.call_in_main_thread(getattr(self,func.__name__),name,*args,**kwargs).result()
             return self.muxe[name]
     new_func.__name__ = func.__name__
     return new_func      
@@ -77,10 +84,9 @@ class Fluxi(QtCore.QObject):
         """ Create a window with title ``title`` """
 
         super().__init__()
-        self.r_find_groups=re.compile("(.*)/(.*)")
-        self.r_find_type=re.compile("([^:]*):(.*)")
         
         self._startapp()
+        self._dispatcher=MainThreadDispatcher.instance()
         if win==None:
             if type_=="dialog":
                 win=BaseDialog(title=title)
@@ -92,21 +98,51 @@ class Fluxi(QtCore.QObject):
         self.win=win
         win.sigClose.connect(self._onclose)
         self._errmsgs={}
-        self.muxe={}
+        self.muxe=MuxRegistry()
+        self._handles={}
+        self._local=threading.local()
+        self._nbatches=0
+        self._values_lock=threading.RLock()
+        self._inbulk=False
+        self._servers=[]
+        self.errors=fluxi.errors.aggregator
         self.redraw_list={}
         self.cfg={}
-        self._lastlogmsg=None
+        #the file and its writer thread are opt-in, never for dialogs like the settings
+        self.logpipe=LogPipe(self.log_capacity,self.namespace+".log" if self.log_to_file and type_!="dialog" else None)
+        self._logdock=False
+        from . import __version__
+        self.journal=ValueJournal(self.namespace+".values.json",fileversion=__version__)
+        self._dirty_values={}
+        self._lastchange=self._lastflush=time.monotonic()
+        #change tracking for get_values and changes_since
+        self._version=0
+        self._pending={} # ids of changed muxe that _collect_changes has not seen yet, at most one entry per mux
+        self._publishes=itertools.count() # counts the published values, next() is atomic
+        self._collected=0 # the calls of next(self._publishes) by _collect_changes
+        self._changes_lock=threading.Lock()
+        self._changelog=collections.deque(maxlen=self.changelog_length)
+        self._log_start=0 # the change log has all changes after this version
+        self._unsnapshotted={}
+        self._snapshot={}
+        self._volatile=set()
         
         self.load_cfg()
+        if not self.cfg:
+            #no cfg yet, e.g. the first session crashed before saving one: replay the journal anyway
+            self.load_values()
         self.B("Fluxi/Save on close").v
+        self.B("Fluxi/Autosave values").default(True)
+        self._autosave_timer=QtCore.QTimer(timeout=self._autosave)
+        self._autosave_timer.start(250)
         me=weakref.ref(self)
         self.A("Fluxi/Save Config").a=lambda p, v: me().save_cfg()
         self.B("Fluxi/window always on top").default(True).a=lambda p, v: me()._set_always_on_top(self.B("Fluxi/window always on top").v)
         self._set_always_on_top(self.B("Fluxi/window always on top").v, show = show)
         
         
-        self.drawtimer=QtCore.QTimer(timeout=self._redraw)
-        self.drawtimer.start(1./30*1000)
+        self.scheduler=RenderScheduler.instance()
+        self.scheduler.register(self)
         
         if show:
             self.win.show()
@@ -165,6 +201,25 @@ class Fluxi(QtCore.QObject):
         except KeyError:
             return self._createMux(name)
             
+    def g_async(self,name):
+        """gets or creates an element, returns a ``concurrent.futures.Future``"""
+        try:        
+            m=self.muxe[name]
+        except KeyError:
+            return self.call_in_main_thread(self._createMux,name)
+        future=Future()
+        future.set_result(m)
+        return future
+        
+    def g_many(self,names):
+        """
+        gets or creates several elements at once
+        
+        From a background thread all missing elements are created in one
+        round trip to the GUI thread instead of one for each element.
+        """
+        return [f.result() for f in [self.g_async(n) for n in names]]
+            
     def __getitem__(self, id):
         return self.g(id)
     def __len__(self):
@@ -175,27 +230,53 @@ class Fluxi(QtCore.QObject):
           yield n
 
     def parseId(self,id): 
-        #print("searching:",id)
-        r=self.r_find_type.match(id)
+        """ split an id into (type, name, path), the results are cached """
+        return parse_id(id)
+        
+    def handle(self,id):
+        """ 
+        a handle to the element that can be stored and reused without looking 
+        up the name again, e.g. ``tx=fl.handle("f:Pos/target x"); tx.v=3``
+        """
         try:
-            type_=r.group(1)
-        except:
-            print("error creating",id)
-            raise
-        name=r.group(2)            
-        try:        
-            r=self.r_find_groups.match(name)
-            path=r.group(1)
-            name=r.group(2)
-        except AttributeError:
-            path=""
-            pass
-        return type_,name,path
+            return self._handles[id]
+        except KeyError:
+            h=self._handles[id]=MuxHandle(self,id)
+            return h
+            
+    def find(self,prefix="",type=None,tag=None):
+        """ 
+        all elements under the group path ``prefix``, optionally only of a 
+        ``type`` or with a ``tag``, e.g. ``fl.find("Scan/",type="f")``
+        """
+        return self.muxe.find(prefix,type=type,tag=tag)
+        
+    def serve(self,address=("127.0.0.1",0)):
+        """ 
+        make the elements readable and settable from other processes, see 
+        ``fluxi.remote``. ``address`` is a (host, port) tuple or the path of 
+        a Unix socket, returns the started ``RemoteServer``.
+        """
+        from fluxi.remote import RemoteServer
+        server=RemoteServer(self,address).start()
+        self._servers.append(server)
+        return server
+        
+    def _group(self,path):
+        """ the group for a path, it is created if it does not exist yet """
+        g=self.muxe.group(path)
+        if g is None:
+            g=self.g("group:"+path)
+        return g
     mapping={
         "f":fluxi.muxe.MuxBaseParam,
         "tree":fluxi.ptree.MuxTree,
         "loop":fluxi.muxe_misc.MuxBgLoop,
         "slowloop":fluxi.muxe_misc.MuxSlowLoop,
+        "ploop":fluxi.muxe_process.MuxProcessLoop,
+        "perf":fluxi.muxe_perf.MuxPerf,
+        "errors":fluxi.muxe_errors.MuxErrors,
+        "log":fluxi.muxe_log.MuxLog,
         "table":fluxi.muxe.MuxTable,
         "im":fluxi.muxe.MuxImg,
         "save":fluxi.muxe.MuxDump,
@@ -209,10 +290,14 @@ class Fluxi(QtCore.QObject):
         type_,name,path=self.parseId(id)
         #print("creating",type_,"with name",name,"under",path)
         if type_ in self.mapping:
-            self.muxe[id]=self.mapping[type_](id,fluxi=self)
+            mux=self.mapping[type_](id,fluxi=self)
         else:
-            self.muxe[id]=fluxi.muxe.MuxBaseParam(id,fluxi=self)
-        return self.muxe[id]
+            mux=fluxi.muxe.MuxBaseParam(id,fluxi=self)
+        self.muxe[id]=mux
+        if not mux._tracks_value:
+            self._volatile.add(id)
+        self._note_change(mux)
+        return mux
         
     def F(self,name):
         """ create a Floating Point Number Input Parameter """
@@ -248,43 +333,155 @@ class Fluxi(QtCore.QObject):
         return self.g("im:"+name)
     def Table(self,name):
         return self.g("table:"+name)
+    def Performance(self,enable=True):
+        """ show the timings of draws, actions, loops and device calls, see ``fluxi.perf`` """
+        fluxi.perf.enable(enable)
+        return self.g("perf:Fluxi/Performance")
+    def Errors(self):
+        """ show the errors of actions and loops, each one once with its count """
+        return self.g("errors:Fluxi/Errors")
+        
+    def report_error(self,exc_info=None,source=None):
+        """ 
+        add an error to ``fluxi.errors`` and show the error dock the first time it happens
+        
+        Returns the record of the error, ``record.count==1`` if it is new.
+        """
+        record=self.errors.report(exc_info,source)
+        if record.count==1:
+            self.call_in_main_thread(self.Errors)
+        return record
 
         
-    #route=Signal(object,object)
-    _route_return=None
-    _route_mutex = QtCore.QMutex()
+    def call_in_main_thread(self,func,*args,**kwargs):
+        """ 
+        execute ``func(*args,**kwargs)`` in the GUI thread
+        
+        Returns a ``concurrent.futures.Future``. Calls from all threads that 
+        arrive before the GUI thread gets to them are executed in one go.
+        """
+        return self._dispatcher.submit(func,*args,**kwargs)
+        
     def _callInMainThread(self,funcname,*args,**kwargs):
-        if not self._isGuiThread():
-            #print "routing it"
-            self._route_mutex.lock();
-            QtCore.QMetaObject.invokeMethod(self, "_remoteCall", QtCore.Qt.BlockingQueuedConnection,#AutoConnection,DirectConnection
-                QtCore.Q_ARG(str, funcname),
-                QtCore.Q_ARG(object, args),
-                QtCore.Q_ARG(object, kwargs),
-            )
-            rv=self._route_return       
-            self._route_mutex.unlock()
-            return rv
-        else:
-            return getattr(self, str(funcname))(*args,**kwargs)
-        
-    @Slot(str,object,object)
-    def _remoteCall(self,name,args,kwargs):
-        #self.retvals[rid]=getattr(self, name)(*args,**kwargs)
-#        print name,args,kwargs
-#        print type(args)
-        self._route_return=getattr(self, str(name))(*args,**kwargs)
-        #print self._route_return   
+        """ call the method ``funcname`` in the GUI thread and wait for the result """
+        return self.call_in_main_thread(getattr(self, str(funcname)),*args,**kwargs).result()
+
+    @contextlib.contextmanager
+    def batch(self):
+        """ 
+        collect all value changes of this thread and apply them together
+        
+        >>> with fl.batch():
+        ...     fl.P("Area/minx").v=0
+        ...     fl.P("Area/maxx").v=10
+        
+        When the block ends, all values are set at once (``get_values`` of 
+        other threads sees all or none of them), every element is redrawn
+        once and the action of every element that was triggered is called 
+        once. Values are visible only after the block. If the block raises 
+        an exception, the changes are discarded. Nested batches join the 
+        outer one.
+        """
+        outer=getattr(self._local,"batch",None)
+        if outer is not None:
+            yield outer
+            return
+        b=self._local.batch=Batch()
+        with self._values_lock:
+            self._nbatches+=1
+        try:
+            yield b
+            self._local.batch=None
+            b.apply(self._values_lock)
+        finally:
+            self._local.batch=None
+            with self._values_lock:
+                self._nbatches-=1
+            
+    @contextlib.contextmanager
+    def bulk(self):
+        """
+        create many elements at once, e.g. when loading a configuration
+        
+        The window and the parameter trees are not updated and the columns 
+        are not resized while the block runs, all values are set in one 
+        batch at the end.
+        """
+        if self._inbulk:
+            yield
+            return
+        self._inbulk=True
+        self.win.setUpdatesEnabled(False)
+        try:
+            with contextlib.ExitStack() as stack:
+                stack.enter_context(self.Tree("Parameters").bulk_update())
+                stack.enter_context(self.batch())
+                yield
+        finally:
+            self._inbulk=False
+            self.win.setUpdatesEnabled(True)
+            
+    def _current_batch(self):
+        if self._nbatches:
+            return getattr(self._local,"batch",None)
+        return None
 
     def get_values(self):
-        vals={}
-        for n in self.muxe:
-            try:
-                if self.muxe[n].get_opt("Save/Save Value"):
-                    vals[n]=self.muxe[n].v        
-            except:
-                pass
-        return vals
+        """ 
+        the values of all elements that are saved, as a new dict
+        
+        The values are kept in a snapshot, only the elements that were 
+        changed since the last call are read again.
+        """
+        with self._values_lock:
+            with self._changes_lock:
+                self._collect_changes()
+                changed,self._unsnapshotted=self._unsnapshotted,{}
+            for id in changed:
+                self._update_snapshot(id)
+            #_createMux and removeElement change the set in the GUI thread
+            for id in tuple(self._volatile):
+                self._update_snapshot(id)
+            return dict(self._snapshot)
+            
+    def _update_snapshot(self,id):
+        mux=self.muxe.get(id)
+        try:
+            if mux is not None and mux.get_opt("Save/Save Value"):
+                self._snapshot[id]=mux.v
+                return
+        except:
+            pass
+        self._snapshot.pop(id,None)
+        
+    def changes_since(self,version):
+        """
+        the saved values that changed after ``version`` as (current version, dict)
+        
+        Pass the returned version to the next call to get only the deltas, 
+        e.g. to store the parameters with every measured point. Elements 
+        whose data does not change through their value (e.g. lists) are 
+        always included. If ``version`` is too old for the change log, all 
+        values are returned.
+        """
+        with self._changes_lock:
+            self._collect_changes()
+            current=self._version
+            log=self._changelog
+            if version<self._log_start or (version<current and not log):
+                full=True
+            else:
+                full=False
+                ids=set()
+                i=len(log)-1
+                while i>=0 and log[i][0]>version:
+                    ids.add(log[i][1])
+                    i-=1
+        values=self.get_values()
+        if full:
+            return current,values
+        ids.update(tuple(self._volatile))
+        return current,{id:values[id] for id in ids if id in values}
             
     def get_cfg(self):
         opts={}
@@ -323,32 +520,111 @@ class Fluxi(QtCore.QObject):
                 if cfg["fileversion"]=="0.93":
                     self.__load_legacy(filename,prefix,postfix)
                 else:                    
-                    for id in cfg["muxe"]:
-                        if "loop:" not in id:
-                            self.g(id).set_opts(cfg["muxe"][id])
-                    self.load_values()                  
+                    with self.bulk():
+                        for id in cfg["muxe"]:
+                            if "loop:" not in id:
+                                self.g(id).set_opts(cfg["muxe"][id])
+                        self.load_values()                  
         except IOError:
              self.cfg={}
              
     def save_values(self,filename=None,prefix="",postfix=".values.json"):
         if filename==None:
             filename=prefix+self.namespace+postfix          
+        if filename==self.journal.filename:
+            #a new snapshot makes the journal obsolete
+            with self._changes_lock:
+                self._collect_changes()
+                self._dirty_values={}
+            self.journal.compact(self.get_values())
+            return
         from . import __version__
         cfg={"fileversion":__version__,"values":self.get_values()}
         fluxi.helper.save_json(cfg, filename)             
              
     def load_values(self,filename=None,prefix="",postfix=".values.json"):
+        """ load the values, from the default file the changes in the journal are replayed too """
         if filename==None:
             filename=prefix+self.namespace+postfix            
-        try:
-            with open(filename, 'r') as f:                
-                cfg=json.load(f)
-                #print(cfg)
-                for id in cfg["values"]:
-                    if "loop:" not in id:
-                        self.g(id).v=cfg["values"][id]
-        except IOError:
-             pass
+        if filename==self.journal.filename:
+            values=self.journal.load()
+        else:
+            try:
+                with open(filename, 'r') as f:                
+                    values=json.load(f)["values"]
+            except IOError:
+                return
+        with self.batch():
+            for id in values:
+                if "loop:" not in id:
+                    self.g(id).v=values[id]
+                     
+    autosave_delay=1.  # save when nothing was changed for this time (s) 
+    autosave_maxdelay=10. # but at least this often when values keep changing
+    changelog_length=100000
+    def _note_change(self,mux):
+        """ 
+        remember the change for ``get_values``, ``changes_since`` and the next
+        autosave. Values are published from any thread without a lock, so this
+        only sets a key of a dict and counts (both atomic), the readers number
+        the changes. The dict holds each mux once, no matter how often nobody
+        reads the changes.
+        """
+        self._pending[mux.id]=None
+        next(self._publishes)
+        self._lastchange=time.monotonic()
+        
+    def _collect_changes(self):
+        """ number the published changes and note them for the readers, with ``_changes_lock`` """
+        pending=self._pending
+        #the id is set before the publish is counted, so every counted publish is in ids
+        published=next(self._publishes)-self._collected
+        self._collected+=1
+        ids=list(pending)
+        #a publish that is not counted yet still needs a new version
+        version=max(published,self._version+1 if ids else self._version)
+        log=self._changelog
+        for id in ids:
+            pending.pop(id,None)
+            if len(log)==log.maxlen:
+                self._log_start=log[0][0]
+            log.append((version,id))
+            self._unsnapshotted[id]=None
+            self._dirty_values[id]=None
+        self._version=version
+            
+    @property
+    def version(self):
+        """ a number that increases with every change of a value """
+        with self._changes_lock:
+            self._collect_changes()
+            return self._version
+        
+    def _autosave(self,force=False):
+        """ append the changed values to the journal, debounced """
+        if not self._dirty_values and not self._pending:
+            return
+        t=time.monotonic()
+        if not force and t-self._lastchange<self.autosave_delay and t-self._lastflush<self.autosave_maxdelay:
+            return
+        #also when closing: no journal if the user turned autosave off
+        if not self.B("Fluxi/Autosave values").v:
+            return
+        self._lastflush=t
+        with self._changes_lock:
+            self._collect_changes()
+            dirty,self._dirty_values=self._dirty_values,{}
+        changes={}
+        for id in list(dirty):
+            mux=self.muxe.get(id)
+            if mux is None or "loop:" in id:
+                continue
+            try:
+                if mux.get_opt("Save/Save Value"):
+                    changes[id]=mux.v
+            except:
+                pass
+        self.journal.append(changes)
              
     def __load_legacy(self,filename=None,prefix="",postfix=".cfg.json"):
         if filename==None:
@@ -383,20 +659,26 @@ class Fluxi(QtCore.QObject):
         """ get the configuration of all fluxis """
         return {n:self._fluxis[n].get_values() for n in self._fluxis}
     
-    def log(self,msg,type="debug"):
-        print("logging",msg)
-        #TODO: improve
-#        lo=self.List("Log")
-#        #log.moveCursor(QtGui.QTextCursor.End) 
-#        if not hasattr(lo,"_lastmsg") or lo._lastmsg!=msg:
-#            lo.addParent([msg,1,time.strftime("%d. %H:%M:%S")])
-#        else:
-#            label=QtGui.QLabel(msg)
-#            label.setWordWrap(True)            
-#            lo.addChild([msg,None,time.strftime("%d. %H:%M:%S")],widgets={0:label})
-#        lo._lastmsg=msg
-        #sb = log.verticalScrollBar()
-        #sb.setValue(sb.maximum())       
+    log_to_file=False # also write the log to namespace.log, set it before creating the Fluxi
+    log_capacity=10000 # messages kept for the log dock
+    def log(self,msg,type="debug",source=None):
+        """ 
+        add a message to the log dock and, with ``log_to_file``, the log file, from any thread 
+        
+        ``type`` is the level: debug, info, warning or error. The call only
+        stores the message, it is shown and written in the background. 
+        Warnings and errors are printed as well.
+        """
+        self.logpipe.append(type,source or self.namespace,msg)
+        if not self._logdock:
+            self._logdock=True
+            self.call_in_main_thread(self.Log)
+        if type.lower() in ("warning","error"):
+            print("%s: %s"%(type,msg))
+            
+    def Log(self):
+        """ show the messages of ``log`` """
+        return self.g("log:Fluxi/Log")
             
 #    @staticmethod
 #    def exit_program(self):
@@ -482,25 +764,23 @@ class Fluxi(QtCore.QObject):
         
     def removeElement(self,name):
         """ remove a Mux """
-        self.muxe[name].delete()        
+        mux=self.muxe[name]
+        mux.delete()        
+        mux._deleted=True
         del self.muxe[name]
+        self._volatile.discard(name)
+        self._note_change(mux)
 
     def request_redraw(self,mux):
         self.redraw_list[mux.id]=mux
         
     def _redraw(self):
-        """redraw all elements that have requested this in the last period"""       
-        for n in self.redraw_list.copy():
-            ob=self.redraw_list[n]
-            if ob is not None:
-                self.redraw_list[n]=None
-                try:
-                    ob._do_draw_actions()
-                    ob.draw()                        
-                except:
-                    self.log("there was an error drawing %s" %n)
-                    #self.wait(0.3)
-                    raise
+        """redraw all elements of this window that have requested this now, without waiting for the scheduler"""       
+        self.scheduler.flush(self)
+        
+    def _is_shown(self):
+        """ check if the window can be seen at all """
+        return self.win.isVisible() and not self.win.isMinimized()
     
     def wait(self,seconds):
         QtGui.QApplication.processEvents()
@@ -511,23 +791,46 @@ class Fluxi(QtCore.QObject):
         #print("closing Fluxi")
         self._deinit()
         
-    def _deinit(self):
-        self.drawtimer.stop()
-        #wait for last draws to happen
-        self.wait(0.1)#TODO: a bit hacky, improve
-        li=self.muxe.copy()
-        #print("deiniting",li)
-        for n in li:
-            if li[n].type in ["Loop","SlowLoop"]:
-                #print("delete", n)                
-                li[n].delete()
-                self.removeElement(n)
-        time.sleep(0.1)
-        li=self.muxe.copy()
-        for n in li:
-#            print("delete", n)
+    shutdown_timeout=5. # the longest time closing waits for any loop
+    shutdown_report=None
+    def close(self,timeout=None):
+        """ 
+        stop all loops, save the values and remove all muxe
+        
+        The loops are stopped in parallel, each one is waited for at most its
+        ``shutdown_timeout`` and never longer than ``timeout`` (default
+        ``Fluxi.shutdown_timeout``). Returns a ``ShutdownReport`` of the 
+        loops that stopped and the ones that were abandoned. Only the first
+        call does something, later ones return the same report.
+        """
+        return self._deinit(timeout)
+        
+    def _deinit(self,timeout=None):
+        if self.shutdown_report is not None:
+            return self.shutdown_report
+        t0=time.monotonic()
+        for server in self._servers:
+            server.stop()
+        self.scheduler.unregister(self)
+        self._autosave_timer.stop()
+        loops=[m for m in self.muxe.values() if hasattr(m,"request_stop")]
+        report=self.shutdown_report=stop_loops(loops,self.shutdown_timeout if timeout is None else timeout)
+        t=time.monotonic()
+        self._autosave(force=True)
+        self.journal.close()
+        report.phases["save"]=time.monotonic()-t
+        t=time.monotonic()
+        for n in list(self.muxe):
             self.removeElement(n)
-        del self._fluxis[self.namespace]
+        self.logpipe.close()
+        report.phases["teardown"]=time.monotonic()-t
+        self._fluxis.pop(self.namespace,None)
+        report.duration=time.monotonic()-t0
+        if report.abandoned:
+            print("%s: closed without waiting for %s"%(self.namespace,", ".join(report.abandoned)))
+        if fluxi.perf.enabled:
+            fluxi.perf.record("shutdown "+self.namespace,report.duration)
+        return report
         
     _mutexes={}
     def create_mutex(self,name):
@@ -569,8 +872,7 @@ class Fluxi(QtCore.QObject):
 
 
     def openPopup(self,title,text,mux):
-        widget=mux.p.widget
-        wr=widget.rect()
+        widget,wr=mux.p.anchor()
         point=QtCore.QPoint(wr.center().x()-20,wr.bottom()-5)
         #point = widget.rect().bottomRight()
         point = widget.mapToGlobal(point)
@@ -657,10 +959,13 @@ class Messenger(QtCore.QObject):
         QtCore.QObject.__init__(self)
         self.throw.connect(self.show_error)
     @Slot(object)
-    def show_error(self,err):          
-        msg,tb=printErrorToConsole(err)#,add=" somewhere in Qt")
-        for f in Fluxi._fluxis.values():
-           f.logError(msg=msg,details=tb) 
+    def show_error(self,err):
+        fls=list(Fluxi._fluxis.values())
+        if fls:
+            for f in fls:
+                f.report_error(err)
+        else:
+            fluxi.errors.report(err)
 
 
 import fluxi.traceback
@@ -2,7 +2,7 @@
 """
 Some functions that help to configure and prepare ipython and to find errors
 """
-import json,re,sys
+import json,re,sys,os
 import numpy as np
 
          
@@ -101,8 +101,13 @@ def save_json(obj,filename,add_to_name="",ext="json"):
             filename=filename+'.'+add_to_name+'.'+ext
         else:
             filename=filename+'.'+ext   
-    with open(filename, 'w') as f:
+    #write to a temporary file first, so a crash never leaves a half written file
+    tmpname=filename+".tmp"
+    with open(tmpname, 'w') as f:
         json.dump(obj, f, cls=NumpyAwareJSONEncoder, sort_keys=True, indent=4, separators=(',', ': '))  
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmpname, filename)
     #TODO: USE COMPACT PRETTY PRINTING   
     #http://justanyone.blogspot.de/2012/04/how-to-pretty-print-jsondumps-with.html
 def load_json(filename,add_to_name="",ext="json"):
@@ -124,9 +129,9 @@ def save_tsv(data,filename,add_to_name="",ext="tsv.gz",header=None):
         else:
             filename=filename+'.'+ext
     if header is not None:
-        np.savetxt(filename, data, delimiter='\t',fmt=b'%g',header=header) #%.18e
+        np.savetxt(filename, data, delimiter='\t',fmt='%g',header=header) #%.18e
     else:
-        np.savetxt(filename, data, delimiter='\t',fmt=b'%g') #%.18e
+        np.savetxt(filename, data, delimiter='\t',fmt='%g') #%.18e
         
 import os
 
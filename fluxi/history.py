@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+A bounded, array-backed history of (timestamp, value) pairs
+"""
+import math,threading,time
+import numpy as np
+
+class HistoryRing(object):
+    """
+    The last ``capacity`` values with the times they were set
+
+    The entries go round ``2*capacity`` slots and every one is written twice,
+    at i and i+2*capacity, so the stored values are always one contiguous
+    slice of the arrays and ``query`` returns views without copying. The
+    spare slots keep a view intact for ``capacity`` further values, use
+    ``copy=True`` to keep it longer.
+    """
+    def __init__(self,capacity,dtype=float):
+        self.capacity=int(capacity)
+        if self.capacity<1:
+            raise ValueError("the capacity of a history must be at least 1")
+        self._slots=2*self.capacity
+        self._t=np.zeros(2*self._slots)
+        self._v=np.zeros(2*self._slots,dtype=dtype)
+        self._n=0
+        self._lock=threading.Lock()
+
+    def __len__(self):
+        return min(self._n,self.capacity)
+
+    def append(self,value,t=None):
+        if t is None:
+            t=time.time()
+        slots=self._slots
+        with self._lock:
+            i=self._n%slots
+            self._t[i]=self._t[i+slots]=t
+            self._v[i]=self._v[i+slots]=value
+            self._n+=1
+
+    def clear(self):
+        with self._lock:
+            self._n=0
+
+    def query(self,since=None,until=None,max_points=None,copy=False):
+        """
+        times and values with ``since <= t <= until`` as two arrays, at most
+        ``max_points`` of them (every n-th value)
+        """
+        with self._lock:
+            end=self._n%self._slots+self._slots
+            t=self._t[end-len(self):end]
+            v=self._v[end-len(self):end]
+            i0=0 if since is None else np.searchsorted(t,since,"left")
+            i1=len(t) if until is None else np.searchsorted(t,until,"right")
+            t,v=t[i0:i1],v[i0:i1]
+            if max_points and len(t)>max_points:
+                step=int(math.ceil(len(t)/max_points))
+                t,v=t[::step],v[::step]
+            if copy:
+                return t.copy(),v.copy()
+        t.flags.writeable=False
+        v.flags.writeable=False
+        return t,v
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Crash-safe persistence of parameter values: a snapshot plus an append-only journal
+"""
+import json,os
+from fluxi.helper import NumpyAwareJSONEncoder,save_json
+
+class ValueJournal(object):
+    """
+    Values stored in a snapshot file and a journal of the changes since then
+
+    ``append`` writes one short JSON line per changed value to the journal.
+    When the journal has grown by ``compact_after`` entries, the values are
+    written to a new snapshot (a temporary file renamed over the old one) and
+    the journal is emptied. ``load`` reads the snapshot and replays the
+    journal, a line that was only partially written in a crash is ignored.
+
+    Parameters
+    ----------
+    filename : the snapshot, in the format of ``Fluxi.save_values``
+    journalname : defaults to the snapshot name with ``.journal`` instead of ``.json``
+    """
+    def __init__(self,filename,journalname=None,compact_after=2000,fileversion=""):
+        self.filename=filename
+        if journalname is None:
+            journalname=os.path.splitext(filename)[0]+".journal"
+        self.journalname=journalname
+        self.compact_after=compact_after
+        self.fileversion=fileversion
+        self.values={}
+        self.entries=0
+        self._file=None
+        self._encoder=NumpyAwareJSONEncoder(separators=(',',':'))
+
+    def load(self):
+        """ read snapshot and journal, returns the dict of values """
+        values={}
+        try:
+            with open(self.filename,'r') as f:
+                values=json.load(f)["values"]
+        except (IOError,ValueError,KeyError):
+            pass
+        entries=0
+        try:
+            with open(self.journalname,'rb') as f:
+                data=f.read()
+        except IOError:
+            data=b""
+        good=0
+        for line in data.splitlines(True):
+            try:
+                if not line.endswith(b"\n"):
+                    raise ValueError
+                e=json.loads(line.decode('utf-8'))
+            except ValueError:
+                break #incomplete last line
+            values[e["id"]]=e["v"]
+            entries+=1
+            good+=len(line)
+        if good<len(data):
+            #cut off what a crash left behind, otherwise new entries would be appended to it
+            with open(self.journalname,'r+b') as f:
+                f.truncate(good)
+        self.values=values
+        self.entries=entries
+        return values
+
+    def append(self,changes):
+        """ write the changed values (dict id->value) that differ from the known ones """
+        lines=[]
+        for id,v in changes.items():
+            try:
+                if id in self.values and bool(self.values[id]==v):
+                    continue
+            except ValueError: #arrays
+                pass
+            try:
+                lines.append(self._encoder.encode({"id":id,"v":v}))
+            except (TypeError,ValueError):
+                continue
+            self.values[id]=v
+        if not lines:
+            return 0
+        if self._file is None:
+            self._file=open(self.journalname,'a')
+        self._file.write("\n".join(lines)+"\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.entries+=len(lines)
+        if self.entries>=self.compact_after:
+            self.compact()
+        return len(lines)
+
+    def compact(self,values=None):
+        """ write all values to the snapshot and empty the journal """
+        if values is not None:
+            self.values=dict(values)
+        save_json({"fileversion":self.fileversion,"values":self.values},self.filename)
+        self.close()
+        open(self.journalname,'w').close()
+        self.entries=0
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file=None
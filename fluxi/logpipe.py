@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+Structured logging that never blocks the caller: a ring buffer plus a background file writer
+
+``append`` takes a lock for a few dict and list operations and returns, it
+neither formats nor writes anything. The records are kept in a ring of
+``capacity`` records, addressed by their sequence number, so a view can read
+any visible row without copying the buffer. A daemon thread writes them to
+a file as JSON lines every ``flush_interval`` seconds, or earlier when
+``flush_size`` records are waiting, and starts a new file when it gets
+larger than ``max_bytes``, keeping ``backups`` old ones::
+
+    pipe=LogPipe(capacity=10000,filename="scan.log")
+    pipe.append("info","scan","measuring point 12")
+    first,last=pipe.first,pipe.seq   #the valid sequence numbers are first..last-1
+    pipe.get(last-1).message
+
+A message that is repeated by the same source with the same level is not
+stored again, the count of the last record is increased instead.
+"""
+import json,os,threading,time
+
+LEVELS={"debug":10,"info":20,"warning":30,"error":40}
+
+def level_number(level):
+    return LEVELS.get(level,20)
+
+class LogRecord(object):
+    __slots__=("seq","time","level","source","message","count","written","pending")
+    def __init__(self,seq,time,level,source,message):
+        self.seq=seq
+        self.time=time
+        self.level=level
+        self.source=source
+        self.message=message
+        self.count=1
+        self.written=0 # how many of the repetitions are in the file
+        self.pending=False
+
+class LogPipe(object):
+    """
+    Parameters
+    ----------
+    capacity : the number of records kept in memory
+    filename : the log file or None to keep the records only in memory
+    max_bytes : size of the file after which it is rotated to ``filename.1``
+    backups : the number of rotated files that are kept
+    """
+    flush_interval=0.5
+    flush_size=5000 # wake the writer early when this many records are waiting
+    max_pending=200000 # more records waiting for the writer are dropped from the file
+    def __init__(self,capacity=10000,filename=None,max_bytes=10*1024*1024,backups=3):
+        self.capacity=capacity
+        self.filename=filename
+        self.max_bytes=max_bytes
+        self.backups=backups
+        self.seq=0 # sequence number of the next record
+        self.version=0 # increases with every append, also when a record was only repeated
+        self.dropped=0 # records that were not written because the writer could not keep up
+        self._ring=[None]*capacity
+        self._last=None
+        self._pending=[]
+        self._lock=threading.Lock()
+        self._file_lock=threading.Lock()
+        self._wake=threading.Event()
+        self._closing=False
+        self._writer=None
+        if filename is not None:
+            self._writer=threading.Thread(target=self._write_loop,name="fluxi-log",daemon=True)
+            self._writer.start()
+
+    @property
+    def first(self):
+        """ sequence number of the oldest record that is still in the ring """
+        return max(0,self.seq-self.capacity)
+
+    def append(self,level,source,message):
+        level=str(level).lower()
+        #only strings, the writer could not serialize a batch with an exception or an array in it
+        source,message=str(source),str(message)
+        now=time.time()
+        with self._lock:
+            last=self._last
+            if last is not None and last.message==message and last.source==source and last.level==level:
+                last.count+=1
+                last.time=now
+                record=last
+            else:
+                record=self._last=LogRecord(self.seq,now,level,source,message)
+                self._ring[self.seq%self.capacity]=record
+                self.seq+=1
+            if self._writer is not None and not record.pending:
+                n=len(self._pending)
+                if n>=self.max_pending:
+                    self.dropped+=1
+                else:
+                    record.pending=True
+                    self._pending.append(record)
+                    if n==self.flush_size:
+                        self._wake.set()
+            self.version+=1
+        return record
+
+    def get(self,seq):
+        """ the record with sequence number ``seq``, None if it was overwritten """
+        if seq<self.first or seq>=self.seq:
+            return None
+        return self._ring[seq%self.capacity]
+
+    def records(self,start=None,stop=None):
+        """ the records with sequence numbers from ``start`` to ``stop`` (exclusive) that are still in the ring """
+        with self._lock:
+            first,seq=self.first,self.seq
+            start=first if start is None else max(start,first)
+            stop=seq if stop is None else min(stop,seq)
+            return [self._ring[i%self.capacity] for i in range(start,stop)]
+
+    def flush(self):
+        """ write the pending records now, from the calling thread """
+        if self._writer is not None:
+            self._write_pending()
+
+    def close(self):
+        if self._writer is not None and not self._closing:
+            self._closing=True
+            self._wake.set()
+            self._writer.join()
+
+    def _write_loop(self):
+        while not self._closing:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self._write_pending()
+            except Exception as e:
+                print("could not write the log to %s: %s"%(self.filename,e))
+        self._write_pending()
+
+    def _write_pending(self):
+        with self._file_lock:
+            with self._lock:
+                batch,self._pending=self._pending,[]
+                lines=[]
+                for r in batch:
+                    r.pending=False
+                    count,r.written=r.count-r.written,r.count
+                    lines.append((r.time,r.level,r.source,r.message,count))
+            if not lines:
+                return
+            data="".join(json.dumps({"t":t,"level":l,"source":s,"msg":m,"count":c},ensure_ascii=False)+"\n" for t,l,s,m,c in lines)
+            with open(self.filename,"a",encoding="utf-8") as f:
+                f.write(data)
+                size=f.tell()
+            if size>self.max_bytes:
+                self._rotate()
+
+    def _rotate(self):
+        for i in range(self.backups-1,0,-1):
+            src="%s.%d"%(self.filename,i)
+            if os.path.exists(src):
+                os.replace(src,"%s.%d"%(self.filename,i+1))
+        if self.backups>0:
+            os.replace(self.filename,self.filename+".1")
+        else:
+            os.remove(self.filename)
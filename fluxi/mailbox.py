@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Lock-free "latest value" mailbox between background loops and the GUI
+"""
+import collections,itertools
+
+class ValueCell(object):
+    """
+    A versioned cell that always holds the newest value
+
+    Writers from any thread ``publish`` a value. The version and the value
+    are stored together as one tuple, a single attribute assignment that is
+    atomic in CPython, so a reader never sees a value with the version of
+    another one. Readers compare the version with the one they have seen
+    last, everything that was published in between is dropped unless
+    ``keep`` is larger than 0.
+
+    Parameters
+    ----------
+    value : initial value (version 0)
+    keep : number of intermediate values to keep for ``drain``
+    """
+    __slots__=("_slot","_counter","_kept")
+    def __init__(self,value=None,keep=0):
+        self._slot=(0,value)
+        self._counter=itertools.count(1)
+        self._kept=None
+        self.set_keep(keep)
+
+    def publish(self,value):
+        self._slot=(next(self._counter),value)
+        if self._kept is not None:
+            self._kept.append(value)
+
+    def read(self):
+        """ returns the tuple (version, value) """
+        return self._slot
+
+    @property
+    def value(self):
+        return self._slot[1]
+
+    @property
+    def version(self):
+        return self._slot[0]
+
+    def set_keep(self,keep):
+        """ keep the last ``keep`` published values, 0 to only keep the newest """
+        self._kept=collections.deque(self._kept or (),maxlen=keep) if keep else None
+
+    def drain(self):
+        """ get and forget the kept values in the order they were published """
+        kept=self._kept
+        out=[]
+        if kept is not None:
+            try:
+                while True:
+                    out.append(kept.popleft())
+            except IndexError:
+                pass
+        return out
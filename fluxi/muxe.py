@@ -14,44 +14,50 @@ except ImportError:
     from PyQt5 import QtGui, QtCore
     from PyQt5.QtCore import Qt
 import numpy as np
-import time
+import time,threading
 import pyqtgraph as pg
-from fluxi.muxe_base import MuxBase
+from fluxi.muxe_base import MuxBase,Option
+from fluxi.ringbuffer import RingBuffer,GrowBuffer
+from fluxi.decimate import MinMaxPyramid,ArraySource
+from fluxi.stats import StreamStats
 
 
 
 
 class MuxBaseParam(MuxBase):    
+    draw_priority=0
+    _drawn_version=None
     def __init__(self,id,fluxi):        
         super().__init__(id,fluxi)
         from fluxi.ptree import mappedNames#,getChildGroup,ParamGroup                
-        parent=self.getfluxi().g("tree:Parameters").mainwidget.invisibleRootItem()
+        parent=self.getfluxi().g("tree:Parameters").root
         if len(self.pathstr)>0:
-            parent=fluxi["group:%s"%self.pathstr].p.treeitem
+            parent=fluxi._group(self.pathstr).p
         elif self.type!="group":
-            parent=fluxi["group:General"].p.treeitem
+            parent=fluxi._group("General").p
         
         self.p=mappedNames[self.type].__call__(parent,self.name)#,digits=digits)
         self.p.sigValueChanged.connect(self._ui_element_changed)  
         self.p.sigContextMenu.connect(self._ui_context_menu_opened)  
         if self.type!="l":
-            self.set(self.p.getValue())#TODO:
+            self._set(self.p.getValue())#TODO:
         self._hasbeenset=False
-        self.contextMenu = QtGui.QMenu()
-        ac=self.contextMenu.addAction("Remove Parameter")
-        ac.triggered.connect(self._remove_action)
-        
-        ac=self.contextMenu.addAction("Properties")
-        ac.triggered.connect(self.display_dialog)
+        self.contextMenu=None
         
         if self.type=="a":
-            self.options.update({
-                "Save/Save Value":{"type":"bool","value":False},
-            })
+            self.add_options({"Save/Save Value":Option("bool",False)})
         if self.type=="group":
-            self.options.update({"Expanded":{"type":"bool","value":True}})            
+            self.add_options({"Expanded":Option("bool",True)})
         
     def _ui_context_menu_opened(self,ev):        
+        if self.contextMenu is None:
+            #created on first use, most parameters never need it
+            self.contextMenu = QtGui.QMenu()
+            ac=self.contextMenu.addAction("Remove Parameter")
+            ac.triggered.connect(self._remove_action)
+            
+            ac=self.contextMenu.addAction("Properties")
+            ac.triggered.connect(self.display_dialog)
         self.contextMenu.popup(ev.globalPos())
         
     def _ui_element_changed(self,param,value,noaction=False):
@@ -75,33 +81,25 @@ class MuxBaseParam(MuxBase):
             
     def set(self, value):
         if self.type=="f":
-            self.value=float(value)
+            value=float(value)
         elif self.type=="s":        
-            self.value=str(value)
+            value=str(value)
         elif self.type=="i":
-            self.value=int(value)        
+            value=int(value)        
         elif self.type=="l":
 #            print ("val",self.type,value)
-            self.value=str(value)                
+            value=str(value)                
         elif self.type=="b":
             if not isinstance(value, int):#bool is subclass of int
                 raise ValueError("This needs to be an boolean (or an integer)")
-            self.value=value
-        else:
-#            print ("valx",self.type,value)
-            self.value=value
-        self._hasbeenset=True
-        self._requestRedraw()
-        return self
+        return super().set(value)
         
     def draw(self):
-        self.mutex.lock()
-#        if self.id:
-#            print (self.id,self.name,repr(self.value))
-#        if self.type=="l":
-#            print("draw_setvalue",self.value)
-        self.p.setValue(self.value)     
-        self.mutex.unlock()
+        #only the newest value is shown, values set in between are skipped
+        version,value=self._cell.read()
+        if version!=self._drawn_version:
+            self._drawn_version=version
+            self.p.setValue(value)     
         
     def setValues(self,values):
         self.values=[str(v) for v in values]
@@ -131,7 +129,10 @@ class MuxBaseParam(MuxBase):
         self.requestDrawAction(self.draw_expanded)
     def draw_expanded(self):   
         #print("draw_expanded",self.p.expanded)
-        self.p.treeitem.setExpanded(self.p.expanded)      
+        self.p.setExpanded(self.p.expanded)
+
+    def _is_drawable(self):
+        return self.p.isVisible()
 
 
 class MuxDocked(MuxBase): 
@@ -142,6 +143,21 @@ class MuxDocked(MuxBase):
         #super().__init__(name,fluxi)
         self.dock=self.getfluxi()._createDockIfNA(self.name,**kwargs)
         self.dock.addWidget(widget)
+        
+    def _is_drawable(self):
+        #docks in a background tab or closed docks are not visible
+        return not hasattr(self,"dock") or self.dock.isVisible()
+        
+    def _followView(self):
+        """ redraw when the plot is resized or zoomed, for curves that are decimated to what is visible """
+        vb=self.plot.getViewBox()
+        vb.sigResized.connect(lambda *args:self._requestRedraw())
+        vb.sigXRangeChanged.connect(self._xRangeChanged)
+        
+    def _xRangeChanged(self,*args):
+        #with autorange the range follows the data, which is drawn completely anyway
+        if not self.plot.getViewBox().autoRangeEnabled()[0]:
+            self._requestRedraw()
     def delete(self):
         #print("deleting dock et al")
         #layout.removeWidget(self.widget_name)
@@ -154,9 +170,103 @@ class MuxDocked(MuxBase):
         if hasattr(self,"plot") and self.plot:
             self.plot.deleteLater()
             del self.plot
+
+class MuxPolled(MuxDocked):
+    """
+    A dock for data that changes without ``value``, like the timings, the
+    errors or the log: a timer compares ``_version()`` every
+    ``refresh_interval`` seconds with the one of the last ``draw`` (kept in
+    ``_drawn``) and requests a redraw when it changed. Sub-classes add their
+    widgets to ``self.box`` and call ``_startPolling`` at the end of ``__init__``.
+    """
+    _tracks_value=False
+    optiondefs={"Save/Save Value":Option("bool",False)}
+    refresh_interval=1.
+    def __init__(self,id,fluxi):
+        super().__init__(id,fluxi)
+        self._drawn=None
+        self.mainwidget=QtGui.QWidget()
+        self.box=QtGui.QVBoxLayout()
+        self.box.setContentsMargins(0,0,0,0)
+        self.mainwidget.setLayout(self.box)
+        self.timer=QtCore.QTimer(timeout=self._poll)
+
+    def _startPolling(self):
+        self.createDock(self.mainwidget)
+        self.timer.start(self.refresh_interval*1000)
+        self._requestRedraw()
+
+    def _version(self):
+        """ changes when there is something new to draw, None to redraw on every poll """
+        return None
+
+    def _poll(self):
+        version=self._version()
+        if version is None or version!=self._drawn:
+            self._requestRedraw()
+
+    def _addBar(self,widgets,stretch=True):
+        """ a row of widgets (buttons, filters) above the content """
+        bar=QtGui.QHBoxLayout()
+        for widget in widgets:
+            bar.addWidget(widget)
+        if stretch:
+            bar.addStretch()
+        self.box.addLayout(bar)
+
+    def _button(self,title,slot):
+        b=QtGui.QPushButton(title)
+        b.clicked.connect(slot)
+        return b
+
+    def _makeTable(self,columns):
+        t=QtGui.QTableWidget(0,len(columns))
+        t.setHorizontalHeaderLabels(columns)
+        t.verticalHeader().hide()
+        t.setEditTriggers(QtGui.QAbstractItemView.NoEditTriggers)
+        return t
+
+    def _fillTable(self,table,rows,right=()):
+        """ set the texts of ``rows`` (lists of strings), reusing the items; the columns in ``right`` are right aligned """
+        table.setUpdatesEnabled(False)
+        try:
+            table.setRowCount(len(rows))
+            for i,cells in enumerate(rows):
+                for j,text in enumerate(cells):
+                    item=table.item(i,j)
+                    if item is None:
+                        item=QtGui.QTableWidgetItem()
+                        if j in right:
+                            item.setTextAlignment(QtCore.Qt.AlignRight|QtCore.Qt.AlignVCenter)
+                        table.setItem(i,j,item)
+                    item.setText(text)
+        finally:
+            table.setUpdatesEnabled(True)
+
+    def delete(self):
+        self.timer.stop()
+        super().delete()
           
 class MuxC(MuxDocked):
-    """ A running waveform chart like in Labview"""
+    """ 
+    A running waveform chart like in Labview
+    
+    The samples are kept in a ``RingBuffer``, drawing hands views of it to
+    the curves without copying. ``v`` returns a copy.
+    
+    With ``setTimeWindow`` the samples are plotted against the time they were
+    added instead of their index, see there.
+    
+    Curves with many more samples than the plot has pixel columns are drawn
+    as a min/max envelope of the visible range, see ``fluxi.decimate``.
+    
+    ``stats`` gives running statistics of a curve that are updated with
+    each sample, ``setTrim`` uses them for the y range.
+    """
+    _tracks_value=False
+    optiondefs={"Save/Save Value":Option("bool",False)}
+    max_length=10000000 # the most samples a chart in time mode grows to
+    decimate=True # draw long curves as one min/max pair per pixel column
     def __init__(self,name,fluxi,value=None,length=200,trim=15,**kwargs):
         super().__init__(name,fluxi)
         self.plot = pg.PlotWidget()       
@@ -165,26 +275,43 @@ class MuxC(MuxDocked):
         self.trim=trim
         self.trim=False
         self.pad=50 # padding in %
+        self._stats={} # (curve, window) -> StreamStats, only for the curves that were asked for
+        self.ring=RingBuffer(1,length)
+        self.times=None # the timestamps of the samples in time mode
+        self.time_window=None
+        self._lock=threading.Lock() # keeps samples and timestamps together
+        self._x=np.arange(0)
+        self.pyramid=MinMaxPyramid() # block minima and maxima of the ring for the envelopes
         self.setLength(length)
         self.name=name
         self.mainwidget=self.plot
         self.type="Chart"
         self.addSelectionHandler()
+        self._followView()
         self.styles=[{"pen":pg.mkPen((0,0,0), width=1)},{"pen":(27,64,94)},{"pen":(94,2,2)},{"pen":(28,94,55)},{"pen":(85,23,71)}]
-        self.arrpos=0
         self.roll=True
         
-        self.options.update({
-            "Save/Save Value":{"type":"bool","value":False},        
-        })
         
 #    def addCurve():
 #        self.curves[]    
-    def setLength(self,length):
+    def setLength(self,length,curve=None):
+        """ 
+        the number of samples that are kept, for all curves or the number
+        that is shown of ``curve``, which can be smaller. The kept samples
+        stay, only samples that do not fit anymore are dropped.
+        """
         if int(length)<=0:
             raise ValueError("A length smaller than 1 was specified")
-        self.length=int(length)
-        self.arrs=np.full((1,self.length),np.nan)
+        if curve is None:
+            self.length=int(length)
+            with self._lock:
+                self.ring.resize(self.length)
+                if self.times is not None:
+                    self.times.resize(self.length)
+        else:
+            self.ring.row_lengths[curve]=int(length)
+        self._requestRedraw()
+        return self
     
     def fill(self,curvenum1,curvenum2,brush=(50,0,0,50)):        
         for i in range(max(curvenum1,curvenum2)):
@@ -195,7 +322,8 @@ class MuxC(MuxDocked):
         fill=pg.FillBetweenItem(self.curves[curvenum1], self.curves[curvenum2], brush)
         self.plot.addItem(fill)
         
-    def add(self,values):              
+    def add(self,values,t=None):              
+        """ add a sample to each curve, ``t`` is its time in time mode (default ``time.monotonic()``) """
         try:
             L=len(values)
         except:
@@ -203,68 +331,345 @@ class MuxC(MuxDocked):
             L=1
         if L>20:
             raise ValueError("More than 20 Lines")
-        values=np.array(values)        
-        #if more or less values than curves
-        s=self.arrs.shape
-        if s[0]<L:
-            self.arrs=np.append(self.arrs, np.full([L-s[0], s[1]],np.nan),axis=0)
-        if s[0]>L:
-            values=np.append(values, np.full((s[0]-L,),np.nan))
-        #if length to show was changed  
-        s=self.arrs.shape  
-        if s[1]!=self.length:
-            if s[1]<self.length:
-                self.arrs=np.append(np.full([s[0], self.length-s[1]],np.nan),self.arrs,axis=1)
-            elif s[1]>self.length:
-                self.arrs=self.arrs[:,-self.length:]          
-        self.arrs[:len(values),self.arrpos]=values#TODO: move also the values that have not been set
-        self.arrpos=(self.arrpos+1)%self.length
+        #curves without a value get NaN
+        if self.times is None:
+            if self._stats:
+                with self._lock:
+                    self._feed_stats(np.asarray(values,dtype=float).reshape(-1,1))
+                    self.ring.append(values)
+            else:
+                self.ring.append(values)
+        else:
+            if t is None:
+                t=time.monotonic()
+            with self._lock:
+                self._make_room(1,t)
+                if self._stats:
+                    self._feed_stats(np.asarray(values,dtype=float).reshape(-1,1))
+                self.ring.append(values)
+                self.times.append(t)
         self._requestRedraw()
         
+    def add_block(self,block,t=None):
+        """ 
+        add many samples at once: an array (curves, samples) or a 1-D array
+        of samples of the first curve. There is no limit of curves.
+        
+        In time mode ``t`` are the times of the samples, by default they are
+        spread evenly from the last sample until now.
+        """
+        block=np.asarray(block,dtype=float)
+        if block.ndim not in (1,2):
+            raise ValueError("add_block needs an array of shape (curves, samples) or (samples,)")
+        if self.times is None:
+            if self._stats:
+                with self._lock:
+                    self._feed_stats(np.atleast_2d(block))
+                    self.ring.extend(block)
+            else:
+                self.ring.extend(block)
+        else:
+            n=block.shape[-1]
+            with self._lock:
+                if t is None:
+                    now=time.monotonic()
+                    last=self.times.view(0,1)[0] if self.times.count else np.nan
+                    t=np.linspace(last,now,n+1)[1:] if last==last else np.full(n,now)
+                t=np.asarray(t,dtype=float)
+                if len(t)!=n:
+                    raise ValueError("add_block needs one time for each sample")
+                self._make_room(n,t[-1])
+                if self._stats:
+                    self._feed_stats(np.atleast_2d(block))
+                self.ring.extend(block)
+                self.times.extend(t)
+        self._requestRedraw()
+        return self
+        
+    def setTimeWindow(self,seconds):
+        """ 
+        plot against time and keep the samples of the last ``seconds``, None to switch back
+        
+        Every sample gets a timestamp, the ``t`` given to ``add`` or
+        ``time.monotonic()``. When the chart is full of samples that are still
+        inside the window, its length is doubled (up to ``max_length``). The
+        x-axis is the time in seconds relative to the newest sample, only
+        the samples within the window are drawn. The samples that were
+        added before have no time and are removed.
+        """
+        with self._lock:
+            if seconds is None:
+                self.times=None
+                self.time_window=None
+            else:
+                self.time_window=float(seconds)
+                if self.times is None:
+                    self.times=RingBuffer(1,self.length)
+                    self.ring.clear()
+        self.curves={}
+        self.requestDrawAction(self.draw_clear)
+        return self
+        
+    def _make_room(self,n,t):
+        """ grow the rings instead of dropping samples that are still in the time window """
+        ring=self.ring
+        size=min(ring.size,self.times.size)
+        if size+n<=ring.length or ring.length>=self.max_length:
+            return
+        #the oldest sample that would be dropped
+        oldest=self.times.view(0,size)[min(size+n-ring.length,size)-1] if size else -np.inf
+        if oldest>=t-self.time_window:
+            self.length=min(max(2*ring.length,size+n),self.max_length)
+            ring.resize(self.length)
+            self.times.resize(self.length)
+            
+    @property
+    def t(self):
+        """ a copy of the times of the samples in ``v`` in time mode """
+        if self.times is None:
+            return None
+        return self.times.view(0).copy()
+        
     @property
     def v(self):
-        return np.roll(self.arrs, -self.arrpos,axis=1)
+        """ a copy of the samples of all curves, the oldest first """
+        return self.ring.view().copy()
     @v.setter
     def v(self, value):
-        self.arrs=np.array(value)
-        self.arrpos=0
+        #the samples have no times, so this ends the time mode
+        if self.times is not None:
+            self.setTimeWindow(None)
+        self.ring.load(np.array(value,dtype=float))
+        self.ring.resize(self.length)
         self._requestRedraw()
         
+    @property
+    def arrs(self):
+        """ the samples as they were stored before: a ring of ``length`` columns, the next one written at ``arrpos`` """
+        return np.roll(self.ring.view(),self.ring.pos,axis=1)
+    @arrs.setter
+    def arrs(self,value):
+        self.v=value
+        
+    @property
+    def arrpos(self):
+        return self.ring.pos
+        
+    def _xs(self,n):
+        """ the x values 0..n-1, a view of one cached array """
+        if len(self._x)<n:
+            self._x=np.arange(max(n,2*len(self._x)),dtype=float)
+        return self._x[:n]
+        
+    def _width(self):
+        """ the number of pixel columns of the plot area, None to draw all samples """
+        if not self.decimate:
+            return None
+        return max(int(self.plot.getViewBox().width()),100)
+        
+    def _visible(self,first,start,stop):
+        """ the part of the samples ``start`` to ``stop`` that is in the x range, ``first`` is the sample at x=0 """
+        vb=self.plot.getViewBox()
+        if vb.autoRangeEnabled()[0]:
+            return start,stop,False
+        (xmin,xmax),_=vb.viewRange()
+        return max(start,first+int(np.floor(xmin))),min(stop,first+int(np.ceil(xmax))+1),True
+        
     def draw(self):
-        if self.roll:
-            arrs=self.v
-        else:
-            arrs=self.arrs
-        for i in range(self.arrs.shape[0]):
+        if self.times is not None:
+            return self._draw_time()
+        ring=self.ring
+        arrs=None if self.roll else self.arrs
+        width=self._width() if self.roll else None
+        if width:
+            self.pyramid.update(ring)
+        for i in range(ring.rows):
             try:
                 self.curves[i]                
             except:                
                 self.curves[i]=self.plot.plot(**self.styles[min(i,len(self.styles)-1)])
+            ys=ring.view(i) if self.roll else arrs[i]
+            data=self._decimated(i,len(ys),width) if width else None
+            if data is None:
+                #curves with a shorter length end at the same x as the others
+                data=self._xs(ring.length)[ring.length-len(ys):],ys
+            self.curves[i].setData(*data)
+        if self.trim:
+            self._trimRange()
             
-            self.curves[i].setData(arrs[i])            
-
-#        if self.trim:
-#            x=np.array(self.arrs[0])
-#            minv=np.percentile(x, self.trim)
-#            maxv=np.percentile(x, 100-self.trim)
-#            pad=abs(minv-maxv)*self.pad/100
-#            self.curves[0].parentItem().parentItem().setYRange(minv-pad, maxv+pad)
+    def _decimated(self,row,n,width):
+        """ the visible part of the last ``n`` samples of ``row`` as envelope, None to draw them all """
+        count=self.pyramid.done
+        first=count-self.ring.length # the sample at x=0
+        start,stop,zoomed=self._visible(first,max(count-n,count-self.ring.size),count)
+        if stop<=start:
+            return None
+        env=self.pyramid.envelope(row,start,stop,width)
+        if env is not None:
+            return env[0]-first,env[1]
+        if zoomed:
+            ys=self.ring.view_range(start,stop,row)
+            return self._xs(start-first+len(ys))[start-first:],ys
+        return None
+
+    def _draw_time(self):
+        ring=self.ring
+        width=self._width()
+        with self._lock:
+            n=min(ring.size,self.times.size)
+            ts=self.times.view(0,n)
+            ys=[ring.view(i,n) for i in range(ring.rows)]
+            if width:
+                self.pyramid.update(ring)
+        if n==0:
+            return
+        tlast=ts[-1]
+        lo,hi=tlast-self.time_window,tlast
+        vb=self.plot.getViewBox()
+        if not vb.autoRangeEnabled()[0]:
+            #zoomed in: only the visible part
+            (xmin,xmax),_=vb.viewRange()
+            lo,hi=max(lo,tlast+xmin),min(hi,tlast+xmax)
+        #the times are sorted, binary search instead of drawing the whole ring
+        i0=np.searchsorted(ts,lo,side="left")
+        i1=np.searchsorted(ts,hi,side="right")
+        xs=ts[i0:i1]-tlast
+        first=self.pyramid.done-n # the index of ts[0] in the pyramid
+        for i in range(len(ys)):
+            try:
+                self.curves[i]                
+            except:                
+                self.curves[i]=self.plot.plot(**self.styles[min(i,len(self.styles)-1)])
+            env=self.pyramid.envelope(i,first+i0,first+i1,width) if width else None
+            if env is None:
+                self.curves[i].setData(xs,ys[i][i0:i1])
+            else:
+                #each column at the time of its first sample
+                self.curves[i].setData(ts[env[0].astype(int)-first]-tlast,env[1])
+        if self.trim:
+            self._trimRange()
+            
+    def stats(self,curve=0,window=None):
+        """ 
+        running statistics of the last ``window`` samples of ``curve``
+        (default: as many as it shows), a ``fluxi.stats.StreamStats`` with
+        ``mean``, ``std``, ``ewma``, ``quantile(p)`` and more. They are
+        computed from the samples once and then updated with every sample
+        in O(1), instead of scanning the ring each time.
+        """
+        key=(curve,window)
+        with self._lock:
+            st=self._stats.get(key)
+            size=self._stats_window(curve,window)
+            if st is None:
+                st=self._stats[key]=StreamStats(size)
+                st.generation=None
+            self._sync_stats(curve,st,size)
+            if st.removed>=size:
+                #rounding errors of removing samples could have added up
+                st.resync(self._window_view(curve,size))
+            if self.trim:
+                for p in (self.trim/100.,1-self.trim/100.):
+                    st.track_quantile(p,self._window_view(curve,size))
+        return st
+        
+    def _stats_window(self,curve,window):
+        ring=self.ring
+        return min(int(window or ring.row_lengths.get(curve,ring.length)),ring.length)
+        
+    def _window_view(self,curve,size):
+        """ the samples of ``curve`` in a window of ``size`` """
+        ring=self.ring
+        return ring.view(curve,min(ring.count,size)) if curve<ring.rows else ()
+        
+    def _sync_stats(self,curve,st,size):
+        """ start over after a clear, recompute the window after a change of the length """
+        if st.generation!=self.ring.generation:
+            st.reset(self._window_view(curve,size))
+            st.generation=self.ring.generation
+        elif st.window!=size:
+            st.resync(self._window_view(curve,size),size)
+        
+    def _feed_stats(self,block):
+        """ update the statistics with a block (curves, n) before it is written to the ring, with the lock """
+        ring=self.ring
+        n=block.shape[1]
+        for (curve,window),st in self._stats.items():
+            size=self._stats_window(curve,window)
+            self._sync_stats(curve,st,size)
+            new=block[curve] if curve<len(block) else ()
+            if n>=size:
+                #the block fills the whole window
+                st.reset(new[-size:])
+                continue
+            #the oldest samples leave the window
+            have=min(ring.count,size)
+            drop=max(0,have+n-size)
+            st.add(new,self._window_view(curve,have)[:drop])
+        
+    def setTrim(self,trim=15,pad=50):
+        """ 
+        autorange y only to the ``trim`` and ``100-trim`` percentiles of the
+        curves plus ``pad`` % of that range, so that rare outliers do not
+        squash the plot. The percentiles are the estimates of ``stats``.
+        False for the normal autorange.
+        """
+        self.trim=trim
+        self.pad=pad
+        if not trim:
+            self.requestDrawAction(self.draw_autorange)
+        self._requestRedraw()
+        return self
+        
+    def draw_autorange(self):
+        self.plot.getViewBox().enableAutoRange(y=True)
+        
+    def _trimRange(self):
+        lo,hi=[],[]
+        for i in range(self.ring.rows):
+            st=self.stats(i)
+            lo.append(st.quantile(self.trim/100.))
+            hi.append(st.quantile(1-self.trim/100.))
+        lo=[v for v in lo if v==v]
+        hi=[v for v in hi if v==v]
+        if not lo or not hi:
+            return
+        lo,hi=min(lo),max(hi)
+        pad=abs(hi-lo)*self.pad/100
+        self.plot.getViewBox().setYRange(lo-pad,hi+pad,padding=0)
+        
     def mean(self):
-        return np.nanmean(self.arrs,1)
+        """ the mean of each curve """
+        return np.array([self.stats(i).mean for i in range(self.ring.rows)])
         
     def draw_clear(self):
         self.plot.clear()
+        if self.times is not None:
+            self.plot.setLabel("bottom","time","s")
+        else:
+            self.plot.showLabel("bottom",False)
         self._requestRedraw()        
         
     def clear(self):
-        self.setLength(self.length)        
+        with self._lock:
+            self.ring.clear()
+            if self.times is not None:
+                self.times.clear()
         self.curves={}
         self.requestDrawAction(self.draw_clear)
         return self
 
         
 class MuxG(MuxDocked):
-    """ A graph"""
+    """ 
+    A graph
+    
+    Every curve has a version that changes with ``set`` and ``extend``, only
+    curves with a new version are handed to pyqtgraph again when it is redrawn.
+    """
+    _tracks_value=False
+    optiondefs={"Save/Save Value":Option("bool",False)}
+    decimate=True # draw long lines with increasing xs as one min/max pair per pixel column
     def __init__(self,name,fluxi,trim=15,**kwargs):
         super().__init__(name,fluxi)
         self.plot = pg.PlotWidget()       
@@ -280,15 +685,17 @@ class MuxG(MuxDocked):
         self.type="Graph"
         self.styles=[{"pen":(0,0,0)},{"pen":(152,214,160)},{"pen":(94,2,2)},{"pen":(28,94,55)}]
         self.datas={}
+        self._versions={} # curve -> increases with every change of its data
+        self._drawn={} # curve -> key of what was drawn, unchanged curves are skipped
+        self._growing={} # curve -> (data, GrowBuffer, xs increasing) of curves in append mode
+        self._lod={} # curve -> (version, xs, ys, pyramid, source) of the last decimated data
+        self._followView()
         #self.curve=self.plot.plot(name=curveName)
         #viewbox.setMouseMode(viewbox.RectMode)
         #    def mouseClickEvent(self, ev):
         #        if ev.button() == Qt.RightButton:
         #            self.autoRange()   
 
-        self.options.update({
-            "Save/Save Value":{"type":"bool","value":False},        
-        })  
            
     def setMult(self,xs,ys=None):
         if ys is None:
@@ -307,38 +714,140 @@ class MuxG(MuxDocked):
             xs=np.arange(len(ys))
         if xs is None and not ys is None:
             xs=np.arange(len(ys))           
-        #self.redraw_list[i]=True
+        self._growing.pop(i,None)
         self.datas[i]={"xs":xs,"ys":ys,"kwargs":kwargs}
-        self._requestRedraw()    
+        self._changed(i)
+        
+    def extend(self,i,xs,ys=None):
+        """ 
+        append points to curve ``i``, e.g. of a sweep that is still running.
+        Without ``ys``, ``xs`` are the ys and the xs count on. The points are
+        kept in a ``GrowBuffer``, so appending does not copy the whole curve
+        and long curves are decimated incrementally. ``set`` ends it.
+        """
+        if ys is None:
+            ys,xs=xs,None
+        ys=np.asarray(ys,dtype=float).reshape(-1)
+        grow=self._growing.get(i)
+        if grow is None or self.datas.get(i) is not grow[0]:
+            #continue the curve that was set before
+            old=self.datas.get(i)
+            buf=GrowBuffer(2)
+            if old is not None:
+                buf.extend(np.vstack((np.asarray(old["xs"],dtype=float),np.asarray(old["ys"],dtype=float))))
+            v={"xs":None,"ys":None,"kwargs":old["kwargs"] if old else self.styles[min(i,len(self.styles)-1)]}
+            old_xs=buf.view(0)
+            grow=(v,buf,bool((np.diff(old_xs)>=0).all()))
+        v,buf,increasing=grow
+        last=buf.view_range(buf.count-1,buf.count,0)
+        if xs is None:
+            xs=np.arange(buf.count,buf.count+len(ys),dtype=float)
+        xs=np.asarray(xs,dtype=float).reshape(-1)
+        if len(xs)!=len(ys):
+            raise ValueError("extend needs as many xs as ys")
+        increasing=increasing and (np.diff(np.r_[last,xs])>=0).all()
+        buf.extend(np.vstack((xs,ys)))
+        v["xs"],v["ys"]=buf.view(0),buf.view(1)
+        self._growing[i]=(v,buf,increasing)
+        self.datas[i]=v
+        self._changed(i)
+        return self
+        
+    def _changed(self,i):
+        self._versions[i]=self._versions.get(i,0)+1
+        self._requestRedraw()
+        
     @property
     def v(self):
         return self.datas
     @v.setter
     def v(self, value):
         self.datas=value
+        self._growing={}
+        self._lod={}
+        self._drawn={}
         self._requestRedraw()        
         
     def draw(self):  
+        vb=self.plot.getViewBox()
+        width=max(int(vb.width()),100) if self.decimate else None
+        xrange=None if vb.autoRangeEnabled()[0] else tuple(vb.viewRange()[0])
         for n in self.datas:
             try:
                 self.curves[n]
             except:
                 self.curves[n]=self.plot.plot()
             v=self.datas[n]
-            self.curves[n].setData(v["xs"],v["ys"],**v["kwargs"])
+            #the envelope of a long curve also depends on the width and the visible range
+            long=width is not None and len(v["ys"])>2*width
+            key=(self._versions.get(n),id(v),width,xrange) if long else (self._versions.get(n),id(v))
+            if self._drawn.get(n)==key:
+                continue
+            self._drawn[n]=key
+            data=self._decimated(n,v,width) if long else None
+            if data is None:
+                grow=self._growing.get(n)
+                #xs and ys of the same length, also while the curve is extended
+                data=tuple(grow[1].view()) if grow is not None and grow[0] is v else (v["xs"],v["ys"])
+            self.curves[n].setData(*data,**v["kwargs"])
+            
+    def _decimated(self,n,v,width):
+        """ the visible part of curve ``n`` as envelope, None to draw it as it is """
+        if v["kwargs"].get("pen") is None or "symbol" in v["kwargs"]:
+            return None
+        version=(self._versions.get(n),id(v))
+        lod=self._lod.get(n)
+        if lod is None or lod[0]!=version:
+            grow=self._growing.get(n)
+            if grow is not None and grow[0] is v:
+                #append mode: the pyramid only takes the new points
+                _,buf,increasing=grow
+                pyramid=lod[3] if lod is not None and lod[4] is buf else MinMaxPyramid()
+                if increasing:
+                    pyramid.update(buf)
+                both=buf.view()
+                lod=(version,both[0],both[1],pyramid if increasing else None,buf,1)
+            else:
+                #the pyramid is built once per data set, redraws after zooming only read it
+                xs=np.asarray(v["xs"],dtype=float)
+                ys=np.asarray(v["ys"],dtype=float)
+                pyramid=None
+                if xs.ndim==1 and xs.shape==ys.shape and (np.diff(xs)>=0).all():
+                    pyramid=MinMaxPyramid()
+                    pyramid.update(ArraySource(ys))
+                lod=(version,xs,ys,pyramid,None,0)
+            self._lod[n]=lod
+        _,xs,ys,pyramid,_,row=lod
+        if pyramid is None:
+            return None
+        start,stop=0,len(xs)
+        vb=self.plot.getViewBox()
+        zoomed=not vb.autoRangeEnabled()[0]
+        if zoomed:
+            (xmin,xmax),_=vb.viewRange()
+            start=max(0,np.searchsorted(xs,xmin)-1)
+            stop=min(len(xs),np.searchsorted(xs,xmax,side="right")+1)
+        env=pyramid.envelope(row,start,stop,width)
+        if env is None:
+            return (xs[start:stop],ys[start:stop]) if zoomed else None
+        return xs[env[0].astype(int)],env[1]
             
     def draw_clear(self):
         self.curves={}
+        self._drawn={}
         self.plot.clear()
         
     def clear(self):
         self.datas={}
+        self._growing={}
+        self._lod={}
         self.requestDrawAction(self.draw_clear)
         return self
 
 class MuxDump(MuxBase):
     """ Dump some variables and they can be saved an displayed etc """
     def __init__(self,name,fluxi,value=None):
+        super().__init__(name,fluxi)
         self.name=name
         self.value=value
     @property
@@ -350,6 +859,9 @@ class MuxDump(MuxBase):
 #%%
 class MuxImg(MuxDocked):
     """ An Image"""
+    _tracks_value=False
+    optiondefs={"Save/Save Value":Option("bool",False)}
+    draw_priority=20
     def __init__(self,name,fluxi,trim=15,value=None,**kwargs): 
         super().__init__(name,fluxi)
         self.view=pg.PlotItem()
@@ -365,9 +877,6 @@ class MuxImg(MuxDocked):
         self.autoLevels,self.autoHistogramRange,self.autoRange=False,False,False
         self.autoAll=True
         
-        self.options.update({
-            "Save/Save Value":{"type":"bool","value":False},        
-        }) 
                 
     
     def setTitles(self):
@@ -470,15 +979,14 @@ class MuxImg(MuxDocked):
 #%%
 class MuxTable(MuxDocked):
     """ An Image"""
+    _tracks_value=False
+    optiondefs={"Save/Save Value":Option("bool",False)}
     def __init__(self,name,fluxi,value=None,**kwargs):
         super().__init__(name,fluxi)
         self.t=self.mainwidget=MyTableWidget(editable=True,sortable=True)        
         self.createDock(self.t,**kwargs) 
         self.type="table"
         
-        self.options.update({
-            "Save/Save Value":{"type":"bool","value":False},
-        })  
         
         #self.t.setFormat("%f.5")
             
@@ -522,6 +1030,7 @@ class MyTableWidget(pg.TableWidget):
     
 class MuxList(MuxDocked):
     """ A (collapsable) list """
+    _tracks_value=False
     def __init__(self,name,fluxi,**kwargs):
         super().__init__(name,fluxi)   
         mw=self.mainwidget = QtGui.QTreeWidget()
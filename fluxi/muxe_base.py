@@ -11,9 +11,69 @@ try:
 except ImportError:
     from PyQt5 import QtGui, QtCore
     from PyQt5.QtCore import Qt    
-import weakref, queue
+import weakref, collections
+from fluxi.mailbox import ValueCell
+from fluxi.history import HistoryRing
+from fluxi.observers import Subscription
+from fluxi import perf
+
+class Option(object):
+    """ the type and the default value of an option of a mux """
+    __slots__=("type","value")
+    def __init__(self,type,value):
+        self.type=type
+        self.value=value
+        
+    def __repr__(self):
+        return "Option(%r, %r)"%(self.type,self.value)
+
+_unset=object()
 
 class MuxBase(object):   
+    draw_priority=10 # lower values are drawn first when the frame budget is tight
+    _draw_wait=0
+    _redraw_pending=False
+    _history=None
+    _subscribers=()
+    _changes=0
+    _tracks_value=True # False if the data can change without setting ``value``
+    #the options of this class, sub-classes only list the ones they add or change
+    optiondefs={
+        #"Limits/Min":Option("float",float("-inf")),
+        #"Limits/Max":Option("float",float("+inf")),
+        #"Limits/Step":Option("float",0),
+        #"Appearance/Color":Option("color",0),
+        #"Limits/Color":Option("color",0),
+        "Info/Tags":Option("str",""),
+        "Info/Help":Option("str",""),
+        "Save/Save Value":Option("bool",True),
+        "Default/Ask if unset":Option("bool",True),
+    }
+    _extra_options={} # options of a single instance, see add_options
+    
+    def __init_subclass__(cls,**kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._resolve_options()
+        
+    @classmethod
+    def _resolve_options(cls):
+        """ merge the options of the class with the inherited ones and find the get_opt_/set_opt_ methods once """
+        defs={}
+        for c in reversed(cls.__mro__):
+            defs.update(c.__dict__.get("optiondefs",{}))
+        cls._optiondefs=defs
+        cls._optaccess={}
+        cls._optgetters=[n for n in defs if cls._opt_accessors(n)[0] is not None]
+        
+    @classmethod
+    def _opt_accessors(cls,name):
+        """ the (getter, setter) methods of an option or None, looked up only on first use """
+        acc=cls._optaccess.get(name)
+        if acc is None:
+            key=name.replace("/","_")
+            acc=cls._optaccess[name]=(getattr(cls,"get_opt_"+key,None),getattr(cls,"set_opt_"+key,None))
+        return acc
+        
     def __init__(self,id,fluxi):
         super().__init__()    
         self._hasbeenset=False
@@ -23,21 +83,9 @@ class MuxBase(object):
         self.opvals={}        
         self._action=None
         self.mutex = QtCore.QMutex()
+        self._cell=ValueCell()
 
-        self._guiQueue=queue.Queue()
-        
-        self.options={
-            #"Limits/Min":{"type":"float","value":float("-inf")},
-            #"Limits/Max":{"type":"float","value":float("+inf")},
-            #"Limits/Step":{"type":"float","value":0},
-            #"Appearance/Color":{"type":"color","value":0},
-            #"Limits/Color":{"type":"color","value":0}
-            "Info/Tags":{"type":"str","value":""},
-            "Info/Help":{"type":"str","value":""},
-            "Save/Save Value":{"type":"bool","value":True},            
-            "Default/Ask if unset":{"type":"bool","value":True},          
-        }
-        
+        self._guiQueue=collections.deque()
         
     def addSelectionHandler(self):
         #TODO:remove?
@@ -51,11 +99,66 @@ class MuxBase(object):
     @v.setter
     def v(self, value):
         self.set(value)
+        
+    @property
+    def value(self):
+        """ the newest value, it can be written from any thread """
+        return self._cell._slot[1]
+        
+    @value.setter
+    def value(self, value):
+        self._cell.publish(value)
+        if self._history is not None:
+            self._history.append(value)
+        self.getfluxi()._note_change(self)
+        
+    @property
+    def version(self):
+        """ a number that increases with every change of the value or the displayed data """
+        return self._cell.version+self._changes
+        
+    def keep_values(self,n):
+        """ keep up to n values that were set between two draws, get them with ``pop_values`` """
+        self._cell.set_keep(n)
+        return self
+        
+    def pop_values(self):
+        """ the values set since the last call, only if enabled with ``keep_values`` """
+        return self._cell.drain()
+    
+    def enable_history(self,capacity=10000,dtype=None):
+        """ record the last ``capacity`` values with their times, read them with ``history`` """
+        if dtype is None:
+            dtype=float if self.type in ("f","i","b") else object
+        self._history=HistoryRing(capacity,dtype)
+        return self
+        
+    def disable_history(self):
+        self._history=None
+        return self
+        
+    def history(self,since=None,until=None,max_points=None,copy=False):
+        """
+        (times, values) of the recorded values as numpy arrays, see ``enable_history``
+        
+        Only values with ``since <= time <= until`` (seconds as in ``time.time()``)
+        are returned, with ``max_points`` they are downsampled by taking every n-th.
+        """
+        if self._history is None:
+            raise ValueError("the history of %s is not enabled, call enable_history() first"%self.id)
+        return self._history.query(since,until,max_points,copy)
     
     def get(self):
         return self.value
         
     def set(self,value):
+        batch=self.getfluxi()._current_batch()
+        if batch is not None:
+            batch.set(self,value)
+            return self
+        return self._set(value)
+        
+    def _set(self,value):
         self.value=value
         self._hasbeenset=True
         self._requestRedraw()
@@ -77,18 +180,53 @@ class MuxBase(object):
         self._action=function
         return self
 
+    def subscribe(self,callback,max_rate=None,mode="latest",thread="gui"):
+        """
+        call ``callback(mux, value)`` when the value is changed, like ``action``
+        but with any number of subscribers
+        
+        ``max_rate`` limits the calls per second, ``mode="latest"`` skips the
+        values in between and ``mode="all"`` delivers all of them. With 
+        ``thread="worker"`` the callback runs in a thread pool instead of 
+        the GUI thread. Returns a ``Subscription``, stop it with ``cancel()``.
+        """
+        sub=Subscription(self,callback,max_rate,mode,thread)
+        self._subscribers=self._subscribers+(sub,)
+        return sub
+        
+    def unsubscribe(self,subscription):
+        subscription.active=False
+        self._subscribers=tuple(s for s in self._subscribers if s is not subscription)
+        return self
+
         
     def emitChanged(self,*args):      
+        batch=self.getfluxi()._current_batch()
+        if batch is not None:
+            batch.action(self)
+            return self
+        for sub in self._subscribers:
+            sub.notify(self.value)
         if self._action:
+            t0=perf.clock() if perf.enabled else None
             try:
                 self._action(self, self.value)
+                if t0 is not None:
+                    perf.record("action "+self.id,perf.clock()-t0)
             except Exception:
-                import sys
-                self._errinfo=sys.exc_info()
-                self.requestDrawAction(self.showError)
+                self._reportError()
                 raise
         return self
         
+    def _reportError(self):
+        """ add the current error to the error dock, the popup is only shown the first time """
+        import sys
+        record=self.getfluxi().report_error(source=self.id)
+        if record.count==1:
+            self._errinfo=sys.exc_info()
+            self.requestDrawAction(self.showError)
+        return record
+        
     def showError(self):
         import traceback
         eT, eV, eTB = self._errinfo
@@ -157,15 +295,25 @@ class MuxBase(object):
         
     def _requestRedraw(self):
         """ tell the fluxi that we want to redraw this widget """
-        self.getfluxi().request_redraw(self)
+        self._changes+=1
+        #the scheduler resets the flag before it reads the value, so no change is lost
+        if not self._redraw_pending:
+            self._redraw_pending=True
+            self.getfluxi().request_redraw(self)
+        
+    def _is_drawable(self):
+        """ False if drawing would not be seen anyway, the redraw is then postponed """
+        return True
       
     def remove(self):
         self.delete()
         self.getfluxi().removeElement(self.id)
+    _deleted=False # set by Fluxi.removeElement
     def delete(self):
         pass
     def __del__(self):
-        self.delete()
+        if not self._deleted:
+            self.delete()
 
     @property
     def a(self):
@@ -188,15 +336,15 @@ class MuxBase(object):
     def _do_draw_actions(self):
         try:
             while True:
-                func,args,kwargs=self._guiQueue.get_nowait()          
+                func,args,kwargs=self._guiQueue.popleft()          
                 func(*args,**kwargs)
-        except queue.Empty:
+        except IndexError:
             pass
             
         
     def requestDrawAction(self,action, *args,**kwargs):
         """ execute function 'action' with *args and **kwargs in the GUI thread (before drawing operations)"""
-        self._guiQueue.put((action,args,kwargs))
+        self._guiQueue.append((action,args,kwargs))
         self._requestRedraw()
         return self
         
@@ -207,12 +355,37 @@ class MuxBase(object):
         return self
        
     ########### options
+    # only the values that differ from the defaults are stored in ``opvals``
+    
+    @property
+    def options(self):
+        """ all options as a dict of name -> {"type": ..., "value": default} """
+        defs=dict(self._optiondefs,**self._extra_options)
+        return {n:{"type":o.type,"value":o.value} for n,o in defs.items()}
+        
+    def add_options(self,options):
+        """ add or change options (a dict of name -> Option) only for this instance """
+        self._extra_options=dict(self._extra_options,**options)
+        return self
+        
+    def _optiondef(self,name):
+        o=self._extra_options.get(name)
+        if o is None:
+            o=self._optiondefs.get(name)
+        return o
 
     def set_opt(self,name,value):
-        try:
-            return getattr(self,"set_opt_%s"%name.replace("/","_"))(value)
-        except AttributeError:
-            self.opvals[name]=value
+        setter=self._opt_accessors(name)[1]
+        if setter is not None:
+            setter(self,value)
+        else:
+            o=self._optiondef(name)
+            if o is not None and o.value==value:
+                self.opvals.pop(name,None)
+            else:
+                self.opvals[name]=value
+        if name=="Save/Save Value":
+            self.getfluxi()._note_change(self)
         return self
 
     def set_opts(self,opts):
@@ -224,20 +397,37 @@ class MuxBase(object):
             self.set_opt(n,opts[n])
         return self
         
+    def set_opt_Info_Tags(self,value):
+        self.opvals["Info/Tags"]=value
+        self.getfluxi().muxe.set_tags(self.id,value)
+        return self
+
     def get_opt(self,name):
-        try:
-            return getattr(self,"get_opt_%s"%name.replace("/","_"))()
-        except AttributeError:
-            try:
-                return self.opvals[name]
-            except:
-                return self.options[name]["value"]
+        getter=self._opt_accessors(name)[0]
+        if getter is not None:
+            return getter(self)
+        v=self.opvals.get(name,_unset)
+        if v is not _unset:
+            return v
+        o=self._optiondef(name)
+        if o is None:
+            raise KeyError("%s has no option %s"%(self.id,name))
+        return o.value
         
     def get_opts(self):
+        """ the options that differ from their defaults """
         vals={}
-        for n in self.options:
-            if self.options[n]["value"]!=self.get_opt(n):
-                vals[n]=self.get_opt(n)
+        for n,v in self.opvals.items():
+            o=self._optiondef(n)
+            if o is not None and o.value!=v:
+                vals[n]=v
+        getters=self._optgetters
+        if self._extra_options:
+            getters=getters+[n for n in self._extra_options if n not in self._optiondefs and self._opt_accessors(n)[0] is not None]
+        for n in getters:
+            v=self.get_opt(n)
+            if v!=self._optiondef(n).value:
+                vals[n]=v
         return vals
         
     def _gui_opt_changed(self,param,value):
@@ -256,9 +446,10 @@ class MuxBase(object):
             opgui=self.getfluxi().opgui=Fluxi("Settings",type_="dialog")
         
         opgui.win.show()
-        for n in self.options:        
-            param=opgui.BasicParam(n,type=self.options[n]["type"])
-            param.v=self.opvals[n]
+        options=self.options
+        for n in options:        
+            param=opgui.BasicParam(n,type=options[n]["type"])
+            param.v=self.get_opt(n)
             param.a=self._gui_opt_changed
     
     def draw(self):
@@ -269,4 +460,23 @@ class MuxBase(object):
         """ warn when we want to compare this method, most of the time someone forgot .v """
         if not isinstance(other,MuxBase):
             raise ValueError("Trying to compare Mux with something that is not a Mux. You probably wanted to compare the value (.v)")
-                    
\ No newline at end of file
+                    
+MuxBase._resolve_options()
+
+class MuxLoop(MuxBase):
+    """ the error limit that the loops share """
+    max_errors=1 # the loop stops after this many errors since it was started, None to never stop
+    def __init__(self,id,fluxi):
+        super().__init__(id,fluxi)
+        self.errors=0
+
+    def setMaxErrors(self,max_errors):
+        """ stop the loop after ``max_errors`` errors since it was started, None to keep it running """
+        self.max_errors=max_errors
+        return self
+
+    def _too_many_errors(self):
+        if self.max_errors is not None and self.errors>=self.max_errors:
+            self.getfluxi().log("%s stopped after %d errors"%(self.id,self.errors),type="error")
+            return True
+        return False
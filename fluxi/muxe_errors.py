@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+The error dock: the records of ``fluxi.errors`` as a table and the traceback of the selected one
+"""
+try:
+    from PyQt4 import QtGui, QtCore
+except ImportError:
+    from PyQt5 import QtGui, QtCore
+import time
+from fluxi.muxe import MuxPolled
+from fluxi import errors
+
+class MuxErrors(MuxPolled):
+    """ One row per distinct error with its count, redrawn at most every ``refresh_interval`` seconds """
+    columns=["Count","Error","Message","Source","Last"]
+    refresh_interval=0.5
+    def __init__(self,id,fluxi):
+        super().__init__(id,fluxi)
+        self.type="Errors"
+        self.aggregator=errors.aggregator
+        self._records=[]
+        self._addBar([self._button("Clear",self.clear)])
+        splitter=QtGui.QSplitter(QtCore.Qt.Vertical)
+        self.table=self._makeTable(self.columns)
+        self.table.setSelectionBehavior(QtGui.QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QtGui.QAbstractItemView.SingleSelection)
+        self.table.itemSelectionChanged.connect(self._show_traceback)
+        splitter.addWidget(self.table)
+        self.details=QtGui.QPlainTextEdit()
+        self.details.setReadOnly(True)
+        fnt=QtGui.QFont("MonospaceFont",8)
+        fnt.setStyleHint(QtGui.QFont.TypeWriter)
+        self.details.setFont(fnt)
+        splitter.addWidget(self.details)
+        self.box.addWidget(splitter)
+        self._startPolling()
+
+    def _version(self):
+        return self.aggregator.version
+
+    def clear(self):
+        self.aggregator.clear()
+        self._requestRedraw()
+        return self
+
+    @property
+    def v(self):
+        return self.aggregator.snapshot()
+
+    def draw(self):
+        self._drawn=self.aggregator.version
+        self._records=self.aggregator.records()
+        rows=[["%d"%r.count,r.type,r.message,", ".join(sorted(r.sources)),time.strftime("%H:%M:%S",time.localtime(r.last))]
+              for r in self._records]
+        self._fillTable(self.table,rows,right=(0,))
+        self._show_traceback()
+
+    def _show_traceback(self):
+        rows=self.table.selectionModel().selectedRows()
+        i=rows[0].row() if rows else 0
+        self.details.setPlainText(self._records[i].traceback if i<len(self._records) else "")
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+The log dock: a virtual table over the ring of a ``LogPipe``
+
+The model only holds the sequence numbers of the records that pass the
+filters, the view asks for the text of the visible rows. New records are
+picked up by a timer, so logging never touches the GUI thread.
+"""
+try:
+    from PyQt4 import QtGui, QtCore
+    from PyQt4.QtCore import Qt
+except ImportError:
+    from PyQt5 import QtGui, QtCore
+    from PyQt5.QtCore import Qt
+import time
+from fluxi.muxe import MuxPolled
+from fluxi.logpipe import LEVELS,level_number
+
+_colors={"error":QtGui.QColor(200,0,0),"warning":QtGui.QColor(200,120,0),"debug":QtGui.QColor(120,120,120)}
+
+class LogModel(QtCore.QAbstractTableModel):
+    columns=["Time","Level","Source","Message","Count"]
+    def __init__(self,pipe):
+        super().__init__()
+        self.pipe=pipe
+        self.rows=[]
+        self.scanned=0 # records before this sequence number were filtered already
+        self.sources=set()
+        self.min_level=0
+        self.source=None
+        self.text=""
+
+    def rowCount(self,parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self,parent=QtCore.QModelIndex()):
+        return len(self.columns)
+
+    def headerData(self,section,orientation,role=Qt.DisplayRole):
+        if role==Qt.DisplayRole and orientation==Qt.Horizontal:
+            return self.columns[section]
+        return None
+
+    def data(self,index,role=Qt.DisplayRole):
+        r=self.pipe.get(self.rows[index.row()])
+        if r is None:
+            return None
+        c=index.column()
+        if role==Qt.DisplayRole:
+            if c==0:
+                return time.strftime("%H:%M:%S",time.localtime(r.time))+"%.3f"%(r.time%1)[1:]
+            return (r.level,r.source,r.message,"%d"%r.count if r.count>1 else "")[c-1]
+        if role==Qt.ForegroundRole:
+            return _colors.get(r.level)
+        if role==Qt.ToolTipRole and c==3:
+            return r.message
+        return None
+
+    def _accepts(self,r):
+        return level_number(r.level)>=self.min_level and (self.source is None or r.source==self.source) \
+            and (not self.text or self.text in r.message)
+
+    def setFilter(self,min_level=0,source=None,text=""):
+        self.beginResetModel()
+        self.min_level,self.source,self.text=min_level,source,text
+        self.rows=[]
+        self.scanned=self.pipe.first
+        self.update(signals=False)
+        self.endResetModel()
+
+    def update(self,signals=True):
+        """ drop the rows that were overwritten and add the new ones, returns the new sources """
+        first=self.pipe.first
+        n=0
+        while n<len(self.rows) and self.rows[n]<first:
+            n+=1
+        if n:
+            if signals:
+                self.beginRemoveRows(QtCore.QModelIndex(),0,n-1)
+            del self.rows[:n]
+            if signals:
+                self.endRemoveRows()
+        records=self.pipe.records(self.scanned)
+        new_sources=set()
+        new=[]
+        for r in records:
+            if r.source not in self.sources:
+                self.sources.add(r.source)
+                new_sources.add(r.source)
+            if self._accepts(r):
+                new.append(r.seq)
+        if records:
+            self.scanned=records[-1].seq+1
+        if self.rows:
+            #the count of the last record increases when a message is repeated
+            i=len(self.rows)-1
+            self.dataChanged.emit(self.index(i,0),self.index(i,len(self.columns)-1))
+        if new:
+            if signals:
+                self.beginInsertRows(QtCore.QModelIndex(),len(self.rows),len(self.rows)+len(new)-1)
+            self.rows.extend(new)
+            if signals:
+                self.endInsertRows()
+        return new_sources
+
+class MuxLog(MuxPolled):
+    """ The messages of ``Fluxi.log``, filtered by level, source and text, repeated messages are counted """
+    refresh_interval=0.25
+    def __init__(self,id,fluxi):
+        super().__init__(id,fluxi)
+        self.type="Log"
+        self.pipe=fluxi.logpipe
+        self.model=LogModel(self.pipe)
+        self.level=QtGui.QComboBox()
+        self.level.addItems(sorted(LEVELS,key=LEVELS.get))
+        self.source=QtGui.QComboBox()
+        self.source.addItem("all sources")
+        self.text=QtGui.QLineEdit()
+        self.text.setPlaceholderText("filter")
+        for widget in (self.level,self.source):
+            widget.currentIndexChanged.connect(self._filter_changed)
+        self.text.textChanged.connect(self._filter_changed)
+        self._addBar([self.level,self.source,self.text],stretch=False)
+        self.view=v=QtGui.QTableView()
+        v.setModel(self.model)
+        v.verticalHeader().hide()
+        v.verticalHeader().setDefaultSectionSize(v.fontMetrics().height()+4)
+        v.horizontalHeader().setStretchLastSection(False)
+        v.setWordWrap(False)
+        v.setSelectionBehavior(QtGui.QAbstractItemView.SelectRows)
+        v.setColumnWidth(0,90)
+        v.setColumnWidth(1,55)
+        v.setColumnWidth(3,400)
+        self.box.addWidget(v)
+        self._filter_changed()
+        self._startPolling()
+
+    def _version(self):
+        return self.pipe.version
+
+    def _filter_changed(self,*args):
+        source=self.source.currentText() if self.source.currentIndex()>0 else None
+        self.model.setFilter(LEVELS[self.level.currentText()],source,self.text.text())
+        self._drawn=self.pipe.version
+        self.view.scrollToBottom()
+
+    def setFilter(self,level="debug",source=None,text=""):
+        """ show only the messages with at least ``level``, from ``source`` and containing ``text`` """
+        self.level.setCurrentIndex(self.level.findText(level))
+        self.source.setCurrentIndex(max(0,self.source.findText(source)) if source else 0)
+        self.text.setText(text)
+        return self
+
+    @property
+    def v(self):
+        return [self.pipe.get(seq) for seq in self.model.rows]
+
+    def draw(self):
+        self._drawn=self.pipe.version
+        sb=self.view.verticalScrollBar()
+        at_bottom=sb.value()>=sb.maximum()
+        for source in sorted(map(str,self.model.update())):
+            self.source.addItem(source)
+        if at_bottom:
+            self.view.scrollToBottom()
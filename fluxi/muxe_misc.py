@@ -14,10 +14,13 @@ import numpy as np
 import pyqtgraph as pg
 import time,sys
 from fluxi.muxe import MuxBase
+from fluxi.muxe_base import MuxLoop
+from fluxi import perf
 #%%
-class MuxSlowLoop(MuxBase):
+class MuxSlowLoop(MuxLoop):
     """A slow loop executed in the main thread. For anything <100Hz that takes less then approx 50ms"""
     minpause=0.001
+    shutdown_timeout=0.
     def __init__(self,id,fluxi):        
         super().__init__(id,fluxi)
         self.passes=0
@@ -55,17 +58,20 @@ class MuxSlowLoop(MuxBase):
         self.passes+=1
         t0=time.time()
         try:
-            if self.action!=None:
-                stop=self.action(self)
+            if self._action is not None:
+                stop=self._action(self)
             else:
                 stop=False
-        except:
-            self.stop()
-            raise
+        except Exception:
+            self._reportError()
+            self.errors+=1
+            stop=self._too_many_errors()
 #        finally:
 #            if self.continueonerror
 #TODO:            
         self.timing=time.time()-t0
+        if perf.enabled:
+            perf.record("loop "+self.id,self.timing)
         self.timings=np.roll(self.timings, -1)
         self.timings[-1]=self.timing
         pause=max(self._pause,self.timing,self.minpause)
@@ -78,6 +84,7 @@ class MuxSlowLoop(MuxBase):
     def start(self):
         if not self.running:
             self.running=True
+            self.errors=0
             if self._control:
                 self._control.v=True
             self.loop()
@@ -89,11 +96,17 @@ class MuxSlowLoop(MuxBase):
             if self._control:
                 self._control.v=False
         return self
+    def request_stop(self):
+        self.stop()
+        self.timer.stop()
+    def join(self,timeout=None):
+        #runs in the main thread, so it is never in the middle of a pass here
+        return True
     def delete(self):
         if not hasattr(self,"alreadydeleted"):
             self.control=False
             self.control_pause=False
-            self.stop()
+            self.request_stop()
             self.alreadydeleted=True
 
     def getTiming(self):
@@ -147,7 +160,9 @@ class MuxSlowLoop(MuxBase):
 
     
              
-import weakref
+import weakref,threading
+#threads that did not stop in time, kept so Qt does not destroy them while they run
+_abandoned=[]
 class LoopInThread(QtCore.QThread):
     #GIL and threads: http://stackoverflow.com/questions/1595649/threading-in-a-pyqt-application-use-qt-threads-or-python-threads
     guineedsupdate = QtCore.pyqtSignal(object)
@@ -164,6 +179,7 @@ class LoopInThread(QtCore.QThread):
         self._timer=time.clock#default_timer#perf_counter
         self.loopmux_ref=weakref.ref(loopmux)
         self.action=None
+        self.wake=threading.Event() # interrupts the pause when the loop is stopped
     def run(self):        
         #print "starting"
         while self.running:
@@ -172,19 +188,22 @@ class LoopInThread(QtCore.QThread):
             try:
                 if self.action is not None:
                     self.action(self.loopmux_ref())
-            except Exception as e:
-                print("except")
-                self.died.emit(e, sys.exc_info())
-                self.exit()
-                raise
+            except Exception:
+                loop=self.loopmux_ref()
+                loop._reportError()
+                loop.errors+=1
+                if loop._too_many_errors():
+                    loop.stop()
             #finally:
             #     TODO:if self.continueonerror
             self.timing=self._timer()-t0
+            if perf.enabled:
+                perf.record("loop "+self.loopmux_ref().id,self.timing)
             self.timings[self.passes%self.timing_length]=self.timing
 #            self.timings=np.roll(self.timings, -1)
 #            self.timings[-1]=self.timing
-            if self.pause!=0:
-                time.sleep(self.pause)        
+            if self.pause!=0 and self.running:
+                self.wake.wait(self.pause)
         self.exit()
 #    def run(self):
 #        loop = 0
@@ -205,15 +224,16 @@ class LoopInThread(QtCore.QThread):
         
 
              
-class MuxBgLoop(MuxBase, QObject):    
+class MuxBgLoop(MuxLoop, QObject):    
     minpause=0.00001
+    shutdown_timeout=2. # how long closing waits for the current pass to end
+    _shutdown=None # set by stop_loops: True if the loop ended in time
     #http://qt-project.org/forums/viewthread/6567
     def __init__(self,id,fluxi):
         super().__init__(id,fluxi)  
         
         self.thread=LoopInThread(self)
         self.thread.finished.connect(self.stop)
-        self.thread.died.connect(self.died)            
 
         self.running=False
 #        self.a=action        
@@ -238,17 +258,12 @@ class MuxBgLoop(MuxBase, QObject):
 #            self.setControl(control)
         
         
-    @Slot(object,object)
-    def died(self,exception,exc_info):
-        #TODO: proper showing of errors
-        #self.getfluxi().showError(exception)
-        raise exc_info[0](exc_info[1]).with_traceback(exc_info[2])
-        #raise exc_info[0],exc_info[1],exc_info[2]
-            
     def start(self):
         #print ("starting",self.name)
         if not self.running:
             self.running=True               
+            self.errors=0
+            self.thread.wake.clear()
             if self._control:
                 self._control.v=True
             self.thread.start()      
@@ -276,13 +291,24 @@ class MuxBgLoop(MuxBase, QObject):
         self.thread.action=action
         self.action=action  
 
+    def request_stop(self):
+        self.stop()
+        self.thread.wake.set()
+    def join(self,timeout=None):
+        """ wait until the current pass has ended, True if it did within ``timeout`` seconds """
+        if timeout is None:
+            return self.thread.wait()
+        return self.thread.wait(int(timeout*1000))
     def delete(self):
         if not hasattr(self,"alreadydeleted"):
             self.control=False
             self.control_pause=False
-            self.stop()
-            self.thread.quit()
-            self.thread.wait()        
+            ended=self._shutdown
+            if ended is None:
+                self.request_stop()
+                ended=self.join(self.shutdown_timeout)
+            if not ended:
+                _abandoned.append(self.thread)
             self.alreadydeleted=True
 
     def getTiming(self):
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+The performance dock: the timings of ``fluxi.perf`` as a table
+"""
+try:
+    from PyQt4 import QtGui
+except ImportError:
+    from PyQt5 import QtGui
+from fluxi.muxe import MuxPolled
+from fluxi import perf
+
+class MuxPerf(MuxPolled):
+    """ A table of the instrumented draws, actions, loops and device calls, sorted by total time """
+    columns=["Site","Count","Total [ms]","p50 [ms]","p95 [ms]","Max [ms]"]
+    refresh_interval=1.
+    def __init__(self,id,fluxi):
+        super().__init__(id,fluxi)
+        self.type="Performance"
+        self.enabled=QtGui.QCheckBox("Enabled")
+        self.enabled.setChecked(perf.enabled)
+        self.enabled.toggled.connect(perf.enable)
+        self._addBar([self.enabled,self._button("Reset",self._reset),self._button("Export JSON",self._export)])
+        self.table=self._makeTable(self.columns)
+        self.box.addWidget(self.table)
+        self._startPolling()
+
+    def _reset(self):
+        perf.reset()
+        self._requestRedraw()
+
+    def _export(self):
+        filename=QtGui.QFileDialog.getSaveFileName(self.mainwidget,"Export timings",self.getfluxi().namespace+".perf.json","JSON (*.json)")
+        if isinstance(filename,tuple): #PyQt5
+            filename=filename[0]
+        if filename:
+            self.export(filename)
+
+    def export(self,filename):
+        """ write the timings of all sites to a JSON file """
+        perf.export_json(filename)
+        return self
+
+    @property
+    def v(self):
+        return perf.snapshot()
+
+    def draw(self):
+        rows=[[r["site"],"%d"%r["count"]]+["%.3f"%(r[k]*1e3) for k in ("total","p50","p95","max")] for r in perf.snapshot()]
+        self._fillTable(self.table,rows,right=range(1,len(self.columns)))
@@ -0,0 +1,413 @@
+# -*- coding: utf-8 -*-
+"""
+A loop that runs its action in a worker process
+
+The action gets a ``ProcessLoopContext`` instead of the loop mux and
+sends its results with ``ctx.set(id, value)`` and ``ctx.add(id, values)``.
+Large arrays are written into slots of a shared memory ring, everything else
+is collected during a pass and sent as one message. A thread of the GUI
+process receives the results and sets the muxe.
+
+    def fit(ctx):
+        data=measure()
+        ctx.set("im:Spectrum",data)
+        ctx.add("c:Peak",fit_peak(data,ctx.get("f:Fit/threshold")))
+
+    fl.g("ploop:Fitting").share("f:Fit/threshold").setControl("Fit/Run").a=fit
+"""
+import multiprocessing as mp
+import queue,threading,time,traceback
+import numpy as np
+from fluxi.muxe import MuxBaseParam
+from fluxi.muxe_base import MuxLoop
+from fluxi import perf
+
+try:
+    from multiprocessing import shared_memory
+except ImportError: #before python 3.8
+    shared_memory=None
+
+def _attach(name):
+    """ open the shared memory of the GUI process, which also removes it again """
+    try:
+        return shared_memory.SharedMemory(name=name,track=False)
+    except TypeError: #before python 3.13, the worker shares the resource tracker of the GUI process
+        return shared_memory.SharedMemory(name=name)
+
+class ProcessLoopContext(object):
+    """ what the action of a process loop gets instead of the loop mux """
+    def __init__(self,ctl,inq,outq,free,shm,slot_bytes,min_shared):
+        self._ctl=ctl
+        self._inq=inq
+        self._outq=outq
+        self._free=free
+        self._shm=shm
+        self._slot_bytes=slot_bytes
+        self._min_shared=min_shared
+        self._pending=[]
+        self.values={}
+        self.passes=0
+
+    @property
+    def pause(self):
+        return self._ctl["pause"].value
+
+    def get(self,id,default=None):
+        """ the value of a parameter that was shared with ``loop.share(id)`` """
+        return self.values.get(id,default)
+
+    def set(self,id,value):
+        """ set a parameter, image (``im:``) or any other mux in the GUI process """
+        if isinstance(value,np.ndarray) and not value.dtype.hasobject and self._shm is not None \
+                and self._min_shared<=value.nbytes<=self._slot_bytes:
+            slot=self._slot()
+            if slot is not None:
+                offset=slot*self._slot_bytes
+                np.ndarray(value.shape,value.dtype,buffer=self._shm.buf,offset=offset)[...]=value
+                self._pending.append(("arr",id,slot,value.shape,value.dtype.str))
+                return self
+        self._pending.append(("set",id,value))
+        return self
+
+    def add(self,id,values):
+        """ add a point to a chart (``c:``) """
+        self._pending.append(("add",id,values))
+        return self
+
+    def nth(self,n):
+        """ returns true every nth pass """
+        return self.passes%n==0
+
+    def _slot(self):
+        try:
+            return self._free.get_nowait()
+        except queue.Empty:
+            #the GUI frees the slots only after it got the descriptions
+            self._flush()
+        while not self._ctl["quit"].is_set():
+            try:
+                return self._free.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return None
+
+    def _read_inbound(self):
+        try:
+            while True:
+                kind,id,value=self._inq.get_nowait()
+                self.values[id]=value
+        except queue.Empty:
+            pass
+
+    def _flush(self,*extra):
+        batch=self._pending+list(extra)
+        self._pending=[]
+        if batch:
+            self._outq.put(batch)
+
+def _worker(action,ctl,inq,outq,free,shm_name,slot_bytes,min_shared):
+    shm=_attach(shm_name) if shm_name else None
+    ctx=ProcessLoopContext(ctl,inq,outq,free,shm,slot_bytes,min_shared)
+    try:
+        while not ctl["quit"].is_set():
+            if not ctl["run"].wait(0.1):
+                continue
+            ctx._read_inbound()
+            ctx.passes+=1
+            t0=time.perf_counter()
+            try:
+                action(ctx)
+            except BaseException:
+                ctx._flush(("error",traceback.format_exc()))
+                raise SystemExit(1)
+            ctx._flush(("pass",ctx.passes,time.perf_counter()-t0))
+            pause=ctl["pause"].value
+            if pause>0:
+                ctl["quit"].wait(pause)
+    finally:
+        outq.close()
+        outq.join_thread()
+        if shm is not None:
+            shm.close()
+
+class MuxProcessLoop(MuxLoop):
+    """
+    A loop like ``loop:`` whose action runs in a separate process, for CPU heavy work
+
+    The action has to be picklable if processes are spawned instead of
+    forked (Windows, macOS). If the process dies, it is restarted after
+    ``restart_delay`` seconds as long as the loop is running and had less
+    than ``max_errors`` errors.
+    """
+    slots=4
+    slot_bytes=8*1024*1024
+    min_shared=64*1024 # smaller arrays are sent with the other values
+    restart_delay=1.
+    max_errors=None # the loop stops after this many errors, None to always restart
+    shutdown_timeout=2. # how long closing waits for the process before it is terminated
+    share_interval=0.05 # the shared values are checked for changes at least this often (s)
+    _shutdown=None # set by stop_loops: True if the process ended in time
+    def __init__(self,id,fluxi):
+        super().__init__(id,fluxi)
+        self.type="ProcessLoop"
+        self.action=None
+        self.restarts=0
+        self.passes=0
+        self.timings=np.full((30,),np.nan)
+        self._control,self._control_pause=None,None
+        self._shared={} # id -> value that was sent to the worker
+        self._shared_muxe={} # id -> (mux, version of the value that was sent)
+        self._spawn_lock=threading.RLock()
+        self._proc_action=None # the action of the running process
+        self._mp=mp.get_context()
+        self._ctl={"run":self._mp.Event(),"quit":self._mp.Event(),"pause":self._mp.Value("d",1.,lock=False)}
+        self._proc=None
+        self._shm=None
+        self._queues=None
+        self._closing=False
+        self._receiver=threading.Thread(target=self._receive,name="fluxi-ploop "+self.name,daemon=True)
+        self._receiver.start()
+
+    @property
+    def a(self):
+        return self.action
+    @a.setter
+    def a(self,action):
+        self.action=action
+        #a running process has the old action, replace it without blocking the caller
+        threading.Thread(target=self._respawn,name="fluxi-ploop respawn "+self.name,daemon=True).start()
+        
+    def _respawn(self):
+        with self._spawn_lock:
+            if self._proc is not None and self._proc_action is self.action:
+                return
+            self._terminate()
+            if self.running and not self._closing:
+                self._spawn()
+
+    @property
+    def running(self):
+        return self._ctl["run"].is_set()
+
+    def start(self):
+        if not self.running:
+            self._ctl["run"].set()
+            self.errors=0
+            if self._control:
+                self._control.v=True
+            with self._spawn_lock:
+                if self._proc is None or not self._proc.is_alive():
+                    self._spawn()
+        return self
+
+    def stop(self):
+        if self.running:
+            self._ctl["run"].clear()
+            if self._control:
+                self._control.v=False
+        return self
+
+    def _spawn(self):
+        if self.action is None:
+            return
+        self._proc_action=self.action
+        if self._shm is None and shared_memory is not None and self.slots>0:
+            self._shm=shared_memory.SharedMemory(create=True,size=self.slots*self.slot_bytes)
+        inq,outq,free=self._mp.Queue(),self._mp.Queue(),self._mp.Queue()
+        for i in range(self.slots if self._shm is not None else 0):
+            free.put(i)
+        for id,value in self._shared.items():
+            inq.put(("param",id,value))
+        self._ctl["quit"].clear()
+        self._proc=self._mp.Process(target=_worker,name="fluxi-ploop "+self.name,daemon=True,
+            args=(self.action,self._ctl,inq,outq,free,self._shm.name if self._shm is not None else None,self.slot_bytes,self.min_shared))
+        self._queues=(inq,outq,free)
+        self._proc.start()
+
+    def _terminate(self,timeout=2.):
+        with self._spawn_lock:
+            proc=self._proc
+            if proc is None:
+                return
+            self._ctl["quit"].set()
+            proc.join(timeout)
+            if proc.is_alive():
+                proc.terminate()
+                proc.join(timeout)
+            self._proc=None
+
+    def share(self,*ids):
+        """ 
+        make the values of parameters available to the action with
+        ``ctx.get(id)``. Every new value is sent, also the ones set in code,
+        the receiver thread checks the versions of the values.
+        """
+        for id in ids:
+            mux=self.getfluxi().g(id)
+            version,value=mux._cell.read()
+            self._shared_muxe[id]=(mux,version)
+            self._send_param(id,value)
+        return self
+
+    def _send_param(self,id,value):
+        self._shared[id]=value
+        if self._queues is not None:
+            self._queues[0].put(("param",id,value))
+
+    def _send_changed(self):
+        """ send the shared values that were published since they were sent last """
+        for id,(mux,sent) in list(self._shared_muxe.items()):
+            version,value=mux._cell.read()
+            if version!=sent:
+                self._shared_muxe[id]=(mux,version)
+                self._send_param(id,value)
+
+    def _receive(self):
+        """ the thread that sets the results and restarts the process when it died """
+        while not self._closing:
+            if self._queues is None:
+                time.sleep(0.1)
+                continue
+            inq,outq,free=self._queues
+            self._send_changed()
+            try:
+                batch=outq.get(timeout=self.share_interval)
+            except queue.Empty:
+                proc=self._proc
+                if proc is not None and not proc.is_alive() and self.running and not self._closing:
+                    self.restarts+=1
+                    time.sleep(self.restart_delay)
+                    with self._spawn_lock:
+                        if self.running and not self._closing and self._proc is proc:
+                            self._spawn()
+                continue
+            except (EOFError,OSError):
+                continue
+            try:
+                self._apply(batch,free)
+            except Exception:
+                traceback.print_exc()
+
+    def _apply(self,batch,free):
+        fl=self.getfluxi()
+        for msg in batch:
+            kind=msg[0]
+            if kind=="arr":
+                id,slot,shape,dtype=msg[1:]
+                value=np.ndarray(shape,np.dtype(dtype),buffer=self._shm.buf,offset=slot*self.slot_bytes).copy()
+                free.put(slot)
+                self._deliver(fl,id,value)
+            elif kind=="set":
+                self._deliver(fl,msg[1],msg[2])
+            elif kind=="add":
+                fl.g(msg[1]).add(msg[2])
+            elif kind=="pass":
+                self.passes=msg[1]
+                self.timings[self.passes%len(self.timings)]=msg[2]
+                if perf.enabled:
+                    perf.record("loop "+self.id,msg[2])
+            elif kind=="error":
+                self._report_error(fl,msg[1])
+
+    def _report_error(self,fl,text):
+        """ add the formatted traceback of the worker to the error dock and stop after ``max_errors`` """
+        lines=text.rstrip().split("\n")
+        type_,_,message=lines[-1].partition(":")
+        frames=tuple(l.strip() for l in lines if l.lstrip().startswith("File "))
+        record=fl.errors.add((type_,)+frames,type_,message.strip(),text,self.id)
+        if record.count==1:
+            fl.call_in_main_thread(fl.Errors)
+        self.errors+=1
+        if self._too_many_errors():
+            self.stop()
+
+    @staticmethod
+    def _deliver(fl,id,value):
+        mux=fl.g(id)
+        if isinstance(mux,MuxBaseParam):
+            mux.set(value)
+        else:
+            mux.v=value
+
+    def request_stop(self):
+        self.stop()
+        self._closing=True
+        self._ctl["quit"].set()
+
+    def join(self,timeout=None):
+        """ wait for the process to end, True if it did within ``timeout`` seconds, else it is terminated """
+        deadline=None if timeout is None else time.monotonic()+timeout
+        proc=self._proc
+        ended=True
+        if proc is not None:
+            proc.join(timeout)
+            ended=not proc.is_alive()
+            if not ended:
+                #the deadline has passed, do not wait for it any longer
+                proc.terminate()
+                proc.join(0)
+            self._proc=None
+        self._receiver.join(None if deadline is None else max(0.,deadline-time.monotonic()))
+        return ended
+
+    def delete(self):
+        if not hasattr(self,"alreadydeleted"):
+            self.alreadydeleted=True
+            if self._shutdown is None:
+                #stop_loops has already waited for it and terminated it if necessary
+                self.request_stop()
+                self.join(self.shutdown_timeout)
+            if self._shm is not None:
+                self._shm.close()
+                self._shm.unlink()
+                self._shm=None
+
+    def getTiming(self):
+        return np.nanmean(self.timings)
+
+    def setControl(self, control,setControlToCurrentState=False):
+        if self._control:
+            self._control.p.sigValueChanged.disconnect(self._on_control_change)
+        if isinstance(control,str):
+            control=self.getfluxi().B(control)
+        self._control=control
+        if control:
+            if setControlToCurrentState:
+                self._control.v=self.running
+            else:
+                if self._control.v:
+                    self.start()
+                else:
+                    self.stop()
+            self._control.p.sigValueChanged.connect(self._on_control_change)
+        return self
+
+    def _on_control_change(self,p,v):
+        if v:
+            self.start()
+        else:
+            self.stop()
+
+    def setControlPause(self, control):
+        if self._control_pause:
+            self._control_pause.p.sigValueChanged.disconnect(self._on_control_pause_change)
+        if isinstance(control,str):
+            control=self.getfluxi().P(control)
+        self._control_pause=control
+        if control:
+            control.p.sigValueChanged.connect(self._on_control_pause_change)
+            self.setPause(control.v)
+        return self
+
+    def _on_control_pause_change(self,p,v):
+        self.setPause(v)
+
+    @property
+    def pause(self):
+        return self._ctl["pause"].value
+
+    def setPause(self,pause):
+        self._ctl["pause"].value=pause
+        if self._control_pause:
+            self._control_pause.v=pause
+        return self
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Subscriptions to the changes of a mux, throttled and coalesced per subscriber
+"""
+try:
+    from PyQt4 import QtCore
+except ImportError:
+    from PyQt5 import QtCore
+import threading,time,weakref
+from concurrent.futures import ThreadPoolExecutor
+from fluxi.dispatch import MainThreadDispatcher
+
+_pool=None
+_pool_lock=threading.Lock()
+
+def worker_pool():
+    """ the thread pool shared by all subscriptions with ``thread="worker"`` """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool=ThreadPoolExecutor(max_workers=4,thread_name_prefix="fluxi-subscriber")
+        return _pool
+
+class Subscription(object):
+    """
+    A callback ``callback(mux, value)`` that is called for the changes of a mux
+
+    The changes are called at most ``max_rate`` times per second. With
+    ``mode="latest"`` the changes in between are dropped and only the newest
+    value is delivered, with ``mode="all"`` every value is delivered, but
+    in bursts at the same rate. ``thread="gui"`` calls the callback in the
+    GUI thread, ``thread="worker"`` in a thread pool. A subscription never
+    runs twice at the same time, so its calls keep the order of the changes.
+    """
+    def __init__(self,mux,callback,max_rate=None,mode="latest",thread="gui"):
+        if mode not in ("latest","all"):
+            raise ValueError("mode has to be 'latest' or 'all', not %r"%mode)
+        if thread not in ("gui","worker"):
+            raise ValueError("thread has to be 'gui' or 'worker', not %r"%thread)
+        self.mux=weakref.ref(mux)
+        self.callback=callback
+        self.interval=1./max_rate if max_rate else 0.
+        self.mode=mode
+        self.thread=thread
+        self.active=True
+        self.calls=0
+        self.dropped=0
+        self._pending=[]
+        self._scheduled=False
+        self._last=0.
+        self._lock=threading.Lock()
+
+    def notify(self,value):
+        """ called for every change, from any thread """
+        if not self.active:
+            return
+        with self._lock:
+            if self.mode=="latest":
+                self.dropped+=len(self._pending)
+                self._pending[:]=[value]
+            else:
+                self._pending.append(value)
+            if self._scheduled:
+                return
+            self._scheduled=True
+        self._schedule()
+
+    def cancel(self):
+        self.active=False
+        mux=self.mux()
+        if mux is not None:
+            mux.unsubscribe(self)
+
+    def _schedule(self):
+        delay=self._last+self.interval-time.monotonic()
+        if delay<=0:
+            self._dispatch()
+        else:
+            #the timer has to be started in the GUI thread
+            MainThreadDispatcher.instance().submit(QtCore.QTimer.singleShot,int(delay*1000)+1,self._dispatch)
+
+    def _dispatch(self):
+        if self.thread=="worker":
+            worker_pool().submit(self._run)
+        else:
+            MainThreadDispatcher.instance().submit(self._run)
+
+    def _run(self):
+        with self._lock:
+            values,self._pending=self._pending,[]
+            self._last=time.monotonic()
+        mux=self.mux()
+        try:
+            if mux is not None and self.active:
+                for value in values:
+                    self.calls+=1
+                    self.callback(mux,value)
+        except Exception:
+            if mux is not None:
+                mux._reportError()
+        finally:
+            with self._lock:
+                again=bool(self._pending) and self.active
+                self._scheduled=again
+            if again:
+                self._schedule()
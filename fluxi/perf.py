@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Low-overhead timing of the hot paths: draws, actions, loop passes and device calls
+
+The instrumented code checks the module attribute ``enabled`` before it
+reads the clock, so a disabled instrumentation costs one attribute lookup.
+It is read only once, profiling can be switched on in between::
+
+    t0=perf.clock() if perf.enabled else None
+    ...
+    if t0 is not None:
+        perf.record("draw "+mux.id,perf.clock()-t0)
+
+Every site keeps a count, the total and the maximum and a histogram with 10
+logarithmic buckets per decade, from which the percentiles are estimated.
+"""
+import json,math,threading,time
+
+enabled=False
+clock=time.perf_counter
+
+_MIN=1e-7 # lower edge of the first bucket in seconds
+_PER_DECADE=10
+_BUCKETS=100 # up to 1000 s
+
+_sites={}
+_lock=threading.Lock()
+
+def enable(on=True):
+    global enabled
+    enabled=bool(on)
+
+class Site(object):
+    """ the timings of one instrumented place """
+    __slots__=("name","count","total","max","buckets","_lock")
+    def __init__(self,name):
+        self.name=name
+        self.count=0
+        self.total=0.
+        self.max=0.
+        self.buckets=[0]*_BUCKETS
+        self._lock=threading.Lock()
+
+    def add(self,dt):
+        i=int(math.log10(dt/_MIN)*_PER_DECADE) if dt>_MIN else 0
+        with self._lock:
+            self.count+=1
+            self.total+=dt
+            if dt>self.max:
+                self.max=dt
+            self.buckets[min(i,_BUCKETS-1)]+=1
+
+    def percentile(self,q):
+        """ estimate of the q-th percentile (0-100), the center of its histogram bucket """
+        if not self.count:
+            return 0.
+        rank=q/100.*self.count
+        n=0
+        for i,c in enumerate(self.buckets):
+            n+=c
+            if n>=rank and c:
+                return min(_MIN*10**((i+0.5)/_PER_DECADE),self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "site":self.name,
+            "count":self.count,
+            "total":self.total,
+            "mean":self.total/self.count if self.count else 0.,
+            "p50":self.percentile(50),
+            "p95":self.percentile(95),
+            "max":self.max,
+        }
+
+def site(name):
+    try:
+        return _sites[name]
+    except KeyError:
+        with _lock:
+            return _sites.setdefault(name,Site(name))
+
+def record(name,dt):
+    site(name).add(dt)
+
+def reset():
+    with _lock:
+        _sites.clear()
+
+def snapshot():
+    """ the summaries of all sites, sorted by total time """
+    return sorted((s.summary() for s in list(_sites.values())),key=lambda s:-s["total"])
+
+def export_json(filename):
+    with open(filename,"w") as f:
+        json.dump({"time":time.time(),"sites":snapshot()},f,indent=1)
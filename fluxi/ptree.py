@@ -1,5 +1,11 @@
 # -*- coding: utf-8 -*-
 """
+The parameter tree
+
+The parameters are nodes of a ``QAbstractItemModel`` that keep their values
+themselves. A delegate creates an editor widget only for the row that is
+edited, so the costs of the tree depend on the visible rows and not on the
+number of parameters.
 """
 from __future__ import absolute_import, division, print_function, unicode_literals
 try:
@@ -14,311 +20,508 @@ except ImportError:
 #import pyqtgraph as pg
 #import time,sys
 from fluxi.muxe import MuxDocked#,only_from_main_thread
-from pyqtgraph.python2_3 import asUnicode  
+from pyqtgraph.python2_3 import asUnicode
+import contextlib,weakref
+
+class ParamRoot(object):
+    """ the invisible root of the model """
+    def __init__(self,model):
+        self.model=model
+        self.children=[]
+        self.parent=None
+        self._row=0
+
+class ParamModel(QtCore.QAbstractItemModel):
+    """ A model of Param nodes with a title column and a value column """
+    def __init__(self):
+        super().__init__()
+        self.root=ParamRoot(self)
+        self._view=lambda: None
+        self._bulk=0
+
+    def setView(self,view):
+        self._view=weakref.ref(view)
+
+    def view(self):
+        return self._view()
+
+    def indexOf(self,node,column=0):
+        if node is None or node is self.root:
+            return QtCore.QModelIndex()
+        return self.createIndex(node._row,column,node)
+
+    def node(self,index):
+        if not index.isValid():
+            return self.root
+        return index.internalPointer()
+
+    def index(self,row,column,parent=QtCore.QModelIndex()):
+        children=self.node(parent).children
+        if 0<=row<len(children) and 0<=column<2:
+            return self.createIndex(row,column,children[row])
+        return QtCore.QModelIndex()
+
+    def parent(self,index):
+        if not index.isValid():
+            return QtCore.QModelIndex()
+        return self.indexOf(index.internalPointer().parent)
+
+    def rowCount(self,parent=QtCore.QModelIndex()):
+        if parent.column()>0:
+            return 0
+        return len(self.node(parent).children)
+
+    def columnCount(self,parent=QtCore.QModelIndex()):
+        return 2
+
+    def data(self,index,role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        return index.internalPointer().data(index.column(),role)
+
+    def setData(self,index,value,role=Qt.EditRole):
+        if not index.isValid():
+            return False
+        return index.internalPointer().setData(index.column(),value,role)
+
+    def flags(self,index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return index.internalPointer().flags(index.column())
+
+    def insertParam(self,parent,node):
+        node.parent=parent
+        node._row=len(parent.children)
+        if self._bulk:
+            parent.children.append(node)
+            return
+        self.beginInsertRows(self.indexOf(parent),node._row,node._row)
+        parent.children.append(node)
+        self.endInsertRows()
+        node._restoreViewState()
+        if parent is not self.root and len(parent.children)==1:
+            parent._restoreViewState()
 
-class MyTree(QtGui.QTreeWidget):
+    def removeParam(self,node):
+        parent=node.parent
+        row=node._row
+        if not self._bulk:
+            self.beginRemoveRows(self.indexOf(parent),row,row)
+        del parent.children[row]
+        for i in range(row,len(parent.children)):
+            parent.children[i]._row=i
+        if not self._bulk:
+            self.endRemoveRows()
+        node.parent=None
+
+    def nodeChanged(self,node):
+        if not self._bulk:
+            self.dataChanged.emit(self.indexOf(node,0),self.indexOf(node,1))
+
+    @contextlib.contextmanager
+    def bulk(self):
+        """ add or remove many nodes with one model reset """
+        if self._bulk==0:
+            self.beginResetModel()
+        self._bulk+=1
+        try:
+            yield
+        finally:
+            self._bulk-=1
+            if self._bulk==0:
+                self.endResetModel()
+                self._restoreViewState(self.root)
+
+    def _restoreViewState(self,node):
+        """ spanned columns and expanded groups are lost with a reset """
+        stack=list(node.children)
+        while stack:
+            n=stack.pop()
+            n._restoreViewState()
+            stack.extend(n.children)
+
+class ParamDelegate(QtGui.QStyledItemDelegate):
+    """ creates the editors of the values and paints the buttons of actions """
+    def createEditor(self,parent,option,index):
+        node=index.internalPointer()
+        editor=node.createEditor(parent)
+        if editor is not None:
+            editor.installEventFilter(node)
+            sig=node.editorSignal(editor)
+            if sig is not None:
+                sig.connect(lambda *args: self.commitData.emit(editor))
+        return editor
+
+    def setEditorData(self,editor,index):
+        index.internalPointer().setEditorData(editor)
+
+    def setModelData(self,editor,model,index):
+        node=index.internalPointer()
+        node._setFromUi(node.editorValue(editor))
+
+    def updateEditorGeometry(self,editor,option,index):
+        editor.setGeometry(option.rect)
+
+    def paint(self,painter,option,index):
+        node=index.internalPointer()
+        if index.column()==0 and isinstance(node,ParamAction):
+            node.paintButton(painter,option)
+            return
+        super().paint(painter,option,index)
+
+    def editorEvent(self,event,model,option,index):
+        node=index.internalPointer()
+        #the button is painted in the first column only, clicks elsewhere are not for it
+        if (index.column()==0 and isinstance(node,ParamAction) and hasattr(event,"pos")
+                and option.rect.contains(event.pos())):
+            return node.buttonEvent(event)
+        return super().editorEvent(event,model,option,index)
+
+class MyTree(QtGui.QTreeView):
     def __init__(self):
-        QtGui.QTreeWidget.__init__(self)
+        QtGui.QTreeView.__init__(self)
         self.setHeaderHidden(True)
-        self.setColumnCount(2)
         self.setRootIsDecorated(False)
+        self.setUniformRowHeights(False)
         self.setVerticalScrollMode(self.ScrollPerPixel)
-        self.setHorizontalScrollMode(self.ScrollPerPixel) 
+        self.setHorizontalScrollMode(self.ScrollPerPixel)
         self.setAlternatingRowColors(True)
-        self.header().setResizeMode(QtGui.QHeaderView.ResizeToContents)        
+        self.setEditTriggers(QtGui.QAbstractItemView.AllEditTriggers)
+        self.model_=ParamModel()
+        self.setModel(self.model_)
+        self.model_.setView(self)
+        self.setItemDelegate(ParamDelegate(self))
+        self.header().setResizeMode(QtGui.QHeaderView.ResizeToContents)
+        #once for the tree instead of once for every spin box
+        self.setStyleSheet("""
+        SpinBox {
+            border: 0px none black;
+            border-radius: 0px;
+            background-color: transparent;
+            }
+
+
+        SpinBox:focus {
+            background-color: #fff;
+        }
+        """)
     def contextMenuEvent(self, ev):
-        item = self.currentItem()
-        if hasattr(item.getparam(), 'contextMenuEvent'):
-            item.getparam().contextMenuEvent(ev)
-            
-   
+        index=self.indexAt(ev.pos())
+        if index.isValid():
+            index.internalPointer().contextMenuEvent(ev)
+
+
 class MuxTree(MuxDocked):
     """ A (collapsable) list """
     def __init__(self,id,fluxi):
-        super().__init__(id,fluxi)   
+        super().__init__(id,fluxi)
         self.mainwidget=mw= MyTree()
         self.createDock(self.mainwidget)
-        self.root=mw.invisibleRootItem()
-        mw.itemChanged.connect(self._handleChanged)
-        mw.itemCollapsed.connect(self._handleExpanded)
-        mw.itemExpanded.connect(self._handleExpanded)
+        self.model=mw.model_
+        self.root=self.model.root
+        mw.collapsed.connect(self._handleExpanded)
+        mw.expanded.connect(self._handleExpanded)
         mw.setSortingEnabled(False)
         #mw.setDragDropMode(QtGui.QAbstractItemView.InternalMove)
-    def _handleExpanded(self, item):                
-        item.getparam().expanded=item.isExpanded()
-        
-    def _handleChanged(self, item, column):
-        pass
-#        if item.checkState(column) == QtCore.Qt.Checked:
-#            print "checked", item, item.text(column)
-#        if item.checkState(column) == QtCore.Qt.Unchecked:
-#            print "unchecked", item, item.text(column)
-    
-#tree.invisibleRootItem()
-import weakref
+
+    @contextlib.contextmanager
+    def bulk_update(self):
+        """ add many parameters with one model reset and without resizing the columns for each """
+        mw=self.mainwidget
+        sorting=mw.isSortingEnabled()
+        mw.setUpdatesEnabled(False)
+        mw.setSortingEnabled(False)
+        mw.header().setResizeMode(QtGui.QHeaderView.Interactive)
+        try:
+            with self.model.bulk():
+                yield
+        finally:
+            mw.header().setResizeMode(QtGui.QHeaderView.ResizeToContents)
+            mw.setSortingEnabled(sorting)
+            mw.setUpdatesEnabled(True)
+
+    def _handleExpanded(self, index):
+        node=index.internalPointer()
+        node.expanded=self.mainwidget.isExpanded(index)
+
 class Param(QtCore.QObject):
+    """
+    A node of the parameter tree that holds a value
+
+    ``setValue`` changes the value without emitting ``sigValueChanged``,
+    changes by the user emit it. Sub-classes define how the value is
+    displayed and which editor is used.
+    """
     sigValueChanged=QtCore.pyqtSignal(object,object)
-    sigContextMenu=QtCore.pyqtSignal(object)    
+    sigContextMenu=QtCore.pyqtSignal(object)
+    editable=True
+    spanned=False
     def __init__(self,parent,title,digits=3):
         super().__init__()
-        self.blockScroll=True        
-        self.sig=None
-        self.widget=None
+        self.blockScroll=True
         self.digits=digits
         self.title=title
-        #parent.addChild(self)
-        self.createTitle(title)
-        self.createWidget()
-        if self.sig:
-            self.sig.connect(self._action)
-        if self.widget:
-            self.widget.installEventFilter(self)
-
+        self.children=[]
+        self.parent=None
+        self._row=0
+        self.expanded=True
+        self._value=self.defaultValue()
         self.attachToTree(parent)
-        
+
     def attachToTree(self,parent):
-        #print(parent)
-        self.treeitem=QtGui.QTreeWidgetItem(parent)
-        self.treeitem.getparam=weakref.ref(self)
-        #self.treeitem.treeWidget().setItemWidget(self.treeitem, 0, self.label)
-        self.treeitem.setText(0, self.title)
-        self.treeitem.setFlags(self.treeitem.flags() ^ Qt.ItemIsDropEnabled)
-        self.treeitem.treeWidget().setItemWidget(self.treeitem, 1, self.widget)
-        
-        
+        self.model=parent.model
+        self.model.insertParam(parent,self)
+
+    def _restoreViewState(self):
+        view=self.model.view()
+        if view is None:
+            return
+        if self.spanned:
+            view.setFirstColumnSpanned(self._row,self.model.indexOf(self.parent),True)
+        if self.children or isinstance(self,ParamGroup):
+            view.setExpanded(self.model.indexOf(self),self.expanded)
+
+    def setExpanded(self,expanded):
+        self.expanded=expanded
+        self._restoreViewState()
+
+    def isVisible(self):
+        view=self.model.view()
+        return view is not None and view.isVisible()
+
+    def anchor(self):
+        """ the widget and the rectangle in it where this parameter is shown, e.g. for popups """
+        view=self.model.view()
+        return view.viewport(),view.visualRect(self.model.indexOf(self,1))
+
     def getTitle(self):
         return self.title
-        
+
+    def defaultValue(self):
+        return None
+
     def setValue(self,value):
-        if self.sig:
-            self.sig.disconnect(self._action)
-#        print ("setting Value")
-#        self.widget.blockSignals(True)
-        try:
-            self._setValue(value)
-        finally:
-#            self.widget.blockSignals(False)
-            if self.sig:
-                self.sig.connect(self._action)
-        
-    def _setValue(self,value):
-        self.widget.setValue(value)
+        self._value=self._convert(value)
+        self.model.nodeChanged(self)
+
     def getValue(self):
-        return self._getValue()
-        
-    def _getValue(self):
-        return self.widget.value()  
-    
-    @QtCore.pyqtSlot()
-    def _action(self):
-        #print (self.title,"changed to",self.getValue())
+        return self._value
+
+    def _convert(self,value):
+        return value
+
+    def _setFromUi(self,value):
+        """ a value entered by the user """
+        value=self._convert(value)
+        if value==self._value:
+            return
+        self._value=value
+        self.model.nodeChanged(self)
         self.sigValueChanged.emit(self, self.getValue())
-    def createTitle(self,title):
-#        self.labelwid=QtGui.QLabel(title)
-#        self.labelwid.setSizePolicy(QtGui.QSizePolicy.Minimum,QtGui.QSizePolicy.Minimum);
-#
-#        self.layout = QtGui.QHBoxLayout()        
-#        self.layout.addStretch()
-#        self.layout.addSpacing(0)
-#        self.layout.addWidget(self.labelwid)
-#        
-#        self.label = QtGui.QWidget()
-#        self.label.setLayout(self.layout)        
-        pass
-        
-         
-    def createWidget(self):
+
+    def displayText(self):
+        return asUnicode(self._value) if self._value is not None else ""
+
+    def data(self,column,role):
+        if role==Qt.DisplayRole:
+            if column==0:
+                return self.title
+            return self.displayText()
+        if role==Qt.EditRole and column==1:
+            return self._value
+        return None
+
+    def setData(self,column,value,role):
+        if column==1 and role==Qt.EditRole:
+            self._setFromUi(value)
+            return True
+        return False
+
+    def flags(self,column):
+        f=Qt.ItemIsEnabled|Qt.ItemIsSelectable
+        if column==1 and self.editable:
+            f|=Qt.ItemIsEditable
+        return f
+
+    def createEditor(self,parent):
+        return None
+    def editorSignal(self,editor):
+        """ the signal of the editor that commits the value while editing """
+        return None
+    def setEditorData(self,editor):
         pass
-    def contextMenuEvent(self,ev):      
+    def editorValue(self,editor):
+        return self._value
+
+    def contextMenuEvent(self,ev):
         self.sigContextMenu.emit(ev)
-        
+
     def remove(self):
-        del self.treeitem.getparam
-        #self.treeitem.takeChild(i)
         try:
-            par=self.treeitem.parent()
-            if not par:
-                par=self.treeitem.treeWidget().invisibleRootItem()
-            par.removeChild(self.treeitem)
+            self.model.removeParam(self)
         except:
             pass
-        del self.treeitem
-        
+
     def eventFilter(self,  obj,  event):
         if self.blockScroll and event.type()==QtCore.QEvent.Wheel:# and isinstance
             #print("event blocked")
-            return True           
-        return False 
+            return True
+        return False
 
 from  fluxi.widgets.SpinBox import SpinBox
 class ParamFloat(Param):
+    def defaultValue(self):
+        return 0.
 
-    def createWidget(self):        
-        self.widget=SpinBox(decimals=6)    
-        #self.widget.setFocusPolicy(QtCore.Qt.StrongFocus)
-        #registerEvent(self.widget)
-        self.sig=self.widget.sigValueChanged
-        
-        self.widget.setStyleSheet("""
-        SpinBox {
-            border: 0px none black;
-            border-radius: 0px;
-            background-color: transparent;
-            }
-            
-        
-        SpinBox:focus {
-            background-color: #fff;
-        }
-        """)        
-
-        
-        
-#class ParamTuple(Param):  
-#
-#        
-#    def attachToTree(self,parent):
-#        self.treeitem=QtGui.QTreeWidgetItem(parent)
-#        self.treeitem.getparam=self#weakref.ref(self)
-#        #self.treeitem.treeWidget().setItemWidget(self.treeitem, 0, self.label)
-#        self.treeitem.setText(0, self.title)
-#        self.treeitem.treeWidget().setItemWidget(self.treeitem, 1, self.widget)
-#        if self.sig:
-#            self.sig.connect(self._action)
-#        self.attachToTree(parent)
-#        
-#        for t in self.title:
-#            
-#    def createWidget(self):        
-#        self.widget=SpinBox()        
-#        self.sig=self.widget.sigValueChanged        
-#    def setValue(self,value):
-#        self.widget.blockSignals(True)
-#        try:
-#            self._setValue(value)
-#        finally:
-#            self.widget.blockSignals(False)        
-#    def _getValue(self):
-#        return self.widget.value()  
-    
+    def _convert(self,value):
+        return float(value)
+
+    def displayText(self):
+        return "%.6g"%self._value
+
+    def createEditor(self,parent):
+        return SpinBox(parent,decimals=6)
+    def editorSignal(self,editor):
+        return editor.sigValueChanged
+    def setEditorData(self,editor):
+        editor.setValue(self._value)
+    def editorValue(self,editor):
+        return editor.value()
 
 class ParamAction(Param):
-#    def createTitle(self,title):
-#        pass     
-    def createWidget(self):
-        self.layoutWidget = QtGui.QWidget()
-        self.layout = QtGui.QHBoxLayout()
-        
-        self.layoutWidget.setLayout(self.layout)
-        self.widget = QtGui.QPushButton(self.title)
-        #self.layout.addSpacing(100)
-        self.layout.setContentsMargins(0,0,0,0)#(left,top,right,bottom) 
-        self.layout.addWidget(self.widget)
-        self.layout.addStretch()
-        self.sig=self.widget.clicked
-        
-    def attachToTree(self,parent):
-        self.treeitem=QtGui.QTreeWidgetItem(parent)
-        self.treeitem.getparam=weakref.ref(self)
-        self.treeitem.setText(0, '')
-        self.treeitem.treeWidget().setFirstItemColumnSpanned(self.treeitem, True)
-        self.treeitem.treeWidget().setItemWidget(self.treeitem, 0, self.layoutWidget)
-        
+    """ a button, drawn by the delegate, that emits ``sigValueChanged`` when clicked """
+    editable=False
+    spanned=True
+    _pressed=False
+    def data(self,column,role):
+        if column==0 and role==Qt.SizeHintRole:
+            return QtCore.QSize(0,24)
+        return None
+
+    def paintButton(self,painter,option):
+        opt=QtGui.QStyleOptionButton()
+        width=option.fontMetrics.width(self.title)+20
+        opt.rect=QtCore.QRect(option.rect.left()+5,option.rect.top()+1,width,option.rect.height()-2)
+        opt.text=self.title
+        opt.state=QtGui.QStyle.State_Enabled|(QtGui.QStyle.State_Sunken if self._pressed else QtGui.QStyle.State_Raised)
+        QtGui.QApplication.style().drawControl(QtGui.QStyle.CE_PushButton,opt,painter)
+
+    def buttonEvent(self,event):
+        if event.type()==QtCore.QEvent.MouseButtonPress:
+            self._pressed=True
+        elif event.type()==QtCore.QEvent.MouseButtonRelease and self._pressed:
+            self._pressed=False
+            self.sigValueChanged.emit(self, self.getValue())
+        else:
+            return False
+        self.model.nodeChanged(self)
+        return True
+
     def setValue(self,value):
         pass
     def getValue(self):
         pass
-    
 
 
-class ParamInt(Param):     
-    def createWidget(self):        
-        self.widget=SpinBox(dec=False,minStep=1.0,step=1.0,decimals=6)
-        self.sig=self.widget.sigValueChanged
+class ParamInt(Param):
+    def defaultValue(self):
+        return 0
 
-        self.widget.setStyleSheet("""
-        SpinBox {
-            border: 0px none black;
-            border-radius: 0px;
-            background-color: transparent;
-            }
-            
-        
-        SpinBox:focus {
-            background-color: #fff;
-        }
-        """)
-        
-    def _setValue(self,value):
-        self.widget.setValue(int(value))
-    def _getValue(self):
-        return int(self.widget.value())
-        
-class ParamDisplay(Param):     
-    def attachToTree(self,parent):
-        self.treeitem=QtGui.QTreeWidgetItem(parent)
-        self.treeitem.getparam=weakref.ref(self)
-        self.treeitem.setText(0, self.title)
-    def setValue(self,value):
-        #TODO:
-#        if isinstance(value,float):
-#            self.treeitem.setText(1, ("%."+self.digits+"f") %value)
-#        else:
-#            self.treeitem.setText(1, str(value))
-        self.treeitem.setText(1, str(value))
+    def _convert(self,value):
+        return int(value)
+
+    def createEditor(self,parent):
+        return SpinBox(parent,dec=False,minStep=1.0,step=1.0,decimals=6)
+    def editorSignal(self,editor):
+        return editor.sigValueChanged
+    def setEditorData(self,editor):
+        editor.setValue(self._value)
+    def editorValue(self,editor):
+        return int(editor.value())
+
+class ParamDisplay(Param):
+    editable=False
+    def _convert(self,value):
+        return str(value)
     def getValue(self):
-        return self.treeitem.text(1)                  
-        
-class ParamBool(Param):     
-    def createWidget(self):
-        self.widget=QtGui.QCheckBox()        
-        self.sig=self.widget.toggled
-    def _setValue(self,value):
-        self.widget.setChecked(value)
-    def _getValue(self):
-        return self.widget.isChecked()      
-
-class ParamStr(Param):     
-    def createWidget(self):
-        self.widget=QtGui.QLineEdit()        
-        self.sig=self.widget.editingFinished
-    def _setValue(self,value):
-        self.widget.setText(asUnicode(value))
-    def _getValue(self):
-        return asUnicode(self.widget.text())
-
-
-
-from pyqtgraph.widgets.ComboBox import ComboBox
-
-class ParamList(Param):     
-    def createWidget(self):
-        self.widget=ComboBox()       
-        self.widget.setMaximumHeight(20)  ## set to match height of spin box and line edit
-        self.sig=self.widget.currentIndexChanged
-        self.targetValue=None
-
-    
-    def _getValue(self):
-        return self.widget.value()
-    
-    def _setValue(self, val):
-        try:
-            self.widget.setValue(val)
-        except ValueError:
-            self.widget.addItems([val])
-            self.widget.setValue(val)
-            
+        return self._value if self._value is not None else ""
+
+class ParamBool(Param):
+    def defaultValue(self):
+        return False
+
+    def _convert(self,value):
+        return bool(value)
+
+    def displayText(self):
+        return ""
+
+    def data(self,column,role):
+        if column==1 and role==Qt.CheckStateRole:
+            return Qt.Checked if self._value else Qt.Unchecked
+        return super().data(column,role)
+
+    def setData(self,column,value,role):
+        if column==1 and role==Qt.CheckStateRole:
+            self._setFromUi(value==Qt.Checked)
+            return True
+        return False
+
+    def flags(self,column):
+        f=Qt.ItemIsEnabled|Qt.ItemIsSelectable
+        if column==1:
+            f|=Qt.ItemIsUserCheckable
+        return f
+
+class ParamStr(Param):
+    def defaultValue(self):
+        return ""
+
+    def _convert(self,value):
+        return asUnicode(value)
+
+    def createEditor(self,parent):
+        return QtGui.QLineEdit(parent)
+    def editorSignal(self,editor):
+        return editor.editingFinished
+    def setEditorData(self,editor):
+        editor.setText(self._value)
+    def editorValue(self,editor):
+        return asUnicode(editor.text())
+
+
+class ParamList(Param):
+    def __init__(self,*args,**kwargs):
+        super().__init__(*args,**kwargs)
+        self.options=[]
+
+    def _convert(self,value):
+        return asUnicode(value) if value is not None else None
+
+    def setValue(self, val):
+        val=self._convert(val)
+        if val is not None and val not in self.options:
+            self.options.append(val)
+        super().setValue(val)
 
     def setOptions(self,options):
-        if self.sig:
-            self.sig.disconnect(self._action)
-        try:
-            self.widget.setItems(options)
-        finally:
-            if self.sig:
-                self.sig.connect(self._action)          
-            
+        self.options=list(options)
+        if self._value not in self.options:
+            self._value=self.options[0] if self.options else None
+        self.model.nodeChanged(self)
+
+    def createEditor(self,parent):
+        w=QtGui.QComboBox(parent)
+        w.addItems(self.options)
+        return w
+    def editorSignal(self,editor):
+        return editor.currentIndexChanged
+    def setEditorData(self,editor):
+        if self._value in self.options:
+            editor.setCurrentIndex(self.options.index(self._value))
+    def editorValue(self,editor):
+        return asUnicode(editor.currentText())
+
 class ParamDir(Param):
         pass
 #    def getDir(self):
@@ -326,51 +529,35 @@ class ParamDir(Param):
 ##        dialog.setFileMode(QtGui.QFileDialog.Directory)
 ##        dialog.setOption(QtGui.QFileDialog.ShowDirsOnly)
 ##        directory = dialog.getExistingDirectory(self, 'Choose Directory', os.path.curdir)
-        
-class ParamGroup(Param):     
-    def createTitle(self,title):
-        self.label=QtGui.QLabel(self.title)
- 
-    
-    def attachToTree(self,parent):
-        self.treeitem=QtGui.QTreeWidgetItem(parent)
-        self.treeitem.getparam=weakref.ref(self)
-        self.treeitem.treeWidget().setFirstItemColumnSpanned(self.treeitem, True)
-        self.treeitem.setFlags(self.treeitem.flags() | Qt.ItemIsDropEnabled)
-        #self.treeitem.treeWidget().setItemWidget(self.treeitem, 0, self.label) 
-        self.treeitem.setText(0,self.title)
-        self.treeitem.setExpanded(True)
-        self.expanded=True
-   
-        for c in [0,1]:
-            self.treeitem.setBackground(c, QtGui.QBrush(QtGui.QColor(220,220,220)))
-            #self.treeitem.setForeground(c, QtGui.QBrush(QtGui.QColor(220,220,255)))
-            font = self.treeitem.font(c)
+
+class ParamGroup(Param):
+    editable=False
+    spanned=True
+    def defaultValue(self):
+        return self.title
+
+    def data(self,column,role):
+        if role==Qt.DisplayRole and column==0:
+            return self.title
+        if role==Qt.BackgroundRole:
+            return QtGui.QBrush(QtGui.QColor(220,220,220))
+        if role==Qt.FontRole:
+            font=QtGui.QFont()
             font.setBold(True)
             font.setPointSize(font.pointSize()+1)
-            self.treeitem.setFont(c, font)
-            self.treeitem.setSizeHint(0, QtCore.QSize(0, 25))   
-            
-    def createWidget(self):
-        self.widget=self.label
-   
-    def _setValue(self,value):
-        self.widget.setText(asUnicode(value))
-    def _getValue(self):
-        return asUnicode(self.widget.text())
-    def __del__(self):
-        print("del")
-        
-               
+            return font
+        if role==Qt.SizeHintRole and column==0:
+            return QtCore.QSize(0, 25)
+        return None
+
+
 def getChildGroup(parent, title):
-    for i in range(0,parent.childCount()):
-        c=parent.child(i)
-        #print(type(c.getparam)==ParamGroup, c.getparam.getTitle()==title,type(c.getparam),c.getparam.getTitle())
-        if type(c.getparam())==ParamGroup and c.getparam().getTitle()==title:
+    for c in parent.children:
+        if type(c)==ParamGroup and c.getTitle()==title:
             return c
     return None
-        
-        
+
+
 mappedNames={
     "float":ParamFloat,
     "action":ParamAction,
@@ -380,7 +567,7 @@ mappedNames={
     "list":ParamList,
     "group":ParamGroup,
     "display":ParamDisplay,
-    
+
     "f":ParamFloat,
     "a":ParamAction,
     "b":ParamBool,
@@ -388,7 +575,7 @@ mappedNames={
     "s":ParamStr,
     "l":ParamList,
     "g":ParamGroup,
-    "d":ParamDisplay    
+    "d":ParamDisplay
 }
 
 class Evfilter(QtCore.QObject):
@@ -398,12 +585,12 @@ class Evfilter(QtCore.QObject):
     def eventFilter(self,  obj,  event):
         if event.type()==QtCore.QEvent.Wheel:# and isinstance
             #event blocked
-            return True           
+            return True
         return False
-        
+
 def registerEvent(qobject,function=None):
     qobject.evfilter = Evfilter(function)
-    qobject.installEventFilter(qobject.evfilter)        
+    qobject.installEventFilter(qobject.evfilter)
 def removeEvent(qobject):
     qobject.removeEventFilter(qobject.evfilter)
 
@@ -417,7 +604,7 @@ def removeEvent(qobject):
 #    w.setValue = w.setColor
 #    self.hideWidget = False
 #    w.setFlat(True)
-#    w.setEnabled(not opts.get('readonly', False))            
+#    w.setEnabled(not opts.get('readonly', False))
 #elif t == 'colormap':
 #    from ..widgets.GradientWidget import GradientWidget ## need this here to avoid import loop
 #    w = GradientWidget(orientation='bottom')
@@ -425,4 +612,4 @@ def removeEvent(qobject):
 #    w.sigChanging = w.sigGradientChanged
 #    w.value = w.colorMap
 #    w.setValue = w.setColorMap
-#    self.hideWidget = False
\ No newline at end of file
+#    self.hideWidget = False
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+The registry of all muxe of a fluxi, indexed by path, type and tags
+"""
+import functools,weakref
+
+@functools.lru_cache(maxsize=8192)
+def parse_id(id):
+    """ split an id like ``"f:Pos/target x"`` into (type, name, path) = ("f", "target x", "Pos") """
+    type_,sep,name=id.partition(":")
+    if not sep:
+        raise ValueError("error creating %s: the id needs a type like 'f:name'"%id)
+    path,_,name=name.rpartition("/")
+    return type_,name,path
+
+def split_tags(tags):
+    return {t for t in tags.replace(","," ").split() if t}
+
+class _Node(object):
+    """ one level of the path trie, it knows all muxe in its subtree by type """
+    __slots__=("children","by_type","group")
+    def __init__(self):
+        self.children={}
+        self.by_type={}
+        self.group=None
+
+class MuxRegistry(dict):
+    """
+    A dict of id -> mux that also keeps a trie of the paths
+
+    Lookups by id are plain dict lookups. ``find`` returns all muxe under a
+    path, of a type and/or with a tag in time proportional to the result.
+    """
+    def __init__(self):
+        super().__init__()
+        self._root=_Node()
+        self._tags={}
+        self._tagsof={}
+        self.generation=0
+
+    def _node(self,path,create=False):
+        node=self._root
+        if not path:
+            return node
+        for part in path.split("/"):
+            try:
+                node=node.children[part]
+            except KeyError:
+                if not create:
+                    return None
+                node=node.children[part]=_Node()
+        return node
+
+    def _trail(self,path):
+        """ all nodes from the root to ``path`` """
+        node=self._root
+        yield node
+        if path:
+            for part in path.split("/"):
+                node=node.children.setdefault(part,_Node())
+                yield node
+
+    def __setitem__(self,id,mux):
+        if id in self:
+            if dict.__getitem__(self,id) is mux:
+                return
+            self._unindex(id)
+            self.generation+=1
+        super().__setitem__(id,mux)
+        type_,name,path=parse_id(id)
+        for node in self._trail(path):
+            node.by_type.setdefault(type_,{})[id]=mux
+        if type_=="group":
+            self._node(path+"/"+name if path else name,create=True).group=mux
+
+    def __delitem__(self,id):
+        self._unindex(id)
+        super().__delitem__(id)
+        self.generation+=1
+
+    def pop(self,id,*default):
+        if id in self:
+            mux=self[id]
+            del self[id]
+            return mux
+        if default:
+            return default[0]
+        raise KeyError(id)
+
+    #the other ways to change a dict go through __setitem__ and __delitem__ too, so the trie stays in sync
+    def update(self,*args,**kwargs):
+        for id,mux in dict(*args,**kwargs).items():
+            self[id]=mux
+
+    def __ior__(self,other):
+        self.update(other)
+        return self
+
+    def setdefault(self,id,default=None):
+        if id not in self:
+            self[id]=default
+        return dict.__getitem__(self,id)
+
+    def popitem(self):
+        if not self:
+            raise KeyError("popitem(): registry is empty")
+        id=next(reversed(self))
+        return id,self.pop(id)
+
+    def clear(self):
+        super().clear()
+        self._root=_Node()
+        self._tags={}
+        self._tagsof={}
+        self.generation+=1
+
+    def _unindex(self,id):
+        type_,name,path=parse_id(id)
+        for node in self._trail(path):
+            ids=node.by_type.get(type_)
+            if ids is not None:
+                ids.pop(id,None)
+                if not ids:
+                    del node.by_type[type_]
+        if type_=="group":
+            node=self._node(path+"/"+name if path else name)
+            if node is not None:
+                node.group=None
+        self.set_tags(id,"")
+
+    def set_tags(self,id,tags):
+        """ (re)index the tags of a mux, ``tags`` is a string separated by spaces or commas """
+        for t in self._tagsof.pop(id,()):
+            ids=self._tags[t]
+            ids.pop(id,None)
+            if not ids:
+                del self._tags[t]
+        tags=split_tags(tags)
+        if tags and id in self:
+            self._tagsof[id]=tags
+            for t in tags:
+                self._tags.setdefault(t,{})[id]=self[id]
+
+    def group(self,path):
+        """ the group mux for ``path`` or None """
+        node=self._node(path)
+        return node.group if node is not None else None
+
+    def find(self,prefix="",type=None,tag=None):
+        """
+        all muxe under the path ``prefix`` (e.g. "Scan/"), optionally only
+        of a ``type`` (e.g. "f") and/or with a ``tag``
+        """
+        node=self._node(prefix.strip("/"))
+        if node is None:
+            return []
+        if type is not None:
+            sets=[node.by_type.get(type,{})]
+        else:
+            sets=list(node.by_type.values())
+        if tag is None:
+            return [m for s in sets for m in s.values()]
+        tagged=self._tags.get(tag,{})
+        if sum(map(len,sets))<=len(tagged):
+            return [m for s in sets for id,m in s.items() if id in tagged]
+        return [m for id,m in tagged.items() if any(id in s for s in sets)]
+
+class MuxHandle(object):
+    """
+    A cacheable handle to a mux, e.g. ``tx=fl.handle("f:Pos/target x")`` and then ``tx.v``
+
+    It resolves the mux once and only again when a mux was removed from the
+    fluxi, a removed mux is recreated on the next access.
+    """
+    __slots__=("id","_fluxi","_mux","_generation")
+    def __init__(self,fluxi,id):
+        self.id=id
+        self._fluxi=weakref.ref(fluxi)
+        self._mux=None
+        self._generation=-1
+
+    @property
+    def mux(self):
+        fl=self._fluxi()
+        if self._generation!=fl.muxe.generation:
+            self._mux=fl.g(self.id)
+            self._generation=fl.muxe.generation
+        return self._mux
+
+    @property
+    def v(self):
+        return self.mux.v
+
+    @v.setter
+    def v(self,value):
+        self.mux.v=value
+
+    def __getattr__(self,name):
+        return getattr(self.mux,name)
+
+    def __repr__(self):
+        return "MuxHandle(%s)"%self.id
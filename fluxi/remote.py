@@ -0,0 +1,358 @@
+# -*- coding: utf-8 -*-
+"""
+Read, set and watch the muxe of a running Fluxi from another process
+
+The server runs an asyncio loop in its own thread and listens on a TCP
+port of localhost or on a Unix socket. Every message is a frame::
+
+    !II header length, payload length | JSON header | payload
+
+Numpy arrays in the values are not written as JSON lists, they are replaced
+by ``{"__array__": n, "dtype": ..., "shape": ...}`` and their raw bytes are
+appended to the payload. A request can get or set many ids at once, it is
+executed in one round trip to the GUI thread.
+
+    fl.serve(("127.0.0.1",7777))
+
+    client=RemoteClient(("127.0.0.1",7777))
+    client.get(["f:Pos/target x","im:Camera"])
+    client.set({"f:Pos/target x":1.5})
+    client.subscribe(["f:Pos/current distance"],lambda values: print(values))
+"""
+import asyncio,json,os,socket,struct,threading,itertools,traceback
+from concurrent.futures import Future
+import numpy as np
+from fluxi.helper import NumpyAwareJSONEncoder
+
+_HEAD=struct.Struct("!II")
+_encoder=NumpyAwareJSONEncoder(separators=(',',':'))
+
+def _split_arrays(obj,chunks):
+    """ replace the arrays in ``obj`` by references to ``chunks`` """
+    if isinstance(obj,np.ndarray):
+        if obj.dtype.hasobject:
+            return _split_arrays(obj.tolist(),chunks)
+        a=np.ascontiguousarray(obj)
+        chunks.append(a)
+        return {"__array__":len(chunks)-1,"dtype":a.dtype.str,"shape":list(a.shape)}
+    if isinstance(obj,dict):
+        return {str(k):_split_arrays(v,chunks) for k,v in obj.items()}
+    if isinstance(obj,(list,tuple)):
+        return [_split_arrays(v,chunks) for v in obj]
+    return obj
+
+def _join_arrays(obj,arrays):
+    if isinstance(obj,dict):
+        if "__array__" in obj:
+            return arrays[obj["__array__"]]
+        return {k:_join_arrays(v,arrays) for k,v in obj.items()}
+    if isinstance(obj,list):
+        return [_join_arrays(v,arrays) for v in obj]
+    return obj
+
+def pack(header,data=None):
+    """ the buffers of one frame, the arrays in ``data`` are not copied """
+    chunks=[]
+    if data is not None:
+        header=dict(header,data=_split_arrays(data,chunks))
+    header["sizes"]=[a.nbytes for a in chunks]
+    h=_encoder.encode(header).encode("utf-8")
+    return [_HEAD.pack(len(h),sum(header["sizes"])),h]+[memoryview(a.reshape(-1)).cast("B") for a in chunks if a.nbytes]
+
+def unpack(head,payload,copy=False):
+    """ the header and the data of a frame """
+    header=json.loads(head.decode("utf-8"))
+    arrays=[]
+    offset=0
+    for (size,desc) in zip(header.get("sizes",[]),_array_descs(header.get("data"))):
+        a=np.frombuffer(payload,dtype=np.dtype(desc["dtype"]),count=size//np.dtype(desc["dtype"]).itemsize,offset=offset).reshape(desc["shape"])
+        arrays.append(a.copy() if copy else a)
+        offset+=size
+    return header,_join_arrays(header.get("data"),arrays)
+
+def _array_descs(obj):
+    """ the array references in ``obj`` sorted by their index """
+    found=[]
+    def walk(o):
+        if isinstance(o,dict):
+            if "__array__" in o:
+                found.append(o)
+            else:
+                for v in o.values():
+                    walk(v)
+        elif isinstance(o,list):
+            for v in o:
+                walk(v)
+    walk(obj)
+    return sorted(found,key=lambda d: d["__array__"])
+
+def remote_value(mux):
+    """ what is sent for a mux: the value of parameters (without latching buttons) or ``v`` """
+    from fluxi.muxe import MuxBaseParam
+    if isinstance(mux,MuxBaseParam):
+        return mux.value
+    return mux.v
+
+class RemoteServer(object):
+    """
+    Serves the muxe of ``fluxi`` on ``address``, a (host, port) tuple or the
+    path of a Unix socket. Port 0 picks a free port, ``address`` is updated
+    to the one that was bound by ``start``.
+
+    Requests (the header of a frame) are ``{"id": n, "op": ...}`` with the ops
+
+    - ``get`` with ``ids``: returns ``data``, a dict id->value (missing ids are left out)
+    - ``set`` with ``data``, a dict id->value: sets all in one ``fluxi.batch()``
+    - ``list`` with ``prefix`` and ``type``: returns the ids in ``data``
+    - ``subscribe`` with ``ids``, ``max_rate`` and an id ``sub`` chosen by the
+      client: afterwards frames ``{"op": "changed", "sub": sub, "data": {...}}``
+      are pushed with the values that changed
+    - ``unsubscribe`` with ``sub``
+    """
+    poll_interval=0.02
+    def __init__(self,fluxi,address=("127.0.0.1",0)):
+        self.fluxi=fluxi
+        self.address=address
+        self.loop=None
+        self._server=None
+        self._thread=None
+        self._clients=set()
+
+    def start(self):
+        ready=Future()
+        self._thread=threading.Thread(target=self._run,args=(ready,),name="fluxi-remote",daemon=True)
+        self._thread.start()
+        ready.result()
+        return self
+
+    def stop(self,timeout=1.):
+        if self.loop is not None and self.loop.is_running():
+            self.loop.call_soon_threadsafe(self._shutdown)
+            self._thread.join(timeout)
+
+    def _run(self,ready):
+        self.loop=loop=asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            if isinstance(self.address,str):
+                if os.path.exists(self.address):
+                    os.unlink(self.address)
+                self._server=loop.run_until_complete(asyncio.start_unix_server(self._client,path=self.address))
+            else:
+                self._server=loop.run_until_complete(asyncio.start_server(self._client,*self.address))
+                self.address=self._server.sockets[0].getsockname()[:2]
+        except Exception as e:
+            ready.set_exception(e)
+            return
+        ready.set_result(True)
+        try:
+            loop.run_forever()
+        finally:
+            loop.close()
+
+    def _shutdown(self):
+        self._server.close()
+        for task in list(self._clients):
+            task.cancel()
+        self.loop.call_later(0.05,self.loop.stop)
+
+    def _in_gui(self,func,*args):
+        return asyncio.wrap_future(self.fluxi.call_in_main_thread(func,*args),loop=self.loop)
+
+    async def _client(self,reader,writer):
+        task=asyncio.current_task()
+        self._clients.add(task)
+        lock=asyncio.Lock()
+        subs={}
+        async def send(header,data=None):
+            async with lock:
+                writer.writelines(pack(header,data))
+                await writer.drain()
+        try:
+            while True:
+                try:
+                    n,size=_HEAD.unpack(await reader.readexactly(_HEAD.size))
+                    head=await reader.readexactly(n)
+                    payload=await reader.readexactly(size)
+                except asyncio.IncompleteReadError:
+                    break
+                header,data=unpack(head,payload,copy=True)
+                reply={"id":header.get("id")}
+                try:
+                    result=await self._request(header,data,subs,send)
+                except Exception as e:
+                    reply.update(ok=False,error="%s: %s"%(type(e).__name__,e))
+                    result=None
+                else:
+                    reply["ok"]=True
+                await send(reply,result)
+        except (ConnectionError,asyncio.CancelledError):
+            pass
+        finally:
+            for sub in subs.values():
+                sub.cancel()
+            self._clients.discard(task)
+            writer.close()
+
+    async def _request(self,header,data,subs,send):
+        op=header.get("op")
+        if op=="get":
+            return await self._in_gui(self._get,header["ids"])
+        if op=="set":
+            await self._in_gui(self._set,data)
+            return None
+        if op=="list":
+            return await self._in_gui(self._list,header.get("prefix",""),header.get("type"))
+        if op=="subscribe":
+            sub=header["sub"]
+            interval=1./header["max_rate"] if header.get("max_rate") else self.poll_interval
+            subs[sub]=self.loop.create_task(self._watch(sub,header["ids"],max(interval,self.poll_interval),send))
+            return None
+        if op=="unsubscribe":
+            subs.pop(header["sub"]).cancel()
+            return None
+        raise ValueError("unknown request %r"%op)
+
+    def _get(self,ids):
+        muxe=self.fluxi.muxe
+        return {id:remote_value(muxe[id]) for id in ids if id in muxe}
+
+    def _set(self,values):
+        from fluxi.muxe import MuxBaseParam
+        fl=self.fluxi
+        #like _get only existing elements, a mistyped id must not create a new one
+        unknown=[id for id in values if id not in fl.muxe]
+        if unknown:
+            raise KeyError("unknown ids: %s"%", ".join(unknown))
+        with fl.batch():
+            for id,value in values.items():
+                mux=fl.muxe[id]
+                if isinstance(mux,MuxBaseParam):
+                    mux.set(value)
+                else:
+                    mux.v=value
+
+    def _list(self,prefix,type_):
+        return [m.id for m in self.fluxi.find(prefix,type_)]
+
+    async def _watch(self,sub,ids,interval,send):
+        """ push the values of ``ids`` whenever their version changed """
+        versions={}
+        muxe=self.fluxi.muxe
+        while True:
+            changed={}
+            for id in ids:
+                mux=muxe.get(id)
+                if mux is not None and mux.version!=versions.get(id):
+                    changed[id]=mux.version
+            if changed:
+                values=await self._in_gui(self._get,list(changed))
+                versions.update(changed)
+                await send({"op":"changed","sub":sub},values)
+            await asyncio.sleep(interval)
+
+class RemoteClient(object):
+    """
+    A blocking client for ``RemoteServer``, usable from any thread
+
+    Replies and pushed changes are read by a background thread. Callbacks
+    of subscriptions are called in that thread with a dict id->value.
+    """
+    def __init__(self,address,timeout=10.):
+        if isinstance(address,str):
+            self.sock=socket.socket(socket.AF_UNIX,socket.SOCK_STREAM)
+        else:
+            self.sock=socket.socket(socket.AF_INET,socket.SOCK_STREAM)
+            self.sock.setsockopt(socket.IPPROTO_TCP,socket.TCP_NODELAY,1)
+        self.sock.connect(address)
+        self.timeout=timeout
+        self._ids=itertools.count()
+        self._waiting={}
+        self._callbacks={}
+        self._send_lock=threading.Lock()
+        self._reader=threading.Thread(target=self._read_loop,name="fluxi-remote-client",daemon=True)
+        self._reader.start()
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*args):
+        self.close()
+
+    def request(self,op,data=None,**kwargs):
+        header=dict(kwargs,op=op,id=next(self._ids))
+        future=self._waiting[header["id"]]=Future()
+        buffers=pack(header,data)
+        with self._send_lock:
+            for b in buffers:
+                self.sock.sendall(b)
+        reply,result=future.result(self.timeout)
+        if not reply["ok"]:
+            raise RuntimeError(reply["error"])
+        return result
+
+    def get(self,ids):
+        """ the values of many ids as a dict, arrays are read-only numpy arrays """
+        if isinstance(ids,str):
+            return self.request("get",ids=[ids]).get(ids)
+        return self.request("get",ids=list(ids))
+
+    def set(self,values):
+        """ set many values (a dict id->value) of existing elements at once, nothing is set if an id is unknown """
+        self.request("set",values)
+
+    def list(self,prefix="",type=None):
+        return self.request("list",prefix=prefix,type=type)
+
+    def subscribe(self,ids,callback,max_rate=None):
+        """ call ``callback(values)`` with the changed values, returns the id for ``unsubscribe`` """
+        sub=next(self._ids)
+        self._callbacks[sub]=callback
+        try:
+            self.request("subscribe",ids=list(ids),max_rate=max_rate,sub=sub)
+        except:
+            del self._callbacks[sub]
+            raise
+        return sub
+
+    def unsubscribe(self,sub):
+        self.request("unsubscribe",sub=sub)
+        self._callbacks.pop(sub,None)
+
+    def _recv(self,n):
+        buf=bytearray(n)
+        view=memoryview(buf)
+        while n:
+            k=self.sock.recv_into(view[-n:],n)
+            if not k:
+                raise ConnectionError("connection closed")
+            n-=k
+        return buf
+
+    def _read_loop(self):
+        try:
+            while True:
+                n,size=_HEAD.unpack(self._recv(_HEAD.size))
+                head=self._recv(n)
+                header,data=unpack(bytes(head),self._recv(size))
+                if header.get("op")=="changed":
+                    callback=self._callbacks.get(header["sub"])
+                    if callback is not None:
+                        try:
+                            callback(data)
+                        except Exception:
+                            traceback.print_exc()
+                    continue
+                future=self._waiting.pop(header["id"],None)
+                if future is not None:
+                    future.set_result((header,data))
+        except (OSError,ConnectionError):
+            for future in self._waiting.values():
+                future.set_exception(ConnectionError("connection closed"))
@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+"""
+A ring of samples for running charts whose last ``length`` samples are always one contiguous view
+
+Every sample is written twice, at column ``k`` and ``k+capacity`` of a buffer
+with ``2*capacity`` columns (the doubled-buffer trick). So the newest ``n``
+samples are always ``buf[:, pos+capacity-n:pos+capacity]``, a view that can
+be handed to ``setData`` without ``np.roll`` or any other copy::
+
+    ring=RingBuffer(rows=2,length=1000)
+    ring.append([1.,2.])
+    ring.extend(block)         # block of shape (rows, n)
+    ring.view(0)               # the last 1000 samples of row 0, oldest first
+
+``length`` can be changed without copying as long as it fits into the
+capacity, which grows geometrically. Unwritten samples are NaN.
+
+pyqtgraph reads the arrays given to ``setData`` only when it paints, while a
+loop thread may already write the next samples. The capacity is always at
+least twice ``length``, so a view of the last ``length`` samples stays intact
+for at least ``capacity-length>=length`` further samples; only a writer that
+adds more than that before the paint can reach it.
+
+``GrowBuffer`` is the counterpart for curves that only grow, like a sweep
+that is still running: nothing is dropped and the capacity doubles when it
+is full, so appending costs amortized O(1) per sample.
+"""
+import threading
+import numpy as np
+
+class RingBuffer(object):
+    """
+    Parameters
+    ----------
+    rows : number of rows (curves), more are added by writing more values
+    length : the number of samples that are kept
+    dtype : of the samples, float64 by default
+    """
+    def __init__(self,rows=1,length=200,dtype=np.float64):
+        if int(length)<=0:
+            raise ValueError("A length smaller than 1 was specified")
+        self.dtype=np.dtype(dtype)
+        self.fill=np.nan if self.dtype.kind=="f" else 0
+        self.rows=int(rows) # rows in use
+        self.count=0 # samples written since the last clear
+        self.generation=0 # increases when the samples are cleared or replaced
+        self.row_lengths={} # shorter lengths for single rows, see view
+        self._length=int(length)
+        self._pos=0 # column of the next sample, 0..capacity-1
+        self._lock=threading.RLock()
+        self._buf=self._alloc(max(self.rows,1),2*self._length)
+
+    def _alloc(self,rows,capacity):
+        return np.full((rows,2*capacity),self.fill,dtype=self.dtype)
+
+    @property
+    def capacity(self):
+        return self._buf.shape[1]//2
+
+    @property
+    def length(self):
+        return self._length
+
+    @property
+    def size(self):
+        """ the number of samples in the ring, at most ``length`` """
+        return min(self.count,self._length)
+
+    @property
+    def pos(self):
+        """ the write position in a ring of ``length`` samples, like the index of the old ``MuxC.arrpos`` """
+        return self.count%self._length
+
+    def resize(self,length):
+        """ keep ``length`` samples; only copies if the capacity has to grow """
+        length=int(length)
+        if length<=0:
+            raise ValueError("A length smaller than 1 was specified")
+        with self._lock:
+            if 2*length>self.capacity:
+                #headroom of length samples for views that are not painted yet
+                self._reallocate(self._buf.shape[0],max(2*length,2*self.capacity))
+            elif length>self._length:
+                #samples older than the old length are outdated, they must not come back
+                self._fill_range(self._length,length)
+            self._length=length
+
+    def _fill_range(self,start,stop):
+        """ fill the samples that are from ``start`` to ``stop`` samples old """
+        stop=min(stop,self.count)
+        if start>=stop:
+            return
+        cap=self.capacity
+        p=self._pos+cap
+        b=self._buf
+        b[:,p-stop:p-start]=self.fill
+        #the other copy of these samples
+        lo,hi=p-stop,p-start
+        if hi<=cap:
+            b[:,lo+cap:hi+cap]=self.fill
+        elif lo>=cap:
+            b[:,lo-cap:hi-cap]=self.fill
+        else:
+            b[:,lo+cap:]=self.fill
+            b[:,:hi-cap]=self.fill
+
+    def _reallocate(self,rows,capacity):
+        """ a new buffer with the newest samples of the old one """
+        n=min(self.count,self._length,capacity)
+        old=self._buf[:self.rows,self._pos+self.capacity-n:self._pos+self.capacity] if n else None
+        self._buf=self._alloc(rows,capacity)
+        self._pos=0
+        if n:
+            self._buf[:old.shape[0],capacity-n:capacity]=old
+            self._buf[:old.shape[0],2*capacity-n:]=old
+
+    def _ensure_rows(self,rows):
+        if rows>self._buf.shape[0]:
+            self._reallocate(max(rows,2*self._buf.shape[0]),self.capacity)
+        if rows>self.rows:
+            self.rows=rows
+
+    def append(self,values):
+        """ add one sample to each row, rows without a value get NaN """
+        values=np.asarray(values,dtype=self.dtype).reshape(-1)
+        with self._lock:
+            self._ensure_rows(len(values))
+            b=self._buf
+            p=self._pos
+            cap=self.capacity
+            n=len(values)
+            b[:n,p]=values
+            b[:n,p+cap]=values
+            if n<self.rows:
+                b[n:self.rows,p]=self.fill
+                b[n:self.rows,p+cap]=self.fill
+            self._pos=(p+1)%cap
+            self.count+=1
+
+    def extend(self,block):
+        """ add the samples of ``block`` (rows, n), or a 1-D block to the first row """
+        block=np.asarray(block,dtype=self.dtype)
+        if block.ndim==1:
+            if self.rows==1:
+                self._extend_row(block)
+                return
+            block=block[np.newaxis]
+        rows,n=block.shape
+        if n==0:
+            return
+        with self._lock:
+            self._ensure_rows(rows)
+            cap=self.capacity
+            if n>cap:
+                self.count+=n-cap
+                block=block[:,-cap:]
+                n=cap
+            b=self._buf
+            p=self._pos
+            b[:rows,p:p+n]=block
+            if p+n<=cap:
+                b[:rows,p+cap:p+cap+n]=block
+            else:
+                b[:rows,p+cap:]=block[:,:cap-p]
+                b[:rows,:p+n-cap]=block[:,cap-p:]
+            if rows<self.rows:
+                self._fill_rows(rows,p,n)
+            self._pos=(p+n)%cap
+            self.count+=n
+
+    def _extend_row(self,samples):
+        """ extend for the common case of a single row """
+        n=len(samples)
+        if n==0:
+            return
+        with self._lock:
+            cap=self.capacity
+            if n>cap:
+                self.count+=n-cap
+                samples=samples[-cap:]
+                n=cap
+            b=self._buf[0]
+            p=self._pos
+            b[p:p+n]=samples
+            if p+n<=cap:
+                b[p+cap:p+cap+n]=samples
+            else:
+                b[p+cap:]=samples[:cap-p]
+                b[:p+n-cap]=samples[cap-p:]
+            self._pos=(p+n)%cap
+            self.count+=n
+
+    def _fill_rows(self,row,p,n):
+        b=self._buf
+        cap=self.capacity
+        b[row:self.rows,p:p+n]=self.fill
+        if p+n<=cap:
+            b[row:self.rows,p+cap:p+cap+n]=self.fill
+        else:
+            b[row:self.rows,p+cap:]=self.fill
+            b[row:self.rows,:p+n-cap]=self.fill
+
+    def view(self,row=None,n=None):
+        """
+        the newest samples without copying, oldest first: all rows as a 2-D
+        array or one row. ``n`` defaults to ``length`` or the length set for
+        the row in ``row_lengths``. The view is read-only and stays valid for
+        ``capacity-length`` further samples, copy it to keep it longer.
+        """
+        with self._lock:
+            if n is None:
+                n=self.row_lengths.get(row,self._length) if row is not None else self._length
+            n=min(n,self._length)
+            end=self._pos+self.capacity
+            if row is None:
+                v=self._buf[:self.rows,end-n:end]
+            else:
+                v=self._buf[row,end-n:end]
+        v.flags.writeable=False
+        return v
+
+    def view_range(self,start,stop,row=None):
+        """ like ``view``, the samples with the indices ``start`` to ``stop`` counted since the last clear """
+        with self._lock:
+            count=self.count
+            start=max(start,count-self.size)
+            stop=min(stop,count)
+            end=self._pos+self.capacity
+            a,b=end-(count-start),end-(count-max(stop,start))
+            v=self._buf[:self.rows,a:b] if row is None else self._buf[row,a:b]
+        v.flags.writeable=False
+        return v
+
+    def clear(self):
+        with self._lock:
+            self._buf[...]=self.fill
+            self._pos=0
+            self.count=0
+            self.generation+=1
+
+    def load(self,values):
+        """ replace the content by ``values`` (rows, n), the length becomes n """
+        values=np.atleast_2d(np.asarray(values,dtype=self.dtype))
+        with self._lock:
+            self.count=0
+            self._pos=0
+            self.generation+=1
+            self.rows=values.shape[0]
+            self._length=max(values.shape[1],1)
+            self._buf=self._alloc(max(self.rows,1),2*self._length)
+            self.extend(values)
+
+class GrowBuffer(object):
+    """ rows of samples that are only appended, e.g. the xs and ys of a curve """
+    def __init__(self,rows=1,capacity=1024,dtype=np.float64):
+        self.dtype=np.dtype(dtype)
+        self.fill=np.nan if self.dtype.kind=="f" else 0
+        self.rows=int(rows)
+        self.count=0
+        self.generation=0 # never replaced, for the same interface as RingBuffer
+        self._lock=threading.RLock()
+        self._buf=np.full((self.rows,max(int(capacity),1)),self.fill,dtype=self.dtype)
+
+    @property
+    def capacity(self):
+        return self._buf.shape[1]
+
+    @property
+    def length(self):
+        """ as for a RingBuffer, the number of samples that are kept before something is dropped """
+        return self.capacity
+
+    def extend(self,block):
+        """ append the samples of ``block`` (rows, n) """
+        block=np.asarray(block,dtype=self.dtype).reshape(self.rows,-1)
+        n=block.shape[1]
+        with self._lock:
+            if self.count+n>self.capacity:
+                buf=np.full((self.rows,max(2*self.capacity,self.count+n)),self.fill,dtype=self.dtype)
+                buf[:,:self.count]=self._buf[:,:self.count]
+                self._buf=buf
+            self._buf[:,self.count:self.count+n]=block
+            self.count+=n
+
+    def view(self,row=None):
+        """ all samples without copying, read-only; samples appended later are not in it """
+        return self.view_range(0,self.count,row)
+
+    def view_range(self,start,stop,row=None):
+        with self._lock:
+            stop=min(stop,self.count)
+            v=self._buf[:,start:stop] if row is None else self._buf[row,start:stop]
+        v.flags.writeable=False
+        return v
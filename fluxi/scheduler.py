@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+One render scheduler per process that redraws the muxe of all fluxis.
+
+Every frame the dirty muxe of all registered fluxis are drawn in the order of
+their ``draw_priority`` until the time budget of the frame is used up. The
+rest is carried over to the next frame. Hidden windows and docks are skipped
+and the frame rate is adapted to the time the drawing takes.
+"""
+try:
+    from PyQt4 import QtCore
+except ImportError:
+    from PyQt5 import QtCore
+import collections,time,weakref
+from fluxi import perf
+
+FrameStats=collections.namedtuple("FrameStats",["t","draw_time","drawn","backlog","dropped","interval"])
+
+class RenderScheduler(QtCore.QObject):
+    """
+    Shared redraw timer of all fluxis
+
+    A frame draws the requested muxe sorted by ``draw_priority`` (lower is
+    drawn first). Muxe that are skipped because the budget was used up age by
+    ``aging`` per frame so that low priority elements are not starved.
+    """
+    _instance=None
+    budget=0.012            # seconds of drawing per frame
+    target_interval=1./30   # fastest frame rate
+    max_interval=1./4       # slowest frame rate, also used when nothing is visible
+    load_factor=2.          # the gui gets at least this times the draw time for itself
+    aging=1.
+    history_length=300
+
+    @classmethod
+    def instance(cls):
+        """ get the scheduler of this process, create it on first use """
+        if cls._instance is None:
+            cls._instance=cls()
+        return cls._instance
+
+    def __init__(self):
+        super().__init__()
+        self._fluxis=weakref.WeakSet()
+        self.stats=collections.deque(maxlen=self.history_length)
+        self.interval=self.target_interval
+        self._cost=0.
+        self._lastframe=None
+        self.timer=QtCore.QTimer(timeout=self.frame)
+        self.timer.start(self.interval*1000)
+
+    def register(self,fluxi):
+        self._fluxis.add(fluxi)
+
+    def unregister(self,fluxi):
+        self._fluxis.discard(fluxi)
+
+    def _collect(self):
+        """ get all requested muxe of visible windows and the number of muxe that wait in hidden windows """
+        pending=[]
+        hidden=0
+        for fl in list(self._fluxis):
+            requested=fl.redraw_list.copy()
+            if not fl._is_shown():
+                hidden+=len(requested)
+                continue
+            pending.extend((fl,mux) for mux in requested.values())
+        return pending,hidden
+
+    def frame(self):
+        """ draw as many of the requested muxe as the budget allows """
+        t0=time.perf_counter()
+        dropped=0
+        if self._lastframe is not None:
+            dropped=max(0,int((t0-self._lastframe)/self.interval+0.5)-1)
+        self._lastframe=t0
+        pending,backlog=self._collect()
+        pending.sort(key=lambda e:e[1].draw_priority-self.aging*e[1]._draw_wait)
+        drawn=0
+        try:
+            for fl,mux in pending:
+                if (drawn and time.perf_counter()-t0>self.budget) or not mux._is_drawable():
+                    mux._draw_wait+=1
+                    backlog+=1
+                    continue
+                self._draw(fl,mux)
+                drawn+=1
+        finally:
+            draw_time=time.perf_counter()-t0
+            self._adapt(draw_time,visible=len(pending)>0 or self._any_shown())
+            self.stats.append(FrameStats(t0,draw_time,drawn,backlog,dropped,self.interval))
+
+    def _draw(self,fl,mux):
+        fl.redraw_list.pop(mux.id,None)
+        mux._draw_wait=0
+        mux._redraw_pending=False
+        t0=perf.clock() if perf.enabled else None
+        try:
+            mux._do_draw_actions()
+            mux.draw()
+        except:
+            fl.log("there was an error drawing %s" %mux.id)
+            raise
+        if t0 is not None:
+            perf.record("draw "+mux.id,perf.clock()-t0)
+
+    def flush(self,fluxi):
+        """ draw everything that is requested for ``fluxi`` now, regardless of budget and visibility """
+        for mux in list(fluxi.redraw_list.copy().values()):
+            self._draw(fluxi,mux)
+
+    def _any_shown(self):
+        return any(fl._is_shown() for fl in list(self._fluxis))
+
+    def _adapt(self,draw_time,visible=True):
+        """ slow down when drawing takes long or when nothing can be seen """
+        self._cost=0.8*self._cost+0.2*draw_time
+        if visible:
+            interval=min(max(self.target_interval,self.load_factor*self._cost),self.max_interval)
+        else:
+            interval=self.max_interval
+        if abs(interval-self.interval)>0.002:
+            self.interval=interval
+            self.timer.setInterval(interval*1000)
+
+    def summary(self):
+        """ statistics of the frames in the history: draw times, dropped frames and backlog """
+        st=list(self.stats)
+        if not st:
+            return {}
+        times=sorted(s.draw_time for s in st)
+        return {
+            "frames":len(st),
+            "fps":len(st)/max(st[-1].t-st[0].t,1e-9) if len(st)>1 else 0.,
+            "draw_time_mean":sum(times)/len(times),
+            "draw_time_max":times[-1],
+            "draw_time_p95":times[min(len(times)-1,int(0.95*len(times)))],
+            "dropped":sum(s.dropped for s in st),
+            "backlog":st[-1].backlog,
+            "interval":self.interval,
+        }
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+Stopping all loops of a Fluxi at once, with a deadline for each one
+
+A loop takes part if it has ``request_stop()``, which only signals the
+loop and returns at once, ``join(timeout)``, which returns True if the loop
+ended in time, and a ``shutdown_timeout`` in seconds. The result of the join
+is left in ``loop._shutdown``, so ``delete`` does not wait a second time. All loops are
+signalled first, so they wind down in parallel and the whole shutdown takes
+about as long as the slowest loop, at most the largest deadline.
+"""
+import time
+
+class ShutdownReport(object):
+    """ which loops stopped in time and which were abandoned, and how long each phase took """
+    def __init__(self):
+        self.stopped=[]
+        self.abandoned=[] # still running after their deadline (process loops were terminated)
+        self.timings={} # id -> seconds from the stop signal until the loop ended or was given up
+        self.phases={} # phase -> seconds
+        self.duration=0.
+
+    @property
+    def ok(self):
+        return not self.abandoned
+
+    def __repr__(self):
+        return "ShutdownReport(%.3f s, %d stopped, abandoned: %s)"%(self.duration,len(self.stopped),", ".join(self.abandoned) or "none")
+
+def stop_loops(loops,timeout=None,report=None):
+    """ signal all loops to stop, then join each until its deadline, which is capped at ``timeout`` """
+    if report is None:
+        report=ShutdownReport()
+    t0=time.monotonic()
+    for loop in loops:
+        loop.request_stop()
+    for loop in loops:
+        limit=loop.shutdown_timeout if timeout is None else min(timeout,loop.shutdown_timeout)
+        ended=loop._shutdown=loop.join(max(0.,t0+limit-time.monotonic()))
+        (report.stopped if ended else report.abandoned).append(loop.id)
+        report.timings[loop.id]=time.monotonic()-t0
+    report.phases["loops"]=time.monotonic()-t0
+    return report
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+Statistics of a stream of samples that are updated in O(1) per sample, without scanning a buffer
+
+- ``Moments``: count, sum, mean and variance (Welford) of a sliding window,
+  samples leave the window with ``remove``
+- ``EWMA``: exponentially weighted moving average
+- ``P2Quantile``: the P² estimate of one quantile (Jain and Chlamtac 1985),
+  five markers instead of the samples
+- ``StreamStats``: all of them for one curve of a chart, see ``MuxC.stats``::
+
+    st=StreamStats(window=1000,quantiles=(0.05,0.95))
+    st.add(block,removed=oldest_samples)
+    st.mean,st.std,st.ewma,st.quantile(0.95)
+
+NaN samples are skipped, so curves without a value do not spoil the statistics.
+"""
+import numpy as np
+
+def _finite(values):
+    values=np.asarray(values,dtype=float).reshape(-1)
+    return values[~np.isnan(values)]
+
+class Moments(object):
+    """ count, mean and variance of the samples that were added and not removed again """
+    __slots__=("n","mean","m2")
+    def __init__(self,values=()):
+        self.reset(values)
+
+    def reset(self,values=()):
+        v=_finite(values)
+        self.n=len(v)
+        self.mean=v.mean() if self.n else 0.
+        self.m2=((v-self.mean)**2).sum() if self.n else 0.
+
+    def add(self,values):
+        v=_finite(values)
+        if len(v)==1:
+            #Welford for the common case of one sample
+            x=v[0]
+            self.n+=1
+            d=x-self.mean
+            self.mean+=d/self.n
+            self.m2+=d*(x-self.mean)
+        elif len(v):
+            #Chan et al., merging the moments of the block
+            nb=len(v)
+            mb=v.mean()
+            n=self.n+nb
+            d=mb-self.mean
+            self.mean+=d*nb/n
+            self.m2+=((v-mb)**2).sum()+d*d*self.n*nb/n
+            self.n=n
+
+    def remove(self,values):
+        """ take samples that were added before out again """
+        v=_finite(values)
+        nb=len(v)
+        if nb==0:
+            return
+        n=self.n-nb
+        if n<=0:
+            self.reset()
+            return
+        mb=v.mean()
+        mean=(self.n*self.mean-nb*mb)/n
+        d=mb-mean
+        self.m2=max(0.,self.m2-((v-mb)**2).sum()-d*d*n*nb/self.n)
+        self.mean=mean
+        self.n=n
+
+    @property
+    def sum(self):
+        return self.n*self.mean
+
+    @property
+    def var(self):
+        """ the population variance like ``np.var`` """
+        return self.m2/self.n if self.n else np.nan
+
+class EWMA(object):
+    """ exponentially weighted moving average, each sample has the weight ``alpha`` """
+    __slots__=("alpha","value")
+    def __init__(self,alpha=0.05):
+        self.alpha=alpha
+        self.value=np.nan
+
+    def add(self,values):
+        v=_finite(values)
+        if len(v)==0:
+            return
+        if self.value!=self.value:
+            self.value=v[0]
+            v=v[1:]
+        n=len(v)
+        if n==1:
+            self.value+=self.alpha*(v[0]-self.value)
+        elif n:
+            keep=1.-self.alpha
+            weights=self.alpha*keep**np.arange(n-1,-1,-1,dtype=float)
+            self.value=keep**n*self.value+weights.dot(v)
+
+class P2Quantile(object):
+    """ the P² estimate of the ``p`` quantile, 0<p<1, exact up to five samples """
+    __slots__=("p","n","q","pos","want","dn")
+    def __init__(self,p):
+        self.p=p
+        self.n=0
+        self.q=[]
+
+    def add(self,x):
+        if x!=x:
+            return
+        self.n+=1
+        q=self.q
+        if self.n<=5:
+            q.append(x)
+            q.sort()
+            if self.n==5:
+                p=self.p
+                self.pos=[1,2,3,4,5]
+                self.want=[1,1+2*p,1+4*p,3+2*p,5]
+                self.dn=[0,p/2,p,(1+p)/2,1]
+            return
+        pos,want=self.pos,self.want
+        if x<q[0]:
+            q[0]=x
+            k=0
+        elif x>=q[4]:
+            q[4]=x
+            k=3
+        else:
+            k=0
+            while x>=q[k+1]:
+                k+=1
+        for i in range(k+1,5):
+            pos[i]+=1
+        for i in range(5):
+            want[i]+=self.dn[i]
+        #move the middle markers towards their desired positions
+        for i in (1,2,3):
+            d=want[i]-pos[i]
+            if (d>=1 and pos[i+1]-pos[i]>1) or (d<=-1 and pos[i-1]-pos[i]<-1):
+                d=1 if d>0 else -1
+                qn=q[i]+d/(pos[i+1]-pos[i-1])*((pos[i]-pos[i-1]+d)*(q[i+1]-q[i])/(pos[i+1]-pos[i])
+                                              +(pos[i+1]-pos[i]-d)*(q[i]-q[i-1])/(pos[i]-pos[i-1]))
+                if not q[i-1]<qn<q[i+1]:
+                    qn=q[i]+d*(q[i+d]-q[i])/(pos[i+d]-pos[i])
+                q[i]=qn
+                pos[i]+=d
+
+    @property
+    def value(self):
+        if self.n>=5:
+            return self.q[2]
+        if self.n:
+            return float(np.percentile(self.q,100*self.p))
+        return np.nan
+
+class StreamStats(object):
+    """
+    Statistics of one curve: ``Moments`` of the last ``window`` samples,
+    an ``EWMA`` and P² estimates of ``quantiles``.
+
+    P² cannot forget samples, so its estimators start over every ``window``
+    samples; a quantile comes from the previous ones until the new ones have
+    seen half a window. Of blocks longer than ``max_block`` only that many
+    evenly spaced samples go into the quantile estimates.
+    """
+    max_block=1000
+    def __init__(self,window=None,alpha=0.05,quantiles=(0.05,0.5,0.95),values=()):
+        self.window=window
+        self.moments=Moments()
+        self._ewma=EWMA(alpha)
+        self._estimators={p:P2Quantile(p) for p in quantiles}
+        self.reset(values)
+
+    def reset(self,values=()):
+        """ start over with the samples in ``values`` """
+        v=_finite(values)
+        self.moments.reset(v)
+        self.removed=0 # samples removed since the moments were computed exactly
+        self._ewma.value=np.nan
+        self._ewma.add(v)
+        self._estimators={p:P2Quantile(p) for p in self._estimators}
+        self._previous={}
+        self._epoch=0 # samples that went into the current quantile estimators
+        self._add_quantiles(v)
+
+    def track_quantile(self,p,values=()):
+        """ estimate the ``p`` quantile too, starting with the samples in ``values`` """
+        if p not in self._estimators:
+            e=self._estimators[p]=P2Quantile(p)
+            v=_finite(values)
+            if len(v)>self.max_block:
+                v=v[np.linspace(0,len(v)-1,self.max_block).astype(int)]
+            for x in v.tolist():
+                e.add(x)
+
+    def add(self,values,removed=()):
+        """ add samples; ``removed`` are the ones that left the window """
+        self.moments.remove(removed)
+        self.removed+=len(removed)
+        self.moments.add(values)
+        v=_finite(values)
+        self._ewma.add(v)
+        self._add_quantiles(v)
+
+    def _add_quantiles(self,v):
+        if len(v)>self.max_block:
+            v=v[np.linspace(0,len(v)-1,self.max_block).astype(int)]
+        for x in v.tolist():
+            if self.window and self._epoch>=self.window:
+                self._previous=self._estimators
+                self._estimators={p:P2Quantile(p) for p in self._previous}
+                self._epoch=0
+            for e in self._estimators.values():
+                e.add(x)
+            self._epoch+=1
+
+    def resync(self,values,window=None):
+        """ compute the moments exactly from the samples in the window, against rounding errors from ``remove`` """
+        if window is not None:
+            self.window=window
+        self.moments.reset(values)
+        self.removed=0
+
+    @property
+    def count(self):
+        return self.moments.n
+
+    @property
+    def sum(self):
+        return self.moments.sum
+
+    @property
+    def mean(self):
+        return self.moments.mean if self.moments.n else np.nan
+
+    @property
+    def var(self):
+        return self.moments.var
+
+    @property
+    def std(self):
+        return np.sqrt(self.moments.var)
+
+    @property
+    def ewma(self):
+        return self._ewma.value
+
+    def quantile(self,p):
+        """ the estimate of a quantile that was given or added with ``track_quantile`` """
+        e=self._estimators[p]
+        prev=self._previous.get(p)
+        if prev is not None and 2*e.n<(self.window or 0):
+            return prev.value
+        return e.value
+
+    def summary(self):
+        d={"count":self.count,"mean":self.mean,"std":self.std,"ewma":self.ewma}
+        for p in sorted(self._estimators):
+            d["q%g"%(100*p)]=self.quantile(p)
+        return d
+
+    def __repr__(self):
+        return "StreamStats(%s)"%", ".join("%s=%.4g"%kv for kv in self.summary().items())
@@ -0,0 +1,53 @@
+"""Tests of the min/max envelopes of long curves"""
+import numpy as np
+from fluxi.ringbuffer import RingBuffer
+from fluxi.decimate import MinMaxPyramid,ArraySource,envelope
+
+def test_envelope():
+    assert envelope(np.arange(10.),10) is None
+    ys=np.zeros(1000)
+    ys[123]=5
+    ys[700]=-3
+    xs,env=envelope(ys,10)
+    assert len(xs)==len(env)==20
+    assert xs[::2].tolist()==list(range(0,1000,100))
+    #spikes survive the decimation
+    assert env[3]==5 and env[14]==-3
+
+def test_pyramid_of_array():
+    ys=np.cumsum(np.random.default_rng(0).normal(size=100000))
+    pyramid=MinMaxPyramid()
+    pyramid.update(ArraySource(ys))
+    assert pyramid.envelope(0,0,1000,800) is None
+    xs,env=pyramid.envelope(0,0,len(ys),500)
+    assert 500<=len(xs)<=1000
+    assert np.nanmin(env)==ys.min() and np.nanmax(env)==ys.max()
+    #each column holds the extremes of its samples
+    cols=xs[::2].astype(int).tolist()+[len(ys)]
+    for c in range(len(cols)-1):
+        seg=ys[cols[c]:cols[c+1]]
+        assert env[2*c]==seg.min() and env[2*c+1]==seg.max()
+
+def test_pyramid_follows_ring():
+    rng=np.random.default_rng(1)
+    ring=RingBuffer(rows=2,length=5000)
+    pyramid=MinMaxPyramid(factor=4)
+    data=np.zeros((2,0))
+    for n in (3,1000,4,7000,999):
+        block=rng.normal(size=(2,n))
+        ring.extend(block)
+        data=np.concatenate((data,block),axis=1)
+        pyramid.update(ring)
+    assert pyramid.done==ring.count
+    kept=data[:,-ring.size:]
+    for row in range(2):
+        xs,env=pyramid.envelope(row,ring.count-ring.size,ring.count,100)
+        #only samples that are still in the ring, the partly dropped first block is left out
+        assert np.nanmin(env)>=kept[row].min() and np.nanmax(env)<=kept[row].max()
+        assert np.nanmax(env)>=kept[row,1000:].max() and np.nanmin(env)<=kept[row,1000:].min()
+    #clearing the ring starts the pyramid over
+    ring.clear()
+    ring.extend(np.ones(3000))
+    pyramid.update(ring)
+    xs,env=pyramid.envelope(0,0,3000,100)
+    assert np.nanmin(env)==np.nanmax(env)==1
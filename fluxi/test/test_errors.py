@@ -0,0 +1,39 @@
+"""Tests of the error aggregation"""
+import sys
+from fluxi.errors import ErrorAggregator
+
+def _fail(i):
+    raise ValueError("value %d"%i)
+
+def test_error_aggregation():
+    agg=ErrorAggregator()
+    agg.echo=False
+    for i in range(1000):
+        try:
+            _fail(i)
+        except ValueError:
+            record=agg.report(source="loop:Test")
+            #reported again by an outer handler, counted once
+            agg.report(sys.exc_info(),source="loop:Outer")
+    try:
+        {}["x"]
+    except KeyError:
+        agg.report()
+    records=agg.records()
+    assert len(records)==2 and agg.total==1001
+    assert records[0].type=="KeyError"
+    assert records[1] is record
+    assert record.count==1000 and record.message=="value 999"
+    assert record.sources=={"loop:Test","loop:Outer"}
+    assert "_fail" in record.traceback and record.first<=record.last
+    version=agg.version
+    agg.clear()
+    assert agg.records()==[] and agg.version>version
+
+def test_error_limit():
+    agg=ErrorAggregator()
+    agg.echo=False
+    agg.max_records=3
+    for i in range(5):
+        agg.add(("E",i),"E","message","traceback")
+    assert [r.signature for r in agg.records()]==[("E",4),("E",3),("E",2)]
@@ -16,4 +16,431 @@ def test_complex_gui():
 #    fl.Choose("More/Choose").setValues(["a","b","c"])
     fl.wait(1)
     del fl
-    #%%
\ No newline at end of file
+    #%%
+def test_render_scheduler():
+    """All fluxis share one scheduler that records frame statistics"""
+    from fluxi import Fluxi
+    fl=Fluxi("Scheduler Test")
+    fl2=Fluxi("Scheduler Test 2")
+    assert fl.scheduler is fl2.scheduler
+    fl.P("A Float").v=3
+    fl.scheduler.frame()
+    st=fl.scheduler.stats[-1]
+    assert st.draw_time>=0 and st.backlog>=0
+    assert "dropped" in fl.scheduler.summary()
+    del fl,fl2
+
+def test_create_from_thread():
+    """Parameters created from a background thread in one round trip"""
+    import threading
+    from fluxi import Fluxi
+    fl=Fluxi("Dispatch Test")
+    created=[]
+    ticks=fl._dispatcher.ticks
+    def work():
+        created.extend(fl.g_many(["f:Thread/p%d"%i for i in range(50)]))
+    th=threading.Thread(target=work)
+    th.start()
+    while th.is_alive():
+        fl.wait(0.01)
+    assert [m.id for m in created]==["f:Thread/p%d"%i for i in range(50)]
+    assert fl._dispatcher.ticks-ticks<=2
+    del fl
+
+def test_param_model():
+    """Parameters are rows of a model, editors only exist while editing"""
+    from fluxi import Fluxi
+    from fluxi.ptree import Qt
+    fl=Fluxi("Tree Test")
+    for i in range(200):
+        fl.P("Many/p%d"%i).v=i
+    fl.B("Many/b").v=True
+    fl._redraw()
+    model=fl.g("tree:Parameters").model
+    p=fl.P("Many/p7").p
+    assert p.getValue()==7.
+    assert model.data(model.indexOf(p,0))=="p7"
+    changed=[]
+    p.sigValueChanged.connect(lambda param,value: changed.append(value))
+    model.setData(model.indexOf(p,1),2.5)
+    assert changed==[2.5]
+    fl.P("Many/p8").remove()
+    assert [c.title for c in fl._group("Many").p.children][7:9]==["p7","p9"]
+    assert fl.B("Many/b").p.data(1,Qt.CheckStateRole)==Qt.Checked
+    del fl
+
+def test_subscribe():
+    """Many subscribers, throttled to the newest value"""
+    import time
+    from fluxi import Fluxi
+    fl=Fluxi("Subscribe Test")
+    p=fl.P("Drag")
+    latest,every=[],[]
+    p.subscribe(lambda mux,value: latest.append(value),max_rate=10)
+    sub=p.subscribe(lambda mux,value: every.append(value),mode="all",thread="worker")
+    for i in range(100):
+        p._ui_element_changed(None,float(i))
+    t0=time.time()
+    while (len(every)<100 or latest[-1:]!=[99.]) and time.time()-t0<5:
+        fl.wait(0.02)
+    assert every==[float(i) for i in range(100)]
+    assert latest[0]==0. and latest[-1]==99. and len(latest)<10
+    sub.cancel()
+    p._ui_element_changed(None,1.)
+    fl.wait(0.1)
+    assert len(every)==100
+    del fl
+
+def test_remote():
+    """Get and set values and arrays from another thread over a socket"""
+    import threading
+    import numpy as np
+    from fluxi import Fluxi
+    from fluxi.remote import RemoteClient
+    fl=Fluxi("Remote Test")
+    fl.P("Remote/a").v=1.5
+    fl.P("Remote/b").v=0
+    fl.Im("Remote Image").v=np.arange(12.).reshape(3,4)
+    server=fl.serve()
+    results={}
+    def work():
+        with RemoteClient(server.address) as client:
+            client.set({"f:Remote/a":2.5,"f:Remote/b":3})
+            try:
+                client.set({"f:Remote/a":4.,"f:Remote/typo":1})
+            except RuntimeError as e:
+                results["error"]=str(e)
+            results.update(client.get(["f:Remote/a","f:Remote/b","im:Remote Image","f:missing"]))
+    th=threading.Thread(target=work)
+    th.start()
+    while th.is_alive():
+        fl.wait(0.01)
+    assert results["f:Remote/a"]==2.5 and results["f:Remote/b"]==3.
+    assert results["im:Remote Image"].shape==(3,4)
+    assert "f:missing" not in results
+    assert "f:Remote/typo" in results["error"] and "f:Remote/typo" not in fl.muxe
+    del fl
+
+def _process_loop_action(ctx):
+    import numpy as np
+    ctx.set("f:Process/passes",ctx.passes)
+    ctx.set("im:Process Image",np.full((300,300),ctx.get("f:Process/offset",0)+1.))
+    if ctx.passes==3:
+        raise RuntimeError("crash on purpose")
+
+def test_process_loop():
+    """A loop in a worker process sends values and images and is restarted after a crash"""
+    import time
+    from fluxi import Fluxi
+    fl=Fluxi("Process Loop Test")
+    fl.P("Process/offset").v=2
+    loop=fl.g("ploop:Worker").share("f:Process/offset").setPause(0.01)
+    loop.restart_delay=0.1
+    loop.a=_process_loop_action
+    loop.start()
+    t0=time.time()
+    while loop.restarts<1 or fl.P("Process/passes").v<2:
+        assert time.time()-t0<10
+        fl.wait(0.02)
+    assert fl.Im("Process Image").v[0,0]==3.
+    #a value set in code reaches the worker too
+    fl.P("Process/offset").v=5
+    t0=time.time()
+    while fl.Im("Process Image").v[0,0]!=6.:
+        assert time.time()-t0<10
+        fl.wait(0.02)
+    #replacing the action does not wait for the old process
+    t0=time.time()
+    loop.a=_process_loop_action
+    assert time.time()-t0<0.5
+    loop.stop()
+    del fl
+
+def test_changes_since():
+    """Only the changed values are read again and returned as deltas"""
+    from fluxi import Fluxi
+    fl=Fluxi("Version Test")
+    a=fl.P("Versions/a")
+    b=fl.P("Versions/b")
+    version,values=fl.changes_since(0)
+    assert "f:Versions/a" in values and "f:Versions/b" in values
+    a.v=1
+    a.v=2
+    version2,delta=fl.changes_since(version)
+    assert delta=={"f:Versions/a":2.} and version2>version
+    assert fl.changes_since(version2)[1]=={}
+    assert fl.get_values()["f:Versions/a"]==2.
+    b.set_opt("Save/Save Value",False)
+    assert "f:Versions/b" not in fl.get_values()
+    fl.removeElement("f:Versions/a")
+    assert "f:Versions/a" not in fl.get_values()
+    #values published from other threads are all counted
+    import threading
+    version=fl.version
+    def publish():
+        for i in range(1000):
+            b.value=float(i)
+    threads=[threading.Thread(target=publish) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    #unread changes are kept once per element
+    assert len(fl._pending)<=1
+    assert fl.version==version+4000
+    del fl
+
+def test_options():
+    """Only the options that differ from their defaults are stored and saved"""
+    from fluxi import Fluxi
+    fl=Fluxi("Option Test")
+    p=fl.P("Options/p")
+    assert p.get_opts()=={}
+    assert p.get_opt("Save/Save Value") is True
+    assert fl.A("Options/action").get_opt("Save/Save Value") is False
+    assert fl.C("Options Chart").get_opt("Save/Save Value") is False
+    p.set_opt("Info/Help","some help")
+    assert p.get_opts()=={"Info/Help":"some help"}
+    p.set_opt("Info/Help","")
+    assert p.get_opts()=={} and "Info/Help" not in p.opvals
+    assert "Expanded" in fl._group("Options").options
+    fl._group("Options").set_opt("Expanded",False)
+    assert fl._group("Options").get_opts()=={"Expanded":False}
+    del fl
+
+def test_loop_errors():
+    """A failing loop is reported once per distinct error and stops after max_errors"""
+    import time
+    from fluxi import Fluxi
+    fl=Fluxi("Error Test")
+    calls=[]
+    def fail(loop):
+        calls.append(1)
+        raise RuntimeError("failed pass %d"%len(calls))
+    loop=fl.g("slowloop:Failing").setMaxErrors(5)
+    loop.setPause(0.001)
+    loop.a=fail
+    loop.start()
+    t0=time.time()
+    while loop.running:
+        assert time.time()-t0<10
+        fl.wait(0.01)
+    assert len(calls)==5 and loop.errors==5
+    record=[r for r in fl.errors.records() if "slowloop:Failing" in r.sources][0]
+    assert record.count>=5 and record.type=="RuntimeError"
+    assert "errors:Fluxi/Errors" in fl.muxe
+    del fl
+
+def test_log():
+    """Messages are collected in the background and shown filtered in the log dock"""
+    from fluxi import Fluxi
+    fl=Fluxi("Log Test")
+    for i in range(5000):
+        fl.log("measuring point %d"%i,source="scan")
+    fl.log("Could not load positioner","Error",source="devices")
+    fl.log("Could not load positioner","Error",source="devices")
+    fl.wait(0.5)
+    log=fl.Log()
+    log.draw()
+    assert len(log.v)==5001 and log.v[-1].count==2
+    log.setFilter("error")
+    assert [r.message for r in log.v]==["Could not load positioner"]
+    log.setFilter("debug",source="scan",text="point 4999")
+    assert len(log.v)==1
+    del fl
+
+def test_close():
+    """Closing stops all loops in parallel, a stuck one is abandoned after its deadline"""
+    import time
+    from fluxi import Fluxi
+    fl=Fluxi("Close Test")
+    idle=fl.g("loop:Idle")
+    idle.setPause(30)
+    idle.a=lambda loop: None
+    idle.start()
+    stuck=fl.g("loop:Stuck")
+    stuck.shutdown_timeout=0.3
+    stuck.a=lambda loop: time.sleep(2)
+    stuck.start()
+    fl.wait(0.1)
+    report=fl.close()
+    assert report.stopped==["loop:Idle"] and report.abandoned==["loop:Stuck"]
+    #the abandoned loop is not waited for again when it is deleted
+    assert report.duration<1.5*stuck.shutdown_timeout
+    assert fl.close() is report and len(fl.muxe)==0
+
+def test_autosave_off():
+    """Closing does not write the journal when autosave is turned off"""
+    import os
+    from fluxi import Fluxi
+    fl=Fluxi("Autosave Off Test")
+    fl.B("Fluxi/Autosave values").v=False
+    fl.P("Unsaved").v=3.
+    name=fl.journal.journalname
+    size=os.path.getsize(name) if os.path.exists(name) else 0
+    fl.close()
+    assert (os.path.getsize(name) if os.path.exists(name) else 0)==size
+
+def test_replay_without_cfg():
+    """The journal is replayed also if the last session ended before a cfg was saved"""
+    import os
+    from fluxi import Fluxi
+    from fluxi.journal import ValueJournal
+    name="Replay Test"
+    j=ValueJournal(name+".values.json")
+    for fn in [name+".cfg.json",j.filename,j.journalname]:
+        if os.path.exists(fn):
+            os.remove(fn)
+    j.append({"f:Replayed":3.})
+    j.close()
+    fl=Fluxi(name)
+    assert fl.P("Replayed").v==3. and fl.journal.values["f:Replayed"]==3.
+    del fl
+
+def test_chart_ring():
+    """The chart keeps its samples when resized and v is a copy in chronological order"""
+    import numpy as np
+    from fluxi import Fluxi
+    fl=Fluxi("Chart Test")
+    c=fl.C("Ring")
+    c.setLength(4)
+    for i in range(6):
+        c.add([i,-i])
+    assert c.v.tolist()==[[2,3,4,5],[-2,-3,-4,-5]]
+    assert c.arrpos==2 and c.arrs[0].tolist()==[4,5,2,3]
+    v=c.v
+    c.add([6,-6])
+    assert v[0,-1]==5
+    c.setLength(2)
+    assert c.v.tolist()==[[5,6],[-5,-6]]
+    c.draw()
+    assert list(c.curves[0].yData)==[5,6]
+    #a curve with a shorter length is aligned with the newest samples of the others
+    c.setLength(4)
+    c.setLength(1,curve=1)
+    c.draw()
+    assert list(c.curves[0].xData)==[0,1,2,3] and list(c.curves[1].xData)==[3]
+    c.v=np.ones((3,10))
+    assert c.v.shape==(3,2)
+    del fl
+
+def test_chart_add_block():
+    """Blocks of samples are added at once, also for more than 20 curves"""
+    import numpy as np
+    from fluxi import Fluxi
+    fl=Fluxi("Chart Block Test")
+    c=fl.C("Block")
+    c.setLength(100)
+    c.add_block(np.arange(30.))
+    assert c.v[0,-30:].tolist()==list(range(30))
+    block=np.random.rand(25,300)
+    c.add_block(block)
+    assert c.v.shape==(25,100) and (c.v==block[:,-100:]).all()
+    c.draw()
+    assert len(c.curves)==25
+    del fl
+
+def test_chart_time_window():
+    """In time mode the chart keeps the samples of the time window and draws only those"""
+    import numpy as np
+    from fluxi import Fluxi
+    fl=Fluxi("Chart Time Test")
+    c=fl.C("Timed")
+    c.setLength(4)
+    c.setTimeWindow(10.)
+    for i in range(100):
+        c.add([i],t=0.5*i)
+    #20 samples are in the window, the length was doubled until they fit
+    assert c.length==32 and c.t[-1]==49.5
+    c.add_block(np.arange(10.),t=50+np.arange(10.))
+    c.draw()
+    xs,ys=c.curves[0].xData,c.curves[0].yData
+    assert xs[0]>=-10 and xs[-1]==0 and ys[-1]==9
+    assert len(xs)==len(ys)<c.length
+    c.setTimeWindow(None)
+    assert c.t is None
+    del fl
+
+def test_chart_stats():
+    """The statistics of a curve follow its samples without scanning the ring"""
+    import numpy as np
+    from fluxi import Fluxi
+    fl=Fluxi("Chart Stats Test")
+    c=fl.C("Stats")
+    c.setLength(100)
+    c.add_block(np.arange(50.))
+    st=c.stats(0)
+    last=c.stats(0,window=20)
+    for i in range(50,130):
+        c.add([i])
+    assert st.count==100 and np.isclose(st.mean,np.mean(np.arange(30.,130.)))
+    assert last.count==20 and np.isclose(last.std,np.arange(110.,130.).std())
+    assert c.mean()[0]==st.mean
+    c.setTrim(10)
+    c.add_block(np.r_[np.arange(95.),[1e6]*5])
+    c.draw()
+    lo,hi=c.plot.getViewBox().viewRange()[1]
+    assert hi<1e6
+    c.clear()
+    assert np.isnan(c.stats(0).mean)
+    del fl
+
+def test_chart_stats_long_block():
+    """A block longer than the window of the statistics replaces it"""
+    import numpy as np
+    from fluxi import Fluxi
+    fl=Fluxi("Chart Stats Block Test")
+    c=fl.C("Stats Block")
+    c.setLength(200)
+    c.add_block(np.arange(5.))
+    st=c.stats(0,window=20)
+    c.add_block(np.arange(100.,200.))
+    assert st.count==20 and st.mean==189.5
+    c.add_block(np.arange(200.,210.))
+    assert st.count==20 and st.mean==np.arange(190.,210.).mean()
+    del fl
+
+def test_graph_versions():
+    """Only changed curves are handed to pyqtgraph again, extend appends to a curve"""
+    import numpy as np
+    from fluxi import Fluxi
+    fl=Fluxi("Graph Versions Test")
+    g=fl.G("Versions")
+    for i in range(5):
+        g.set(np.random.rand(50),i=i)
+    g.draw()
+    static=g.curves[0].yData
+    g.set(np.arange(10.),i=4)
+    g.draw()
+    assert g.curves[0].yData is static and g.curves[4].yData.tolist()==list(range(10))
+    for k in range(100):
+        g.extend(5,np.arange(k*10,k*10+10.),np.ones(10)*k)
+    g.draw()
+    assert len(g.curves[5].xData)==1000 and g.curves[5].yData[-1]==99
+    g.extend(4,[10.,11.])
+    assert g.v[4]["ys"].tolist()==list(range(12))
+    g.clear()
+    assert g.v=={}
+    del fl
+
+def test_chart_decimate():
+    """Long curves are drawn as a min/max envelope with about two points per pixel column"""
+    import numpy as np
+    from fluxi import Fluxi
+    fl=Fluxi("Chart Decimate Test")
+    c=fl.C("Long")
+    c.setLength(200000)
+    ys=np.random.rand(200000)
+    ys[5000]=7
+    c.add_block(ys)
+    c.draw()
+    drawn=c.curves[0].yData
+    assert len(drawn)<=4*max(c._width(),100) and np.nanmax(drawn)==7
+    c.decimate=False
+    c.draw()
+    assert len(c.curves[0].yData)==200000
+    g=fl.G("Long Graph")
+    g.set(np.arange(200000.),ys)
+    g.draw()
+    assert len(g.curves[0].yData)<200000 and np.nanmax(g.curves[0].yData)==7
+    del fl
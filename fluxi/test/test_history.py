@@ -0,0 +1,34 @@
+"""Tests of the value history"""
+from fluxi.history import HistoryRing
+
+def test_history_ring():
+    h=HistoryRing(5)
+    for i in range(8):
+        h.append(i*10,t=float(i))
+    t,v=h.query()
+    assert list(t)==[3,4,5,6,7] and list(v)==[30,40,50,60,70]
+    t,v=h.query(since=4.5,until=6)
+    assert list(v)==[50,60]
+    t,v=h.query(max_points=2)
+    assert list(v)==[30,60]
+    t,v=h.query(copy=True)
+    h.append(80,t=8.)
+    assert list(v)==[30,40,50,60,70]
+
+def test_append_after_query():
+    """a view from query is not overwritten by the next capacity appends"""
+    h=HistoryRing(3)
+    for i in range(5):
+        h.append(i,t=float(i))
+    t,v=h.query()
+    for i in range(3):
+        h.append(99,t=5.+i)
+    assert list(v)==[2,3,4] and list(t)==[2,3,4]
+    assert list(h.query()[0])==[5,6,7]
+
+def test_history_ring_objects():
+    h=HistoryRing(3,dtype=object)
+    h.append("a",t=1.)
+    h.append("b",t=2.)
+    assert list(h.query(since=1.5)[1])==["b"]
+    assert len(h)==2
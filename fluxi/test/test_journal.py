@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+"""Snapshot and journal of parameter values"""
+from fluxi.journal import ValueJournal
+
+def test_replay_and_torn_line(tmp_path):
+    fn=str(tmp_path/"J.values.json")
+    j=ValueJournal(fn)
+    assert j.append({"f:a":1.0,"s:b":"x"})==2
+    assert j.append({"f:a":1.0})==0 #unchanged values are not written again
+    j.append({"f:a":2.0})
+    j.close()
+    with open(j.journalname,"a") as f:
+        f.write('{"id":"f:c","v"')
+    j=ValueJournal(fn)
+    assert j.load()=={"f:a":2.0,"s:b":"x"}
+    j.append({"f:d":4})
+    j.close()
+    assert ValueJournal(fn).load()=={"f:a":2.0,"s:b":"x","f:d":4}
+
+def test_compaction(tmp_path):
+    fn=str(tmp_path/"J.values.json")
+    j=ValueJournal(fn,compact_after=3)
+    j.append({"f:a":1,"f:b":2,"f:c":3})
+    assert j.entries==0
+    with open(j.journalname) as f:
+        assert f.read()==""
+    assert ValueJournal(fn).load()=={"f:a":1,"f:b":2,"f:c":3}
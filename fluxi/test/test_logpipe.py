@@ -0,0 +1,37 @@
+"""Tests of the log ring buffer and its file writer"""
+import json,os
+from fluxi.logpipe import LogPipe
+
+def test_ring_and_repeats():
+    pipe=LogPipe(capacity=100)
+    for i in range(250):
+        pipe.append("info","scan","measuring point %d"%i)
+    for i in range(5):
+        pipe.append("Error","scan","lost lock")
+    assert pipe.seq==251 and pipe.first==151
+    assert pipe.get(150) is None and pipe.get(151).message=="measuring point 151"
+    last=pipe.get(pipe.seq-1)
+    assert last.level=="error" and last.count==5
+    assert [r.seq for r in pipe.records(240)]==list(range(240,251))
+
+def test_file_rotation(tmpdir):
+    filename=str(tmpdir.join("test.log"))
+    pipe=LogPipe(capacity=100,filename=filename,max_bytes=5000,backups=2)
+    for i in range(1000):
+        pipe.append("debug","test","message %d"%i)
+    pipe.close()
+    files=sorted(os.listdir(str(tmpdir)))
+    assert files[:1]==["test.log.1"] and len(files)<=3
+    with open(filename+".1") as f:
+        lines=[json.loads(l) for l in f]
+    assert lines[0]["source"]=="test" and lines[0]["count"]==1
+
+def test_non_string_messages(tmpdir):
+    filename=str(tmpdir.join("test.log"))
+    pipe=LogPipe(capacity=100,filename=filename)
+    pipe.append("error","test",ValueError("bad value"))
+    pipe.append("info",None,3.5)
+    pipe.close()
+    with open(filename) as f:
+        lines=[json.loads(l) for l in f]
+    assert [l["msg"] for l in lines]==["bad value","3.5"]
@@ -0,0 +1,16 @@
+"""Tests of the hot path instrumentation"""
+from fluxi import perf
+
+def test_perf_sites():
+    perf.reset()
+    for dt in [1e-3]*90+[1e-1]*10:
+        perf.record("draw x",dt)
+    perf.record("action y",5e-3)
+    snap=perf.snapshot()
+    assert [s["site"] for s in snap]==["draw x","action y"]
+    x=snap[0]
+    assert x["count"]==100 and abs(x["total"]-1.09)<1e-9 and x["max"]==1e-1
+    assert 0.8e-3<x["p50"]<1.3e-3
+    assert 0.08<x["p95"]<=0.1
+    perf.reset()
+    assert perf.snapshot()==[]
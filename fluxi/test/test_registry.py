@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""Path, type and tag queries of the mux registry"""
+from fluxi.registry import MuxRegistry,parse_id
+
+class Dummy(object):
+    def __init__(self,id):
+        self.id=id
+
+def make_registry(ids):
+    reg=MuxRegistry()
+    for id in ids:
+        reg[id]=Dummy(id)
+    return reg
+
+def test_parse_id():
+    assert parse_id("f:Pos/target x")==("f","target x","Pos")
+    assert parse_id("f:A/B/c")==("f","c","A/B")
+    assert parse_id("b:flag")==("b","flag","")
+
+def test_find():
+    reg=make_registry(["f:Scan/a","f:Scan/b","i:Scan/c","f:Scan/Sub/d","f:Pos/x","group:Scan/Sub"])
+    assert sorted(m.id for m in reg.find("Scan/",type="f"))==["f:Scan/Sub/d","f:Scan/a","f:Scan/b"]
+    assert len(reg.find("Scan"))==5
+    assert reg.find("Nothing/")==[]
+    assert reg.group("Scan/Sub").id=="group:Scan/Sub"
+
+def test_tags_and_removal():
+    reg=make_registry(["f:Scan/a","f:Scan/b"])
+    reg.set_tags("f:Scan/a","hot, slow")
+    assert [m.id for m in reg.find("Scan/",tag="hot")]==["f:Scan/a"]
+    generation=reg.generation
+    del reg["f:Scan/a"]
+    assert reg.find(tag="hot")==[]
+    assert [m.id for m in reg.find("Scan/")]==["f:Scan/b"]
+    assert reg.generation==generation+1
+
+def test_dict_methods():
+    reg=make_registry(["f:Scan/a"])
+    reg.update({"f:Scan/b":Dummy("f:Scan/b")},**{"i:Scan/c":Dummy("i:Scan/c")})
+    reg.setdefault("f:Pos/x",Dummy("f:Pos/x"))
+    assert reg.setdefault("f:Pos/x",None).id=="f:Pos/x"
+    assert sorted(m.id for m in reg.find("Scan/"))==["f:Scan/a","f:Scan/b","i:Scan/c"]
+    id,mux=reg.popitem()
+    assert id=="f:Pos/x" and reg.find("Pos/")==[]
+    reg.set_tags("f:Scan/a","hot")
+    generation=reg.generation
+    reg.clear()
+    assert reg.find()==[] and reg.find(tag="hot")==[] and reg.generation>generation
+    reg["f:Scan/a"]=Dummy("f:Scan/a")
+    assert [m.id for m in reg.find("Scan/")]==["f:Scan/a"]
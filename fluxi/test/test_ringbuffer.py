@@ -0,0 +1,76 @@
+"""Tests of the ring buffer of the running charts"""
+import numpy as np
+from fluxi.ringbuffer import RingBuffer
+
+def test_append_and_views():
+    ring=RingBuffer(rows=1,length=5)
+    for i in range(7):
+        ring.append([i,10*i] if i>=3 else [i])
+    v=ring.view()
+    assert v.shape==(2,5) and not v.flags.writeable
+    assert v[0].tolist()==[2,3,4,5,6]
+    assert np.isnan(v[1,0]) and v[1,1:].tolist()==[30,40,50,60]
+    #a view shares the memory of the ring
+    assert np.shares_memory(v,ring.view(0))
+    assert ring.view(1,2).tolist()==[50,60]
+    ring.row_lengths[0]=3
+    assert ring.view(0).tolist()==[4,5,6]
+
+def test_extend_wraps():
+    ring=RingBuffer(rows=2,length=8)
+    data=np.arange(50.).reshape(2,25)
+    for i in range(0,25,3):
+        ring.extend(data[:,i:i+3])
+    assert (ring.view()==data[:,-8:]).all()
+    ring.extend(np.arange(100.,120.))
+    assert ring.view(0).tolist()==list(range(112,120))
+    assert np.isnan(ring.view(1)).all()
+
+def test_resize():
+    ring=RingBuffer(length=4)
+    ring.extend(np.arange(10.))
+    buf=ring._buf
+    ring.resize(2)
+    assert ring.view().tolist()==[[8,9]] and ring._buf is buf
+    #the samples that were dropped do not come back
+    ring.resize(4)
+    assert ring._buf is buf and np.isnan(ring.view(0)[:2]).all()
+    ring.resize(100)
+    assert ring.capacity>=100 and ring.view(0)[-2:].tolist()==[8,9]
+    assert np.isnan(ring.view(0)[:-2]).all()
+
+def test_extend_single_row():
+    ring=RingBuffer(length=7)
+    data=np.arange(40.)
+    for i in range(0,40,3):
+        ring.extend(data[i:i+3])
+    assert ring.view(0).tolist()==list(range(33,40)) and ring.count==40
+
+def test_grow_buffer():
+    from fluxi.ringbuffer import GrowBuffer
+    g=GrowBuffer(rows=2,capacity=4)
+    data=np.arange(40.).reshape(2,20)
+    for i in range(0,20,3):
+        g.extend(data[:,i:i+3])
+    assert g.count==20 and g.capacity==32
+    assert (g.view()==data).all() and not g.view().flags.writeable
+    assert g.view_range(5,30,1).tolist()==list(range(25,40))
+
+def test_view_has_headroom():
+    """a view that was handed out survives length further samples"""
+    ring=RingBuffer(length=5)
+    ring.extend(np.arange(7.))
+    v=ring.view(0)
+    for i in range(5):
+        ring.append(100.+i)
+    assert v.tolist()==[2,3,4,5,6]
+    v=ring.view(0)
+    ring.extend(np.arange(5.))
+    assert v.tolist()==[100,101,102,103,104]
+    ring.resize(ring.capacity)
+    assert ring.capacity>=2*ring.length
+    ring.load(np.arange(3.))
+    v=ring.view(0)
+    ring.extend([7.,8.,9.])
+    assert v.tolist()==[0,1,2]
+
@@ -21,3 +21,19 @@ def test_setget_int2():
     assert fl.Int("Integer").v==5
     
     
+
+def test_batch():
+    """ values of a batch are applied together at the end """
+    fl=Fluxi("Batch Test")
+    calls=[]
+    fl.P("Batch/a").v=0
+    fl.P("Batch/a").a=lambda m,v: calls.append(v)
+    with fl.batch():
+        for i in range(5):
+            fl.P("Batch/a").v=i
+            fl.P("Batch/a").emitChanged()
+        fl.Int("Batch/b").v=3
+        assert fl.P("Batch/a").v==0
+    assert fl.P("Batch/a").v==4 and fl.Int("Batch/b").v==3
+    assert calls==[4]
+    del fl
@@ -0,0 +1,33 @@
+"""Tests of stopping loops in parallel with deadlines"""
+import threading,time
+from fluxi.shutdown import stop_loops
+
+class _Loop(object):
+    """ a loop whose current pass needs ``busy`` seconds to end """
+    def __init__(self,id,busy,shutdown_timeout=0.5):
+        self.id=id
+        self.shutdown_timeout=shutdown_timeout
+        self.done=threading.Event()
+        self.busy=busy
+
+    def request_stop(self):
+        threading.Timer(self.busy,self.done.set).start()
+
+    def join(self,timeout=None):
+        return self.done.wait(timeout)
+
+def test_stop_loops():
+    loops=[_Loop("loop:a",0.2),_Loop("loop:b",0.2),_Loop("loop:stuck",5.),_Loop("loop:c",0.)]
+    t0=time.monotonic()
+    report=stop_loops(loops)
+    dt=time.monotonic()-t0
+    #in parallel: the slow ones take 0.2 s together, the stuck one is given up after its 0.5 s
+    assert 0.45<dt<0.8
+    assert report.stopped==["loop:a","loop:b","loop:c"] and report.abandoned==["loop:stuck"]
+    assert not report.ok and report.timings["loop:a"]<0.4
+    #delete reads the result instead of waiting again
+    assert [l._shutdown for l in loops]==[True,True,False,True]
+
+def test_stop_loops_timeout():
+    report=stop_loops([_Loop("loop:slow",1.,shutdown_timeout=10.)],timeout=0.1)
+    assert report.abandoned==["loop:slow"] and report.phases["loops"]<0.3
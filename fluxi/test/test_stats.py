@@ -0,0 +1,54 @@
+"""Tests of the running statistics of the charts"""
+import numpy as np
+from fluxi.stats import Moments,EWMA,P2Quantile,StreamStats
+
+def test_moments_window():
+    rng=np.random.default_rng(0)
+    x=rng.normal(3,2,size=5000)
+    m=Moments()
+    window=300
+    pos=0
+    while pos<len(x):
+        n=min(int(rng.integers(1,50)),len(x)-pos)
+        m.add(x[pos:pos+n])
+        m.remove(x[max(0,pos-window):max(0,pos+n-window)])
+        pos+=n
+    w=x[-window:]
+    assert m.n==window
+    assert np.isclose(m.mean,w.mean()) and np.isclose(m.var,w.var()) and np.isclose(m.sum,w.sum())
+    #NaN is skipped
+    m.reset([1.,np.nan,3.])
+    assert m.n==2 and m.mean==2
+
+def test_ewma():
+    x=np.random.default_rng(1).normal(size=200)
+    block,single=EWMA(0.1),EWMA(0.1)
+    block.add(x)
+    for v in x:
+        single.add([v])
+    assert np.isclose(block.value,single.value)
+
+def test_p2_quantile():
+    x=np.random.default_rng(2).normal(size=20000)
+    for p in (0.05,0.5,0.95):
+        q=P2Quantile(p)
+        for v in x:
+            q.add(v)
+        assert abs(q.value-np.percentile(x,100*p))<0.05
+    q=P2Quantile(0.5)
+    for v in (3.,1.,2.):
+        q.add(v)
+    assert q.value==2
+
+def test_stream_stats():
+    x=np.random.default_rng(3).uniform(size=3000)
+    st=StreamStats(window=1000,quantiles=(0.1,0.9))
+    for i in range(len(x)):
+        st.add(x[i:i+1],x[i-1000:i-999] if i>=1000 else ())
+    w=x[-1000:]
+    assert st.count==1000 and np.isclose(st.mean,w.mean()) and np.isclose(st.std,w.std())
+    assert abs(st.quantile(0.9)-0.9)<0.05 and abs(st.quantile(0.1)-0.1)<0.05
+    st.resync(w[-500:],window=500)
+    assert st.window==500 and np.isclose(st.mean,w[-500:].mean())
+    st.reset()
+    assert st.count==0 and np.isnan(st.mean) and np.isnan(st.quantile(0.1))
@@ -28,7 +28,8 @@ ms.P("Area/sizex").a=ms.P("Area/sizey").a=Overview.area_wh_changed
 def set_area_to_scan_area(*args):
     global scan
     dims=list(scan.origin)+list(scan.step*np.array(scan.sizepx))
-    Overview.area_changed(*dims)
+    with ms.batch():
+        Overview.area_changed(*dims)
 ms.A("Area/set extents to scan").a=set_area_to_scan_area
 
 def crosshair_dragged(pos):
@@ -79,8 +80,9 @@ def save(*args):
     scan.save(name=ms.S("Data/Temp Name").v)
     
     #scan.flush()
-    fluxi.helper.save_json(ms.get_values_all(),ms.S("Data/Name").v,add_to_name="values")
-    fluxi.helper.save_json(ms.get_values_all(),ms.S("Data/Temp Name").v,add_to_name="values")
+    values=ms.get_values_all()
+    fluxi.helper.save_json(values,ms.S("Data/Name").v,add_to_name="values")
+    fluxi.helper.save_json(values,ms.S("Data/Temp Name").v,add_to_name="values")
     if hasattr(mm, "save_data"):
         mm.save_data()
     if hasattr(lock, "save_data"):
@@ -673,9 +675,9 @@ def statemachine(p=None,v=None):
         if mm.q_record():
             v=mm.getValue()
             ms.C("Measured Values").add(v)
-            lastValues=ms.C("Measured Values").v[0,-20:]
-            if lastValues.mean()!=0:
-                ms.C("Stddev of Values").add(lastValues.std()/lastValues.mean())
+            lastValues=ms.C("Measured Values").stats(0,window=20)
+            if lastValues.mean!=0:
+                ms.C("Stddev of Values").add(lastValues.std/lastValues.mean)
             ms.P("Measure/Last Value").v=v
             update_data(v)
         st("prepare next")
@@ -685,7 +687,7 @@ def statemachine(p=None,v=None):
         dt=time.time()-starttime
         ms.C("measurement times").add(dt)
         scan.savetoarray("record_time",dt)
-        ms.P("Measure/Mean time").v=np.nanmean(ms.C("measurement times").arrs,1)[0]  
+        ms.P("Measure/Mean time").v=ms.C("measurement times").stats(0).mean
         ms.P("Measure/Remaining time [h]").v=round((remaining_points()*ms.P("Measure/Mean time").v)/3600,3)
         if ms.B("Scan/Scanning").v:
             ms.S("Data/Last measurement").v=time.strftime("%Y-%m-%d %H:%M:%S")